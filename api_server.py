@@ -1,23 +1,79 @@
 import os
+import json
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 from models.app_logger import AppLogger
-from models.config_manager import ConfigManager
+from models.config_manager import ConfigManager, RevisionConflict
+from models.merge_patch import MergePatch
+from models.screenshot_archive import ScreenshotArchive
+from models.task_scheduler import TaskScheduler
+from models.api_auth import ApiAuth
 
 app = Flask(__name__)
 CORS(app)
 
 cfg_mgr = ConfigManager.instance()
+auth = ApiAuth.instance()
 
 # ============= LOGGING MIDDLEWARE =============
 
 @app.before_request
 def log_request_info():
     # Only log state-changing methods to avoid spamming read logs
-    if request.method in ['POST', 'PUT', 'DELETE']:
+    if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
         AppLogger.log(f"API Request: {request.method} {request.path} from {request.remote_addr}", category="SYSTEM")
 
+# ============= AUTH & RATE LIMITING =============
+
+# Reachable without a token (login itself is rate limited separately)
+PUBLIC_ENDPOINTS = {'api_status', 'auth_login'}
+
+# GET endpoints loaded by the browser itself (EventSource, <img src>, download links),
+# which can't set an Authorization header: ?token= is accepted here
+QUERY_TOKEN_ENDPOINTS = {'stream_logs', 'get_screenshot', 'get_screenshot_thumbnail', 'get_archived_log'}
+
+
+def _too_many_requests(retry_after):
+    response = jsonify({
+        "status": "error",
+        "message": "Too many requests"
+    })
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response, 429
+
+
+def _request_token():
+    """Bearer token from the Authorization header (or ?token= on QUERY_TOKEN_ENDPOINTS)."""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[7:].strip()
+    if request.method == 'GET' and request.endpoint in QUERY_TOKEN_ENDPOINTS:
+        return request.args.get('token')
+    return None
+
+
+@app.before_request
+def authenticate_request():
+    """Per-IP token bucket for every request, then a session token for everything but PUBLIC_ENDPOINTS."""
+    if request.method == 'OPTIONS':
+        return None  # CORS preflight
+
+    allowed, retry_after = auth.api_limiter.allow(request.remote_addr)
+    if not allowed:
+        return _too_many_requests(retry_after)
+
+    if request.endpoint in PUBLIC_ENDPOINTS or request.endpoint is None:
+        return None  # Public, or unknown path (-> 404)
+
+    if not auth.validate(_request_token()):
+        return jsonify({
+            "status": "error",
+            "message": "Authentication required"
+        }), 401
+    return None
+
+
 @app.after_request
 def log_response_info(response):
     # Log errors or significant state changes
@@ -39,15 +95,85 @@ def api_status():
     })
 
 
+@app.route('/api/auth/login', methods=['POST'])
+def auth_login():
+    """
+    Exchange the admin password for a session token.
+    Body: {"password": "..."} -> {"token", "expires_in"}; send as "Authorization: Bearer <token>".
+    """
+    allowed, retry_after = auth.login_limiter.allow(request.remote_addr)
+    if not allowed:
+        return _too_many_requests(retry_after)
+
+    data = request.get_json(silent=True) or {}
+    token, expires_in = auth.login(data.get('password'), client=request.remote_addr)
+    if not token:
+        AppLogger.log(f"API login failed from {request.remote_addr}", category="SYSTEM")
+        return jsonify({
+            "status": "error",
+            "message": "Invalid password"
+        }), 401
+
+    AppLogger.log(f"API login from {request.remote_addr}", category="SYSTEM")
+    return jsonify({
+        "status": "success",
+        "token": token,
+        "expires_in": expires_in
+    })
+
+
+@app.route('/api/auth/logout', methods=['POST'])
+def auth_logout():
+    """Revoke the token used for this request"""
+    auth.revoke(_request_token())
+    return jsonify({
+        "status": "success",
+        "message": "Logged out"
+    })
+
+
+def _if_match_revision():
+    """
+    Revision from the If-Match header (None if absent or '*').
+    Manager clients send back the ETag of their last GET so concurrent edits don't overwrite each other.
+    """
+    value = request.headers.get('If-Match')
+    if not value or value.strip() == '*':
+        return None
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        return -1  # Never matches -> 412
+
+
+def _revision_conflict(error):
+    response = jsonify({
+        "status": "error",
+        "message": str(error),
+        "revision": error.current
+    })
+    response.headers['ETag'] = f'"{error.current}"'
+    return response, 412
+
+
+def _with_etag(response):
+    response.headers['ETag'] = f'"{cfg_mgr.revision}"'
+    return response
+
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
-    """Get current configuration"""
+    """Get current configuration (ETag = revision id)"""
     config = cfg_mgr.get_config()
     if config:
-        return jsonify({
+        return _with_etag(jsonify({
             "status": "success",
+            "revision": cfg_mgr.revision,
             "config": config
-        })
+        }))
     else:
         return jsonify({
             "status": "error",
@@ -57,7 +183,7 @@ def get_config():
 
 @app.route('/api/config', methods=['POST'])
 def update_config():
-    """Update configuration"""
+    """Update configuration (optional If-Match: "<revision>" -> 412 if someone else saved first)"""
     try:
         new_config = request.json
 
@@ -67,19 +193,82 @@ def update_config():
                 "message": "No config data provided"
             }), 400
 
-        success, message = cfg_mgr.update_config(new_config)
+        # Every schema error at once, with its path
+        _, errors = cfg_mgr.validate(new_config)
+        if errors:
+            return jsonify({
+                "status": "error",
+                "message": "Validation failed",
+                "errors": errors
+            }), 400
+
+        success, message = cfg_mgr.update_config(new_config, expected_revision=_if_match_revision())
 
         if success:
-            return jsonify({
+            return _with_etag(jsonify({
                 "status": "success",
+                "message": message,
+                "revision": cfg_mgr.revision
+            }))
+        else:
+            return jsonify({
+                "status": "error",
                 "message": message
-            })
+            }), 400
+
+    except RevisionConflict as e:
+        return _revision_conflict(e)
+    except Exception as e:
+        AppLogger.log(f"API error: {e}", category="ERROR")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/api/config', methods=['PATCH'])
+def patch_config():
+    """
+    Partial update (JSON Merge Patch, RFC 7396), e.g. {"discord_settings": {"enabled": false}}.
+    Only the sent keys change (null = reset to default); only affected subsystems reload.
+    Optional If-Match: "<revision>" -> 412 if someone else saved first.
+    """
+    try:
+        # Accept application/merge-patch+json as well as application/json
+        patch = request.get_json(force=True, silent=True)
+
+        if not isinstance(patch, dict) or not patch:
+            return jsonify({
+                "status": "error",
+                "message": "Merge patch must be a non-empty JSON object"
+            }), 400
+
+        # Preview against the current config to report every schema error with its path;
+        # patch_config() re-applies the patch to the live snapshot under the update lock
+        _, errors = cfg_mgr.validate(MergePatch.apply(cfg_mgr.get_config(), patch))
+        if errors:
+            return jsonify({
+                "status": "error",
+                "message": "Validation failed",
+                "errors": errors
+            }), 400
+
+        success, message = cfg_mgr.patch_config(patch, expected_revision=_if_match_revision())
+
+        if success:
+            return _with_etag(jsonify({
+                "status": "success",
+                "message": message,
+                "revision": cfg_mgr.revision
+            }))
         else:
             return jsonify({
                 "status": "error",
                 "message": message
             }), 400
 
+    except RevisionConflict as e:
+        return _revision_conflict(e)
     except Exception as e:
         AppLogger.log(f"API error: {e}", category="ERROR")
         return jsonify({
@@ -89,13 +278,86 @@ def update_config():
 
 
 @app.route('/api/config/backups', methods=['GET'])
+@app.route('/api/config/revisions', methods=['GET'])
 def list_backups():
-    """List available config backups"""
+    """List config revisions, newest first"""
     try:
-        backups = cfg_mgr.get_backup_list()
+        revisions = cfg_mgr.get_backup_list()
+        return _with_etag(jsonify({
+            "status": "success",
+            "revision": cfg_mgr.revision,
+            "backups": revisions
+        }))
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/api/config/revisions/<int:revision>', methods=['GET'])
+def get_config_revision(revision):
+    """Full config of one revision"""
+    config = cfg_mgr.get_revision(revision)
+    if config is None:
+        return jsonify({"status": "error", "message": f"Revision {revision} not found"}), 404
+    return jsonify({
+        "status": "success",
+        "revision": revision,
+        "current": revision == cfg_mgr.revision,
+        "config": config
+    })
+
+
+@app.route('/api/config/revisions/<int:revision>/diff', methods=['GET'])
+def diff_config_revision(revision):
+    """
+    Changes from a revision to another one.
+    Query param: ?against=<revision> (default: current config)
+    """
+    against = request.args.get('against', type=int)
+    changes = cfg_mgr.diff_revisions(revision, against)
+    if changes is None:
+        return jsonify({"status": "error", "message": "Revision not found"}), 404
+    return jsonify({
+        "status": "success",
+        "from": revision,
+        "to": against if against is not None else cfg_mgr.revision,
+        "changes": changes
+    })
+
+
+@app.route('/api/config/rollback/<int:revision>', methods=['POST'])
+def rollback_config(revision):
+    """Restore an earlier revision (saved as a new revision; honours If-Match)"""
+    try:
+        if cfg_mgr.get_revision(revision) is None:
+            return jsonify({"status": "error", "message": f"Revision {revision} not found"}), 404
+
+        success, message = cfg_mgr.rollback(revision, expected_revision=_if_match_revision())
+        if not success:
+            return jsonify({"status": "error", "message": message}), 400
+        return _with_etag(jsonify({
+            "status": "success",
+            "message": message,
+            "revision": cfg_mgr.revision
+        }))
+    except RevisionConflict as e:
+        return _revision_conflict(e)
+    except Exception as e:
+        AppLogger.log(f"API error: {e}", category="ERROR")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/api/scheduler', methods=['GET'])
+def list_scheduled_jobs():
+    """Lists periodic background jobs with their next/last run times."""
+    try:
+        jobs = TaskScheduler.instance().get_jobs()
         return jsonify({
             "status": "success",
-            "backups": backups
+            "count": len(jobs),
+            "jobs": jobs
         })
     except Exception as e:
         return jsonify({
@@ -108,8 +370,8 @@ def list_backups():
 def get_logs():
     """
     Returns TODAY's logs.
-    - If lines <= 500: Serves from RAM (fast)
-    - If lines > 500: Reads from disk (complete history)
+    - If lines fit in the memory buffer (log_buffer_size, default 500): Serves from RAM (fast)
+    - Otherwise: Reads from disk (complete history)
 
     Query param: ?lines=500 (optional, default 500, max 5000)
     """
@@ -118,7 +380,7 @@ def get_logs():
         line_count = max(10, min(line_count, 5000))  # Clamp between 10 and 5000
 
         # Smart switching: RAM vs Disk
-        if line_count <= 500:
+        if line_count <= AppLogger.get_buffer_size():
             # Fast path: Memory buffer
             logs = AppLogger.get_recent_logs(line_count)
             source = "memory"
@@ -140,6 +402,176 @@ def get_logs():
         }), 500
 
 
+def _parse_categories_arg():
+    """?category=ALERT,NETWORK -> ['ALERT', 'NETWORK'] (None = all)."""
+    category = request.args.get('category')
+    if not category:
+        return None
+    return [c.strip().upper() for c in category.split(",") if c.strip()] or None
+
+
+@app.route('/api/logs/poll', methods=['GET'])
+def poll_logs():
+    """
+    Long-poll for new log records (cheap replacement for re-fetching /api/logs).
+    Query params (all optional):
+      ?cursor=<seq>       last seq received (omit on first call to get the buffered backlog)
+      ?category=ALERT     comma-separated filter
+      ?timeout=25         seconds to wait for new records (0-30)
+      ?limit=500          max records per response (1-500)
+    The response 'cursor' is passed back on the next call; 'dropped' counts records
+    that left the buffer before this client read them.
+    """
+    try:
+        cursor = request.args.get('cursor', type=int)
+        timeout = max(0.0, min(request.args.get('timeout', default=25.0, type=float), 30.0))
+        limit = max(1, min(request.args.get('limit', default=500, type=int), 500))
+
+        records, cursor, dropped = AppLogger.get_logs_since(cursor, _parse_categories_arg(), limit, timeout)
+        return jsonify({
+            "status": "success",
+            "cursor": cursor,
+            "dropped": dropped,
+            "count": len(records),
+            "records": [record.to_dict() for record in records]
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/api/logs/stream', methods=['GET'])
+def stream_logs():
+    """
+    Server-Sent Events stream of new log records.
+    - Each record is one 'data:' event with 'id: <seq>' (browsers resume via Last-Event-ID)
+    - 'event: dropped' reports records lost because the client fell behind the buffer
+    - A keep-alive comment is sent every 15s while idle
+    - The session token is re-checked on every pass: logout, expiry or an admin password
+      change ends the stream
+    Query params: ?cursor=<seq>, ?category=ALERT,NETWORK
+    """
+    cursor = request.args.get('cursor', type=int)
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    categories = _parse_categories_arg()
+    token = _request_token()
+
+    def generate(cursor):
+        while auth.validate(token):
+            records, cursor, dropped = AppLogger.get_logs_since(cursor, categories, 200, timeout=15.0)
+            if dropped:
+                yield f"event: dropped\ndata: {json.dumps({'count': dropped, 'cursor': cursor})}\n\n"
+            for record in records:
+                yield f"id: {record.seq}\ndata: {json.dumps(record.to_dict())}\n\n"
+            if not records and not dropped:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(generate(cursor)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _parse_time_arg(name):
+    """Query arg as epoch seconds; accepts epoch numbers or ISO timestamps (2025-11-30T14:00:00)."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+@app.route('/api/logs/query', methods=['GET'])
+def query_logs():
+    """
+    Structured log query across today's log and archives (uses the '.idx' side indexes).
+    Query params (all optional):
+      ?start=2025-11-30T14:00:00&end=2025-11-30T15:00:00   ISO or epoch seconds
+      ?category=ALERT,NETWORK                              comma-separated
+      ?limit=1000                                          max records (1-5000)
+    Example: GET /api/logs/query?category=ALERT&start=2025-11-29T14:00&end=2025-11-29T15:00
+    """
+    try:
+        start = _parse_time_arg('start')
+        end = _parse_time_arg('end')
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid start/end (use ISO format or epoch seconds)"
+        }), 400
+
+    try:
+        limit = max(1, min(request.args.get('limit', default=1000, type=int), 5000))
+
+        records = AppLogger.query_logs(start, end, _parse_categories_arg(), limit)
+        return jsonify({
+            "status": "success",
+            "count": len(records),
+            "records": records
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/api/logs/search', methods=['GET'])
+def search_logs():
+    """
+    Full-text search across today's log and all archives.
+    Query params:
+      ?q=PC-7 offline        terms (all must match, case-insensitive; field values included)
+      ?category=ALERT        comma-separated filter (optional)
+      ?start=&end=           ISO or epoch seconds (optional)
+      ?order=desc|asc        newest first (default) / oldest first (e.g. "when did this first appear")
+      ?offset=0&limit=50     pagination (limit max 500)
+    """
+    try:
+        start = _parse_time_arg('start')
+        end = _parse_time_arg('end')
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid start/end (use ISO format or epoch seconds)"
+        }), 400
+
+    try:
+        query = request.args.get('q', default="").strip()
+        categories = _parse_categories_arg()
+        if not query and not categories:
+            return jsonify({
+                "status": "error",
+                "message": "Provide a search query (?q=) or a category filter"
+            }), 400
+
+        offset = max(0, request.args.get('offset', default=0, type=int))
+        limit = max(1, min(request.args.get('limit', default=50, type=int), 500))
+        newest_first = request.args.get('order', default="desc") != "asc"
+
+        results, has_more = AppLogger.search_logs(query, categories, start, end, offset, limit, newest_first)
+        return jsonify({
+            "status": "success",
+            "query": query,
+            "offset": offset,
+            "count": len(results),
+            "has_more": has_more,
+            "results": results
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
 @app.route('/api/logs/archive', methods=['GET'])
 def list_archived_logs():
     """
@@ -164,10 +596,16 @@ def list_archived_logs():
 def get_archived_log(filename):
     """
     Returns the contents of a specific archived log.
-    Example: GET /api/logs/archive/info-2025-11-30.log
+    Example: GET /api/logs/archive/info-2025-11-30.log.gz (compressed archives are decompressed on the fly)
+    Optional pagination: ?offset=0&limit=1000 (limit max 5000, omit for the whole file)
     """
     try:
-        logs = AppLogger.get_archived_log(filename)
+        offset = max(0, request.args.get('offset', default=0, type=int))
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, 5000))
+
+        logs, has_more = AppLogger.get_archived_log(filename, offset, limit)
 
         if logs is None:
             return jsonify({
@@ -178,7 +616,9 @@ def get_archived_log(filename):
         return jsonify({
             "status": "success",
             "filename": filename,
+            "offset": offset,
             "lines": len(logs),
+            "has_more": has_more,
             "logs": logs
         })
     except Exception as e:
@@ -197,7 +637,7 @@ def delete_archived_log(filename):
     """
     try:
         # Security: Only allow deletion of archive files, not other system files
-        if not filename.startswith("info-") or not filename.endswith(".log"):
+        if not AppLogger.is_archive_name(filename):
             return jsonify({
                 "status": "error",
                 "message": "Invalid filename format"
@@ -220,8 +660,8 @@ def delete_archived_log(filename):
                 "message": "Archive file not found"
             }), 404
 
-        # PERMANENT DELETION (no recycle bin)
-        os.remove(file_path)
+        # PERMANENT DELETION (no recycle bin), side indexes included
+        AppLogger.remove_archive(file_path)
 
         AppLogger.log("Purged log file via API", category="ARCHIVE")  # Don't log filename (security)
 
@@ -242,6 +682,69 @@ def delete_archived_log(filename):
             "message": "Deletion failed"
         }), 500
 
+# ============= SCREENSHOT ARCHIVE =============
+
+@app.route('/api/screenshots', methods=['GET'])
+def list_screenshots():
+    """
+    Lists archived screenshots, newest first.
+    Query params (all optional):
+      ?start=<epoch>&end=<epoch>   time window (e.g. around an incident)
+      ?kind=routine|incident       capture type
+      ?cause=ISP_DOWN              incident cause
+      ?limit=100                   max entries (1-1000)
+    """
+    try:
+        archive = ScreenshotArchive.instance()
+        limit = max(1, min(request.args.get('limit', default=100, type=int), 1000))
+        entries = archive.query(
+            start=request.args.get('start', type=float),
+            end=request.args.get('end', type=float),
+            kind=request.args.get('kind'),
+            cause=request.args.get('cause'),
+            limit=limit
+        )
+        return jsonify({
+            "status": "success",
+            "count": len(entries),
+            "stats": archive.get_stats(),
+            "screenshots": entries
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/api/screenshots/<digest>', methods=['GET'])
+def get_screenshot(digest):
+    """
+    Serves an archived screenshot by content hash.
+    Supports HTTP Range requests (206 Partial Content) for resumable downloads.
+    """
+    archive = ScreenshotArchive.instance()
+    if not archive.is_valid_hash(digest) or not archive.has_object(digest):
+        return jsonify({
+            "status": "error",
+            "message": "Screenshot not found"
+        }), 404
+
+    return send_file(archive.object_path(digest), mimetype='image/webp', conditional=True, max_age=86400)
+
+
+@app.route('/api/screenshots/<digest>/thumbnail', methods=['GET'])
+def get_screenshot_thumbnail(digest):
+    """Serves a small WebP thumbnail (generated on first request, then cached)."""
+    thumb_path = ScreenshotArchive.instance().get_thumbnail_path(digest)
+    if thumb_path is None:
+        return jsonify({
+            "status": "error",
+            "message": "Screenshot not found"
+        }), 404
+
+    return send_file(thumb_path, mimetype='image/webp', conditional=True, max_age=86400)
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
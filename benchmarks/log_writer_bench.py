@@ -0,0 +1,100 @@
+"""
+Log Writer Benchmark
+Compares the old per-line open/append/close logging with the background LogWriter,
+and checks line integrity while a second process appends like the watchdog does.
+
+Usage: python benchmarks/log_writer_bench.py [lines]
+Runs in a temporary folder; nothing is written next to the app.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.file_lock import FileLock
+from models.log_record import LogRecord
+from models.log_writer import LogWriter
+
+
+def per_line_open(path, lines):
+    """Old AppLogger behaviour: stat for rotation + open/append/close per line."""
+    start = time.perf_counter()
+    for i in range(lines):
+        if os.path.exists(path):
+            os.path.getsize(path)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"[{stamp}] [BENCH] message {i}\n")
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def log_writer(path, lines):
+    """Returns (time spent by callers, time until everything is on disk)."""
+    writer = LogWriter(path, 1 << 40, lambda label: None)
+    start = time.perf_counter()
+    for i in range(lines):
+        writer.write(LogRecord(time.time(), "BENCH", f"message {i}"))
+    enqueued = time.perf_counter() - start
+    writer.close(timeout=60)
+    return enqueued, time.perf_counter() - start
+
+
+def watchdog_appender(path, lines):
+    """Second process appending the way watchdog_service.log_watchdog_event does."""
+    for i in range(lines):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        lock = FileLock(path + ".lock")
+        try:
+            lock.acquire(timeout=2.0)
+            with open(path, 'ab') as f:
+                f.write(f"[{stamp}] [WATCHDOG] watchdog line {i}\n".encode("utf-8"))
+        finally:
+            lock.close()
+
+
+def check_integrity(path, expected_app, expected_watchdog):
+    app = watchdog = torn = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = LogRecord.parse(line)
+            if record is None or not line.endswith("\n"):
+                torn += 1
+            elif record.category == "WATCHDOG":
+                watchdog += 1
+            else:
+                app += 1
+    return app == expected_app and watchdog == expected_watchdog and torn == 0, (app, watchdog, torn)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tmp = tempfile.mkdtemp(prefix="logbench-")
+    try:
+        print(f"Lines per run: {lines}\n")
+
+        caller, total = per_line_open(os.path.join(tmp, "per_line.log"), lines)
+        print(f"Per-line open/close : {caller * 1e6 / lines:7.2f} us/line in caller, {total:6.2f}s total")
+
+        caller, total = log_writer(os.path.join(tmp, "writer.log"), lines)
+        print(f"LogWriter           : {caller * 1e6 / lines:7.2f} us/line in caller, {total:6.2f}s until written")
+
+        # Concurrent appends from a second process
+        shared = os.path.join(tmp, "shared.log")
+        watchdog_lines = max(1, lines // 20)
+        proc = multiprocessing.Process(target=watchdog_appender, args=(shared, watchdog_lines))
+        proc.start()
+        log_writer(shared, lines)
+        proc.join()
+        ok, counts = check_integrity(shared, lines, watchdog_lines)
+        print(f"\nCross-process appends: app={counts[0]} watchdog={counts[1]} torn={counts[2]} -> {'OK' if ok else 'FAILED'}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
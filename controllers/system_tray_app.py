@@ -14,7 +14,10 @@ import api_server
 from models.security_manager import SecurityManager
 from views.main_window import MainWindow
 from models.sentinel_worker import SentinelWorker
+from models.screen_capture import ScreenCapture
+from models.task_scheduler import TaskScheduler
 from models.app_logger import AppLogger
+from models.log_retention import LogRetention
 from views.settings_dialog import SettingsDialog
 
 
@@ -141,7 +144,11 @@ class SystemTrayController(QObject):
 
             item.obj.activated.connect(self.on_tray_icon_activated)
 
-        self.apply_stealth_mode()
+        from models.config_manager import ConfigManager
+        startup_config = ConfigManager.instance().get_config()
+        AppLogger.initialize()
+        self.apply_logging_settings(startup_config)
+        self.apply_stealth_mode(startup_config)
 
         # 6. Worker Signals
         self.worker.sig_status_update.connect(self.update_infrastructure_icons)
@@ -277,6 +284,8 @@ class SystemTrayController(QObject):
                 self.worker.running = False
                 self.worker_thread.quit()
                 self.worker_thread.wait()
+                TaskScheduler.instance().stop()
+                ScreenCapture.shutdown()
                 self.app.quit()
             else:
                 QMessageBox.warning(None, "Access Denied", "Incorrect Password!")
@@ -299,16 +308,27 @@ class SystemTrayController(QObject):
                 from PySide6.QtWidgets import QMessageBox
                 QMessageBox.warning(None, "Access Denied", "Incorrect Admin Password!")
 
+    def apply_logging_settings(self, config):
+        """Logger limits from 'system_settings' (rate limits, live buffer, archive retention)."""
+        sys_settings = config.get("system_settings", {})
+        AppLogger.configure_rate_limits(sys_settings.get("log_rate_limits"))
+        AppLogger.configure_buffer(sys_settings.get("log_buffer_size", 500))
+
+        # Archive retention runs in the background: first pass shortly after startup
+        # (after compression), then hourly; a changed limit applies right away
+        retention = LogRetention.instance()
+        limits_changed = retention.configure(config)
+        TaskScheduler.instance().schedule("log_retention", retention.run, 3600, first_delay=30)
+        if limits_changed:
+            TaskScheduler.instance().run_now("log_retention")
+        # Final "repeated N times" line once a repeating message stops
+        TaskScheduler.instance().schedule("log_summaries", AppLogger.flush_summaries, 60)
+
     def apply_stealth_mode(self, config=None):
         if config is None:
             from models.config_manager import ConfigManager
             config = ConfigManager.instance().get_config()
 
-        retention_days = config.get("system_settings", {}).get("log_retention_days", 30)
-
-        AppLogger.initialize()
-        AppLogger.cleanup_old_logs(retention_days)
-
         self.env_state = config.get("system_settings", {}).get("env_state", False)
 
         # New: Get visibility dictionary (default to True if not present)
@@ -329,10 +349,17 @@ class SystemTrayController(QObject):
                 else:
                     item.obj.hide()
 
-    def on_config_changed(self, new_config):
+    def on_config_changed(self, change):
         """
-        Triggered when config is updated.
-        We just re-run apply_stealth_mode, which now handles both global stealth and individual toggles.
+        Triggered when config is updated (change = ConfigChange).
+        Only the settings this controller owns are re-applied: logger limits and tray visibility.
         """
-        AppLogger.log("Config changed. Re-applying tray visibility settings.", category="SYSTEM")
-        self.apply_stealth_mode(config=new_config)
+        config = None
+        if change.affects("system_settings.log_rate_limits", "system_settings.log_buffer_size",
+                          "system_settings.log_retention_days", "system_settings.log_retention_mb"):
+            config = change.new.as_dict()
+            self.apply_logging_settings(config)
+
+        if change.affects("system_settings.env_state", "system_settings.tray_visibility"):
+            AppLogger.log("Config changed. Re-applying tray visibility settings.", category="SYSTEM")
+            self.apply_stealth_mode(config=config or change.new.as_dict())
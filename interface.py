@@ -1,5 +1,6 @@
 import sys
 import ctypes
+import multiprocessing
 
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import QApplication, QMessageBox, QDialog
@@ -41,6 +42,9 @@ def check_and_create_vault():
 
 
 def main():
+    # 0. Screenshot encoder runs in a worker process (must be first in frozen builds)
+    multiprocessing.freeze_support()
+
     # 1. Check Admin Privileges (Required for ICMP)
     if not is_admin():
         ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
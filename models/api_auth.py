@@ -0,0 +1,142 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import threading
+
+from models.security_manager import SecurityManager
+
+
+class RateLimiter:
+    """
+    Per-client token buckets: each key (client IP) holds up to 'capacity' tokens,
+    refilled at 'rate' tokens per second; a request costs one token.
+    Buckets of idle clients are dropped once MAX_CLIENTS is reached.
+    """
+    MAX_CLIENTS = 1024
+
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self._lock = threading.Lock()
+        self._buckets = {}  # { key: [tokens, last_refill] }
+
+    def allow(self, key, cost=1.0):
+        """Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_CLIENTS:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.capacity, now]
+            else:
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0
+            return False, (cost - bucket[0]) / self.rate
+
+    def _prune(self, now):
+        """Drop buckets that have refilled completely (clients idle long enough to start fresh)."""
+        full = self.capacity / self.rate
+        for key in [k for k, (_, last) in self._buckets.items() if now - last >= full]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.MAX_CLIENTS:
+            self._buckets.clear()
+
+
+class ApiAuth:
+    """
+    Singleton Class.
+    Session tokens for the Config API, issued after admin password verification.
+    - Token: "<id>.<expiry>.<signature>" (HMAC-SHA256 with a per-process secret)
+    - Validation is a signature check plus a dict lookup: the vault is only used at login
+    - Tokens expire after TOKEN_TTL seconds and die with the process (restart = log in again)
+      or with an admin password change (SecurityManager calls revoke_all)
+    - Rate limits per client IP: every request (api_limiter) and login attempts (login_limiter,
+      strict - each attempt costs a scrypt verification)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    TOKEN_TTL = 3600
+    MAX_SESSIONS = 64
+
+    API_BURST = 60        # Requests a client may send at once
+    API_RATE = 10         # Sustained requests per second
+    LOGIN_BURST = 5       # Login attempts at once
+    LOGIN_RATE = 1 / 12   # Then one attempt every 12 seconds
+
+    def __init__(self):
+        self._secret = os.urandom(32)
+        self._lock = threading.Lock()
+        self._sessions = {}  # { token id: {"expires", "client"} }
+        self.api_limiter = RateLimiter(self.API_BURST, self.API_RATE)
+        self.login_limiter = RateLimiter(self.LOGIN_BURST, self.LOGIN_RATE)
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _sign(self, message):
+        digest = hmac.new(self._secret, message.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=")
+
+    def login(self, password, client=""):
+        """Returns (token, expires_in) for the admin password, or (None, 0)."""
+        if not isinstance(password, str) or not SecurityManager.verify_admin(password):
+            return None, 0
+
+        token_id = secrets.token_urlsafe(16)
+        expires = int(time.time()) + self.TOKEN_TTL
+        message = f"{token_id}.{expires}"
+
+        with self._lock:
+            now = time.time()
+            for key in [k for k, s in self._sessions.items() if s["expires"] <= now]:
+                del self._sessions[key]
+            while len(self._sessions) >= self.MAX_SESSIONS:
+                oldest = min(self._sessions, key=lambda k: self._sessions[k]["expires"])
+                del self._sessions[oldest]
+            self._sessions[token_id] = {"expires": expires, "client": client}
+
+        return f"{message}.{self._sign(message).decode()}", self.TOKEN_TTL
+
+    def _parse(self, token):
+        """Token id if the signature is valid and not expired, else None (never raises)."""
+        if not isinstance(token, str) or token.count(".") != 2:
+            return None
+        token_id, expires, signature = token.split(".")
+        try:
+            # Compared as bytes: non-ASCII input can't make compare_digest raise
+            if not hmac.compare_digest(signature.encode(), self._sign(f"{token_id}.{expires}")):
+                return None
+            if int(expires) <= time.time():
+                return None
+        except (TypeError, ValueError, UnicodeError):
+            return None
+        return token_id
+
+    def validate(self, token):
+        """True for a live session token (no I/O, no vault access)."""
+        token_id = self._parse(token)
+        return token_id is not None and token_id in self._sessions
+
+    def revoke(self, token):
+        """Log out a token. Returns True if it was live."""
+        token_id = self._parse(token)
+        with self._lock:
+            return self._sessions.pop(token_id, None) is not None
+
+    def revoke_all(self):
+        """Log out every session (admin password changed)."""
+        with self._lock:
+            self._sessions.clear()
@@ -1,25 +1,44 @@
 import os
+import sys
+import time
+import atexit
 import threading
 from datetime import datetime
-from collections import deque
 from utils.resource_manager import ResourceManager
+from models.log_writer import LogWriter
+from models.log_record import LogRecord
+from models.log_index import LogIndex
+from models.log_reader import LogReader
+from models.log_compression import LogCompressor
+from models.log_search import LogSearch
+from models.log_throttle import LogThrottle
+from models.log_ring import LogRing
 
 
 class AppLogger:
     """
     Centralized logging with daily rotation and archive.
     - Active log: 'info.log' (current day only)
-    - Archive: 'probes/' folder (historical logs, never auto-deleted)
-    - Memory buffer: Last 500 lines for real-time API serving
+    - Archive: 'probes/' folder (historical logs, gzip-compressed in the background after rotation)
+    - Memory buffer: LogRing of the last records (log_buffer_size, default 500) for real-time API
+      serving, each with a sequence number (stream cursor for /api/logs/stream and /api/logs/poll)
+    - File output is batched by a background LogWriter thread (log() never touches the disk)
+    - Records are structured (LogRecord); every segment has a sparse '.idx' for time/category queries
+    - Archived segments get a '.terms' inverted index for full-text search
+    - Repetitive messages are collapsed by LogThrottle into "repeated N times" summaries
     """
     _log_file = "info.log"
     _archive_dir = "probes"
     _max_file_size = 5 * 1024 * 1024  # 5MB per file
-    _memory_buffer = deque(maxlen=500)
-    _lock = threading.Lock()
+    _memory_buffer = LogRing(500)  # Lock-free for readers, seq = stream cursor
     _log_path = None
     _archive_path = None
-    _current_date = None
+    _writer = None
+    _writer_lock = threading.Lock()
+    _compress_lock = threading.Lock()
+    _throttle = LogThrottle()
+    _compress_failed = set()
+    _console = None if (getattr(sys, 'frozen', False) or hasattr(sys, '__compiled__')) else sys.stdout
 
     @staticmethod
     def _get_log_path():
@@ -37,6 +56,33 @@ class AppLogger:
                 os.makedirs(AppLogger._archive_path)
         return AppLogger._archive_path
 
+    @staticmethod
+    def _get_writer():
+        """Start the background writer on first use."""
+        if AppLogger._writer is None:
+            with AppLogger._writer_lock:
+                if AppLogger._writer is None:
+                    AppLogger._writer = LogWriter(
+                        AppLogger._get_log_path(),
+                        AppLogger._max_file_size,
+                        AppLogger._rotate_log
+                    )
+                    atexit.register(AppLogger.shutdown)
+        return AppLogger._writer
+
+    @staticmethod
+    def flush(timeout: float = 5.0):
+        """Block until all queued lines have been written to info.log."""
+        if AppLogger._writer is not None:
+            AppLogger._writer.flush(timeout)
+
+    @staticmethod
+    def shutdown():
+        """Drain the queue and close info.log (called at exit)."""
+        AppLogger.flush_summaries(everything=True)
+        if AppLogger._writer is not None:
+            AppLogger._writer.close()
+
     @staticmethod
     def initialize():
         """
@@ -45,7 +91,7 @@ class AppLogger:
         If so, archives it immediately before the app starts writing.
         Must be called once at application startup.
         """
-        try:
+        def check_stale():
             log_path = AppLogger._get_log_path()
             if os.path.exists(log_path):
                 # Get the last modification time of the file
@@ -58,40 +104,22 @@ class AppLogger:
                     AppLogger.log(f"Found stale log from {mod_date}. Rotating...", category="LOGGER")
                     AppLogger._rotate_log(mod_date)
 
-            # Set current date for the session
-            AppLogger._current_date = datetime.now().strftime("%Y-%m-%d")
+        try:
+            # Runs on the writer thread with info.log closed (lines queued earlier land first)
+            AppLogger._get_writer().call(check_stale)
+
+            # Archives left uncompressed by a previous run (crash, older version)
+            AppLogger._start_archive_processing()
 
         except Exception as e:
             print(f"⚠️ Logger Initialization Failed: {e}")
 
     @staticmethod
-    def _check_rotation():
+    def _rotate_log(date_label: str):
         """
-        Check if we need to rotate the log:
-        1. Date changed (midnight rollover or app restart after date change)
-        2. File size exceeds limit
+        Move current info.log to probes/ folder with date stamp.
+        Called by the LogWriter thread with the file handle closed.
         """
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_path = AppLogger._get_log_path()
-
-        # Date-based rotation
-        if AppLogger._current_date is None:
-            AppLogger._current_date = today
-
-        if AppLogger._current_date != today and os.path.exists(log_path):
-            AppLogger._rotate_log(AppLogger._current_date)
-            AppLogger._current_date = today
-
-        # Size-based rotation
-        if os.path.exists(log_path):
-            file_size = os.path.getsize(log_path)
-            if file_size >= AppLogger._max_file_size:
-                timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
-                AppLogger._rotate_log(timestamp)
-
-    @staticmethod
-    def _rotate_log(date_label: str):
-        """Move current info.log to probes/ folder with date stamp."""
         try:
             log_path = AppLogger._get_log_path()
             archive_path = AppLogger._get_archive_path()
@@ -105,48 +133,154 @@ class AppLogger:
 
             # If file already exists (e.g. restart same day or size rotation), append counter
             counter = 1
-            while os.path.exists(archived_full_path):
+            while os.path.exists(archived_full_path) or os.path.exists(LogCompressor.compressed_path(archived_full_path)):
                 archived_name = f"info-{date_label}-part{counter}.log"
                 archived_full_path = os.path.join(archive_path, archived_name)
                 counter += 1
 
             os.rename(log_path, archived_full_path)
+
+            # Side index travels with its segment
+            if os.path.exists(LogIndex.path_for(log_path)):
+                os.replace(LogIndex.path_for(log_path), LogIndex.path_for(archived_full_path))
+            AppLogger._track_archive(archived_full_path)
+
             AppLogger.log(f"Rotated log to {archived_name}", category="LOGGER")
+            AppLogger._start_archive_processing()
 
         except Exception as e:
             print(f"⚠️ Log Rotation Failed: {e}")
 
     @staticmethod
-    def log(message: str, category: str = "INFO"):
+    def _start_archive_processing():
+        """Compress and index pending archives on a background thread (never on the writer thread)."""
+        threading.Thread(target=AppLogger.process_archives, name="LogArchiver", daemon=True).start()
+
+    @staticmethod
+    def process_archives():
+        """
+        Gzip every uncompressed archive in probes/ into a block-seekable '.log.gz',
+        then build the search index ('.terms') of archives that don't have one yet.
+        Only one pass runs at a time; a pass already in progress picks up new files.
+        """
+        if not AppLogger._compress_lock.acquire(blocking=False):
+            return
+        try:
+            archive_path = AppLogger._get_archive_path()
+            count = 0
+            before = 0
+            after = 0
+
+            while True:
+                pending = [f for f in os.listdir(archive_path) if f.startswith("info-") and f.endswith(".log")]
+                pending = [f for f in pending if os.path.join(archive_path, f) not in AppLogger._compress_failed]
+                if not pending:
+                    break
+
+                for filename in pending:
+                    file_path = os.path.join(archive_path, filename)
+                    if os.path.exists(LogCompressor.compressed_path(file_path)):
+                        # Compressed earlier, original couldn't be removed at the time
+                        LogCompressor.remove_plain(file_path)
+                        if os.path.exists(file_path):
+                            AppLogger._compress_failed.add(file_path)
+                        continue
+                    try:
+                        original, compressed = LogCompressor.compress(file_path)
+                        AppLogger._track_archive(file_path, present=False)
+                        AppLogger._track_archive(LogCompressor.compressed_path(file_path))
+                        count += 1
+                        before += original
+                        after += compressed
+                    except Exception as e:
+                        AppLogger._compress_failed.add(file_path)  # Don't retry until next start
+                        print(f"⚠️ Log Compression Failed: {e}")
+
+            if count > 0:
+                AppLogger.log(
+                    f"Compressed {count} log archives ({before // 1024} KB -> {after // 1024} KB)",
+                    category="LOGGER"
+                )
+
+            # Search index (archives are immutable once compressed)
+            for filename in AppLogger.get_archive_list():
+                file_path = os.path.join(archive_path, filename)
+                if not filename.endswith(LogCompressor.SUFFIX) or os.path.exists(LogSearch.path_for(file_path)):
+                    continue
+                try:
+                    LogSearch.build(file_path)
+                    AppLogger._track_archive(file_path)
+                except Exception as e:
+                    print(f"⚠️ Log Search Index Failed: {e}")
+
+        except Exception as e:
+            print(f"⚠️ Log Compression Failed: {e}")
+        finally:
+            AppLogger._compress_lock.release()
+
+    @staticmethod
+    def _track_archive(file_path, present=True):
+        """Keep the retention manager's size table current (no directory re-listing)."""
+        from models.log_retention import LogRetention  # Imports AppLogger
+        if present:
+            LogRetention.instance().track(file_path)
+        else:
+            LogRetention.instance().untrack(file_path)
+
+    @staticmethod
+    def log(message: str, category: str = "INFO", level: str = None, fields: dict = None):
         """
         Log a message to console, file, and memory buffer.
-        Automatically handles rotation.
+        File output and rotation happen on the LogWriter thread; this only enqueues.
 
         Args:
             message: The log message text
             category: Category tag (SYSTEM, NETWORK, ALERT, CONFIG, etc.)
+            level: Optional override of the category's default level (info/warning/error)
+            fields: Optional structured key/values stored with the record (e.g. {"pc": "PC-3"})
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_msg = f"[{timestamp}] [{category}] {message}\n"
+        # 0. Rate limit (suppressed repeats stop here: no record, no buffer, no I/O)
+        allowed, summary = AppLogger._throttle.check(category, message)
+        if summary is not None:
+            AppLogger._emit(*summary)
+        if not allowed:
+            return
+
+        AppLogger._emit(message, category, fields, level)
 
-        # 1. Console Output
-        print(full_msg.strip())
+    @staticmethod
+    def _emit(message, category, fields=None, level=None):
+        record = LogRecord(time.time(), category, message, level, fields)
 
-        with AppLogger._lock:
-            # 2. Memory Buffer (for real-time API)
-            AppLogger._memory_buffer.append(full_msg.strip())
+        # 1. Console Output (dev runs only - the compiled build has no console)
+        if AppLogger._console is not None:
+            print(record.format())
 
-            # 3. Check if rotation needed
-            AppLogger._check_rotation()
+        # 2. Memory Buffer (for real-time API; assigns record.seq, wakes long-polls)
+        AppLogger._memory_buffer.append(record)
 
-            # 4. File Output
-            try:
-                log_path = AppLogger._get_log_path()
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(full_msg)
+        # 3. File Output (queued, formatted on the writer thread)
+        AppLogger._get_writer().write(record)
+
+    @staticmethod
+    def configure_rate_limits(limits: dict = None):
+        """Apply 'system_settings.log_rate_limits' (None = built-in defaults)."""
+        AppLogger._throttle.configure(limits)
+
+    @staticmethod
+    def flush_summaries(everything: bool = False):
+        """Write the final "repeated N times" line of runs that went quiet (scheduler job)."""
+        for summary in AppLogger._throttle.collect_summaries(everything):
+            AppLogger._emit(*summary)
+
+    @staticmethod
+    def configure_buffer(size: int = 500):
+        """Apply 'system_settings.log_buffer_size' (records kept in memory for live viewers)."""
+        AppLogger._memory_buffer.resize(size)
 
-            except Exception as e:
-                print(f"⚠️ Log Write Failed: {e}")
+    @staticmethod
+    def get_buffer_size() -> int:
+        return AppLogger._memory_buffer.capacity
 
     @staticmethod
     def get_recent_logs(count: int = 500):
@@ -154,28 +288,145 @@ class AppLogger:
         Returns the last N lines from TODAY's log (memory buffer).
         Used by the API for real-time monitoring.
         """
-        with AppLogger._lock:
-            buffer_list = list(AppLogger._memory_buffer)
-            return buffer_list[-count:] if len(buffer_list) > count else buffer_list
+        return [record.format() for record in AppLogger._memory_buffer.latest(count)]
+
+    @staticmethod
+    def get_logs_since(cursor=None, categories=None, limit: int = 500, timeout: float = 0.0):
+        """
+        Cursor-based read of the memory buffer for live viewers.
+        Only records with seq > cursor are returned; waits up to 'timeout' seconds for new ones.
+
+        Args:
+            cursor: Last seq the caller has seen (None = start from the oldest buffered record)
+            categories: iterable of category names, None = all
+            limit: max records returned
+            timeout: long-poll wait in seconds (0 = return immediately)
+        Returns: (records, new_cursor, dropped)
+            dropped = records that fell out of the buffer before the caller read them
+        """
+        wanted = set(categories) if categories else None
+        predicate = (lambda record: record.category in wanted) if wanted else None
+        buffer = AppLogger._memory_buffer
+        deadline = time.monotonic() + timeout
+
+        while True:
+            records, cursor, dropped = buffer.since(cursor, limit, predicate)
+            if records or dropped:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            buffer.wait(cursor, remaining)
+
+        return records, cursor, dropped
+
+    @staticmethod
+    def search_logs(query: str, categories=None, start=None, end=None,
+                    offset: int = 0, limit: int = 50, newest_first: bool = True):
+        """
+        Full-text search across archives (inverted index) and today's log (scanned).
+        Example: search_logs("PC-7 offline") -> every record containing both terms.
+
+        Returns: (results, has_more) - results are record dicts with 'segment' and 'snippet'
+        """
+        AppLogger.flush()
+
+        segments = AppLogger._segments_for_range(start, end)
+        if newest_first:
+            segments.reverse()
+
+        results = []
+        skipped = 0
+        for segment in segments:
+            if not os.path.exists(segment):
+                continue
+            for record in LogSearch.search_segment(segment, query, categories, start, end, newest_first):
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if len(results) >= limit:
+                    return results, True
+                data = record.to_dict()
+                data["segment"] = os.path.basename(segment)
+                data["snippet"] = LogSearch.snippet(record, query)
+                results.append(data)
+        return results, False
+
+    @staticmethod
+    def _segments_for_range(start=None, end=None):
+        """
+        Log segments (archives + active info.log) that may hold records in [start, end],
+        oldest first. Archives are picked by the date in their name.
+        """
+        start_date = time.strftime("%Y-%m-%d", time.localtime(start)) if start is not None else None
+        end_date = time.strftime("%Y-%m-%d", time.localtime(end)) if end is not None else None
+
+        archive_path = AppLogger._get_archive_path()
+        segments = []
+        archives = AppLogger.get_archive_list()
+        compressed = set(archives)
+        for filename in archives:
+            if filename + LogCompressor.SUFFIX in compressed:
+                continue  # Mid-compression: the .gz is already complete
+            label_date = filename[5:15]  # info-YYYY-MM-DD...
+            if start_date and label_date < start_date:
+                continue
+            if end_date and label_date > end_date:
+                continue
+            segments.append(os.path.join(archive_path, filename))
+
+        segments.sort(key=lambda path: (os.path.getmtime(path), path))
+        segments.append(AppLogger._get_log_path())
+        return segments
+
+    @staticmethod
+    def query_logs(start=None, end=None, categories=None, limit: int = 1000):
+        """
+        Structured query across today's log and the archives.
+        Example: ALERT entries between 14:00 and 15:00 yesterday.
+
+        Args:
+            start, end: epoch seconds (inclusive), None = open-ended
+            categories: iterable of category names, None = all
+            limit: max records returned (oldest first)
+        Returns: list of record dicts
+        """
+        AppLogger.flush()
+
+        results = []
+        for segment in AppLogger._segments_for_range(start, end):
+            if not os.path.exists(segment):
+                continue
+            remaining = limit - len(results)
+            results.extend(LogIndex.query(segment, start, end, categories, remaining))
+            if len(results) >= limit:
+                break
+        return [record.to_dict() for record in results]
+
+    @staticmethod
+    def is_archive_name(filename: str) -> bool:
+        """True for archived segment names: info-*.log / info-*.log.gz"""
+        return filename.startswith("info-") and (filename.endswith(".log") or filename.endswith(".log" + LogCompressor.SUFFIX))
 
     @staticmethod
     def get_archive_list():
         """
-        Returns a list of archived log filenames in probes/.
+        Returns a list of archived log filenames in probes/ ('.log' and compressed '.log.gz').
         Sorted newest first.
         """
         try:
             archive_path = AppLogger._get_archive_path()
-            files = [f for f in os.listdir(archive_path) if f.startswith("info-") and f.endswith(".log")]
+            files = [f for f in os.listdir(archive_path) if AppLogger.is_archive_name(f)]
             return sorted(files, reverse=True)
         except Exception:
             return []
 
     @staticmethod
-    def get_archived_log(filename: str):
+    def get_archived_log(filename: str, offset: int = 0, limit: int = None):
         """
-        Returns the contents of a specific archived log file.
-        Returns None if file doesn't exist or error occurs.
+        Returns lines [offset, offset + limit) of a specific archived log file
+        (the whole file if limit is None) and whether more lines follow.
+        Returns (None, False) if file doesn't exist or error occurs.
         """
         try:
             archive_path = AppLogger._get_archive_path()
@@ -183,19 +434,16 @@ class AppLogger:
 
             # Security: Prevent path traversal
             if not os.path.abspath(file_path).startswith(os.path.abspath(archive_path)):
-                return None
+                return None, False
 
             if not os.path.exists(file_path):
-                return None
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                return None, False
 
-            return [line.strip() for line in lines]
+            return LogReader.page(file_path, max(0, offset), limit)
 
         except Exception as e:
             print(f"⚠️ Archive Read Failed: {e}")
-            return None
+            return None, False
 
     @staticmethod
     def sanitize_path(message: str) -> str:
@@ -209,39 +457,16 @@ class AppLogger:
         return sanitized
 
     @staticmethod
-    def cleanup_old_logs(retention_days: int):
-        """
-        Deletes log files in probes/ folder older than retention_days.
-        """
-        try:
-            archive_path = AppLogger._get_archive_path()
-            if not os.path.exists(archive_path):
-                return
-
-            now = datetime.now()
-            cutoff = retention_days * 86400  # Convert days to seconds
-
-            count = 0
-            for filename in os.listdir(archive_path):
-                file_path = os.path.join(archive_path, filename)
-
-                # Security check: only delete .log files
-                if not filename.endswith(".log"):
-                    continue
-
-                # Check age
-                if os.path.getmtime(file_path) < (now.timestamp() - cutoff):
-                    try:
-                        os.remove(file_path)
-                        count += 1
-                    except Exception:
-                        pass
-
-            if count > 0:
-                AppLogger.log(f"Cleaned up {count} old log files (Retention: {retention_days} days)", category="LOGGER")
-
-        except Exception as e:
-            print(f"⚠️ Log Cleanup Failed: {e}")
+    def remove_archive(file_path: str):
+        """Delete an archived segment with its side files (.idx, .terms). Raises if the segment can't be removed."""
+        os.remove(file_path)
+        for side_file in (LogIndex.path_for(file_path), LogSearch.path_for(file_path)):
+            try:
+                os.remove(side_file)
+            except OSError:
+                pass
+        LogSearch.forget(file_path)
+        AppLogger._track_archive(file_path, present=False)
 
     @staticmethod
     def get_todays_log_from_disk(count: int = 1000):
@@ -253,17 +478,15 @@ class AppLogger:
         try:
             log_path = AppLogger._get_log_path()
 
+            # Make sure queued lines are on disk before reading
+            AppLogger.flush()
+
             # If file doesn't exist yet (fresh start), return memory buffer
             if not os.path.exists(log_path):
                 return AppLogger.get_recent_logs(count)
 
-            # Read all lines from file
-            with open(log_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            # Strip newlines and return last N lines
-            lines = [line.strip() for line in lines]
-            return lines[-count:] if len(lines) > count else lines
+            # Read backwards from the end, only as far as N lines
+            return LogReader.tail(log_path, count)
 
         except Exception as e:
             print(f"⚠️ Disk Log Read Failed: {e}")
@@ -0,0 +1,70 @@
+class ConfigChange:
+    """
+    Structural diff between two config snapshots, emitted with sig_config_changed.
+    - paths: changed key paths as tuples, e.g. ('discord_settings', 'webhook_alerts')
+      (leaf level for nested dicts; lists and scalars compare as a whole)
+    - sections: changed top-level sections
+    Subsystems reload only what they own:
+        if change.affects("screenshot_settings.interval_minutes", "monitor_settings"): ...
+    """
+    __slots__ = ("old", "new", "paths", "sections")
+
+    def __init__(self, old, new, paths=None):
+        self.old = old  # ConfigSnapshot before the update (None at startup)
+        self.new = new  # ConfigSnapshot after the update
+        if paths is None:
+            paths = self.diff(old.as_dict() if old is not None else {}, new.as_dict())
+        self.paths = frozenset(paths)
+        self.sections = frozenset(path[0] for path in self.paths)
+
+    @staticmethod
+    def diff(old, new, prefix=()):
+        """Set of key paths whose values differ between two config dicts."""
+        paths = set()
+        for key in old.keys() | new.keys():
+            path = prefix + (key,)
+            if key not in old or key not in new:
+                paths.add(path)
+                continue
+            old_value, new_value = old[key], new[key]
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                paths |= ConfigChange.diff(old_value, new_value, path)
+            elif old_value != new_value or type(old_value) is not type(new_value):
+                paths.add(path)
+        return paths
+
+    @staticmethod
+    def describe(old, new):
+        """[{"path": "a.b", "old": ..., "new": ...}] for two config dicts (missing = None)."""
+        def lookup(config, path):
+            for key in path:
+                if not isinstance(config, dict) or key not in config:
+                    return None
+                config = config[key]
+            return config
+
+        return [
+            {"path": ".".join(map(str, path)), "old": lookup(old, path), "new": lookup(new, path)}
+            for path in sorted(ConfigChange.diff(old, new))
+        ]
+
+    def affects(self, *keys):
+        """True if any changed path is at, under, or above one of the dotted keys."""
+        for key in keys:
+            wanted = tuple(key.split("."))
+            for path in self.paths:
+                size = min(len(wanted), len(path))
+                if path[:size] == wanted[:size]:
+                    return True
+        return False
+
+    def merge(self, later):
+        """Combine with a later change (several updates applied at once)."""
+        return ConfigChange(self.old, later.new, self.paths | later.paths)
+
+    def __bool__(self):
+        return bool(self.paths)
+
+    def __repr__(self):
+        changed = ", ".join(sorted(".".join(map(str, path)) for path in self.paths))
+        return f"ConfigChange(v{self.old.version if self.old else 0}->v{self.new.version}: {changed})"
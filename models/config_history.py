@@ -0,0 +1,249 @@
+import os
+import copy
+import json
+import time
+import threading
+
+from models.app_logger import AppLogger
+from models.merge_patch import MergePatch
+
+
+class ConfigHistory:
+    """
+    Versioned config history (config_backups/history.log), replaces full-file backups.
+    - Append-only journal, one encrypted record per line (KeyService "backups" key):
+        {"rev": 12, "ts": ..., "source": "api", "patch": {...}}   merge-patch delta (RFC 7396)
+        {"rev": 20, "ts": ..., "source": "api", "full": {...}}    checkpoint (whole config)
+    - Revision ids increase monotonically and survive restarts and compaction
+    - A checkpoint is written every CHECKPOINT_EVERY revisions, so reading any revision
+      decrypts at most that many lines
+    - In-memory index (rev -> offset) built by one pass at startup; saving never lists or
+      stats the backup folder
+    - compact() keeps the newest MAX_REVISIONS (scheduler job)
+    """
+    FILENAME = "history.log"
+    CHECKPOINT_EVERY = 20
+    MAX_REVISIONS = 200
+
+    def __init__(self, directory, cipher):
+        self.path = os.path.join(directory, self.FILENAME)
+        self._cipher = cipher
+        self._lock = threading.Lock()
+        self._index = []          # [{"rev", "ts", "source", "sections", "offset", "length", "full"}]
+        self._head_config = None  # Config of the newest revision (base for the next patch)
+        self._base_rev = 0        # Head of a quarantined journal: new ids continue after it
+        self._load_index()
+
+    # ============= JOURNAL I/O =============
+
+    def _encode(self, record):
+        return self._cipher.encrypt(json.dumps(record, separators=(",", ":")).encode()) + b"\n"
+
+    def _decode(self, line):
+        return json.loads(self._cipher.decrypt(line.strip()).decode())
+
+    @staticmethod
+    def _entry(record, offset, length):
+        return {
+            "rev": record["rev"],
+            "ts": record["ts"],
+            "source": record.get("source", ""),
+            "sections": sorted(record["patch"]) if "patch" in record else [],
+            "offset": offset,
+            "length": length,
+            "full": "full" in record
+        }
+
+    def _load_index(self):
+        """
+        One pass over the journal. An unterminated final line (crash mid-append) is trimmed;
+        any other unreadable record (corruption, key change) moves the whole file aside to
+        history.log.corrupt and the history starts empty - nothing is deleted. Revision ids
+        continue after the old ones, so a client's If-Match can never match a reused id.
+        """
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        state = None
+        torn = False
+        with open(self.path, 'rb') as f:
+            for line in f:
+                length = len(line)
+                if not line.endswith(b"\n"):
+                    torn = True  # Only the last line can lack a newline
+                    break
+                try:
+                    record = self._decode(line)
+                    if "full" in record:
+                        state = record["full"]
+                    elif state is not None:
+                        state = MergePatch.apply(state, record["patch"])
+                    else:
+                        raise ValueError("patch without checkpoint")
+                except Exception as e:
+                    self._quarantine(len(self._index) + 1, e, self._highest_rev(f))
+                    return
+                self._index.append(self._entry(record, offset, length))
+                offset += length
+        self._head_config = state
+
+        if torn:
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def _highest_rev(self, f):
+        """
+        Upper bound of the revision ids in an unreadable journal: one id per line after the
+        last good record, or a larger id still decodable further down.
+        """
+        last_good = self._index[-1]["rev"] if self._index else 0
+        highest = last_good + 1  # The unreadable line itself
+        for line in f:
+            highest += 1
+            try:
+                highest = max(highest, int(self._decode(line)["rev"]))
+            except Exception:
+                continue
+        return highest
+
+    def _quarantine(self, line_number, error, highest_rev):
+        """Keep an unreadable journal for inspection and start a fresh one after highest_rev."""
+        corrupt_path = self.path + ".corrupt"
+        suffix = 1
+        while os.path.exists(corrupt_path):  # Never overwrite an earlier one
+            corrupt_path = f"{self.path}.corrupt.{suffix}"
+            suffix += 1
+        os.replace(self.path, corrupt_path)
+        self._index = []
+        self._head_config = None
+        self._base_rev = highest_rev
+        AppLogger.log(f"Config history unreadable at record {line_number} ({type(error).__name__}). "
+                      f"Old history set aside, continuing at revision {highest_rev + 1}.", category="ERROR")
+
+    def _append(self, record):
+        data = self._encode(record)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._index.append(self._entry(record, offset, len(data)))
+
+    def reencrypt(self, is_current):
+        """
+        Key rotation: rewrite the journal if any line fails is_current(token).
+        Returns True once every line uses the current key (or the journal is empty).
+        """
+        with self._lock:
+            if not self._index:
+                return True
+            with open(self.path, 'rb') as f:
+                lines = [f.read(entry["length"]) for entry in self._index]
+            if all(is_current(line.strip()) for line in lines):
+                return True
+
+            tmp_path = self.path + ".tmp"
+            new_index = []
+            with open(tmp_path, 'wb') as dst:
+                for entry, line in zip(self._index, lines):
+                    data = self._cipher.rotate(line.strip()) + b"\n"
+                    new_index.append(dict(entry, offset=dst.tell(), length=len(data)))
+                    dst.write(data)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            self._index = new_index
+            return True
+
+    # ============= PUBLIC =============
+
+    @property
+    def head(self):
+        """Newest revision id (0 = empty history)."""
+        return self._index[-1]["rev"] if self._index else self._base_rev
+
+    def head_config(self):
+        return copy.deepcopy(self._head_config)
+
+    def record(self, config, source=""):
+        """Append a revision for 'config'. Returns its revision id."""
+        with self._lock:
+            rev = self.head + 1
+            record = {"rev": rev, "ts": time.time(), "source": source}
+
+            patch = None
+            since_checkpoint = 0
+            for entry in reversed(self._index):
+                if entry["full"]:
+                    break
+                since_checkpoint += 1
+            if self._head_config is not None and since_checkpoint + 1 < self.CHECKPOINT_EVERY:
+                patch = MergePatch.create(self._head_config, config)
+
+            if patch is None:
+                record["full"] = config  # First revision, periodic checkpoint, or a null value
+            else:
+                record["patch"] = patch
+            self._append(record)
+            self._head_config = copy.deepcopy(config)
+            return rev
+
+    def revisions(self):
+        """Revision summaries, newest first."""
+        with self._lock:
+            return [
+                {"revision": e["rev"], "timestamp": e["ts"], "source": e["source"], "sections": e["sections"]}
+                for e in reversed(self._index)
+            ]
+
+    def get(self, rev):
+        """Full config of revision 'rev', or None if it is unknown/pruned."""
+        with self._lock:
+            position = next((i for i, e in enumerate(self._index) if e["rev"] == rev), None)
+            if position is None:
+                return None
+            start = position
+            while start > 0 and not self._index[start]["full"]:
+                start -= 1
+
+            state = None
+            with open(self.path, 'rb') as f:
+                for entry in self._index[start:position + 1]:
+                    f.seek(entry["offset"])
+                    record = self._decode(f.read(entry["length"]))
+                    state = record["full"] if "full" in record else MergePatch.apply(state, record["patch"])
+            return state
+
+    def compact(self):
+        """Drop revisions beyond MAX_REVISIONS (the oldest kept one becomes a checkpoint)."""
+        with self._lock:
+            excess = len(self._index) - self.MAX_REVISIONS
+            if excess <= 0:
+                return 0
+            keep = self._index[excess:]
+
+        first_config = self.get(keep[0]["rev"])
+
+        with self._lock:
+            keep = [e for e in self._index if e["rev"] >= keep[0]["rev"]]  # Appends since the check
+            tmp_path = self.path + ".tmp"
+            new_index = []
+            with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for i, entry in enumerate(keep):
+                    if i == 0:
+                        src.seek(entry["offset"])
+                        record = self._decode(src.read(entry["length"]))
+                        record.pop("patch", None)
+                        record["full"] = first_config
+                        data = self._encode(record)
+                    else:
+                        src.seek(entry["offset"])
+                        data = src.read(entry["length"])
+                    new_index.append(dict(entry, offset=dst.tell(), length=len(data), full=entry["full"] or i == 0))
+                    dst.write(data)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            dropped = len(self._index) - len(new_index)
+            self._index = new_index
+            return dropped
@@ -1,81 +1,47 @@
 import json
 import os
-import shutil
 import threading
 import base64
-from datetime import datetime
-from cryptography.fernet import Fernet
 from PySide6.QtCore import QObject, Signal
 from models.app_logger import AppLogger
 from utils.resource_manager import ResourceManager
-from models.security_manager import SecurityManager
+from models.key_service import KeyService
+from models.task_scheduler import TaskScheduler
+from models.config_snapshot import ConfigSnapshot
+from models.config_change import ConfigChange
+from models.config_history import ConfigHistory
+from models.config_schema import ConfigSchema
+from models.merge_patch import MergePatch
+
+
+class RevisionConflict(Exception):
+    """Optimistic concurrency failure: the config changed since the caller read it (HTTP 412)."""
+
+    def __init__(self, expected, current):
+        super().__init__(f"Config is at revision {current}, not {expected}")
+        self.expected = expected
+        self.current = current
 
 
 class ConfigManager(QObject):
     """
     Singleton Class.
     Centralizes all configuration access, file I/O, validation, and updates.
-    Handles encryption using machine-specific keys (cscf.dll).
+    Handles encryption using machine-bound keys from KeyService (cscf.dll).
+    The live configuration is an immutable ConfigSnapshot, replaced (never mutated) on update.
     """
     _instance = None
     _lock = threading.Lock()
 
-    # Signal emitted whenever config is updated (from API or Local)
-    sig_config_changed = Signal(dict)
+    # Signal emitted whenever config is updated (from API or Local), carries a ConfigChange
+    sig_config_changed = Signal(object)
 
     # CONSTANTS
     CONFIG_FILENAME = "cscf.dll"
     LEGACY_FILENAME = "config.json"
     BACKUP_DIR = "config_backups"
 
-    DEFAULT_CONFIG = {
-        "targets": {
-            "router": "192.168.1.1",
-            "server": "192.168.1.200",
-            "internet": "8.8.8.8"
-        },
-        "monitor_settings": {
-            "interval_seconds": 2,
-            "pc_subnet": "192.168.1",
-            "pc_start_range": 110,
-            "pc_count": 20
-        },
-        "verification_settings": {
-            "retry_delay_seconds": 1.0,
-            "secondary_target": "1.1.1.1",
-            "min_incident_duration_seconds": 10
-        },
-        "screenshot_settings": {
-            "enabled": True,
-            "interval_minutes": 60,
-            "resize_ratio": 1.0,
-            "quality": 80
-        },
-        "occupancy_settings": {
-            "enabled": True,
-            "mode": "session",
-            "min_session_minutes": 3,
-            "batch_delay_seconds": 30,
-            "hourly_snapshot_enabled": True
-        },
-        "discord_settings": {
-            "enabled": False,
-            "shop_name": "My Internet Cafe",
-            "webhook_alerts": "",
-            "webhook_occupancy": "",
-            "webhook_screenshots": ""
-        },
-        "system_settings": {
-            "env_state": False,
-            "log_retention_days": 30,
-            "tray_visibility": {
-                "router": True,
-                "server": True,
-                "internet": True,
-                "clients": True
-            }
-        }
-    }
+    DEFAULT_CONFIG = ConfigSchema.defaults()  # Single source: the schema
 
     def __new__(cls):
         if cls._instance is None:
@@ -88,7 +54,9 @@ class ConfigManager(QObject):
             return
         super().__init__()
         self.config = {}
-        self._config_dirty = False
+        self._snapshot = None
+        self._pending_change = None  # Changes not yet picked up by the worker thread
+        self._change_event = threading.Event()  # Set while a change is pending (wakes the worker)
         self._initialized = True
 
         # Resolve paths
@@ -96,13 +64,29 @@ class ConfigManager(QObject):
         self.abs_legacy_path = ResourceManager.get_resource_path(self.LEGACY_FILENAME)
         self.abs_backup_dir = ResourceManager.get_resource_path(self.BACKUP_DIR)
 
-        # Setup Encryption Key
-        self.cipher_key = SecurityManager._generate_key()
-        self.cipher = Fernet(self.cipher_key)
+        # Setup Encryption (machine-bound subkeys, derived once per process)
+        keys = KeyService.instance()
+        self.cipher = keys.cipher("config")
 
         # Ensure environment
         self._ensure_backup_dir()
+        self.history = ConfigHistory(self.abs_backup_dir, keys.cipher("backups"))
         self._load_initial_config()
+        self._repair_loaded_config()
+
+        # The file on disk is the truth: record it if the history doesn't end with it
+        # (fresh install, upgrade, or a crash between journal append and file replace)
+        if self.history.head_config() != self.config:
+            self.history.record(self.config, source="startup")
+        self._snapshot = ConfigSnapshot(self.config, version=self.history.head)
+
+        # History compaction runs in the background instead of on every save
+        TaskScheduler.instance().schedule("config_backup_prune", self._cleanup_old_backups, 3600, first_delay=60)
+
+        # Files still encrypted with an old key are re-encrypted in the background
+        keys.register_rewriter("config", self._reencrypt_config)
+        keys.register_rewriter("config_history", lambda: self.history.reencrypt(
+            lambda token: keys.is_current("backups", token)))
 
     @classmethod
     def instance(cls):
@@ -126,8 +110,15 @@ class ConfigManager(QObject):
                 decrypted_data = self.cipher.decrypt(encrypted_data)
                 self.config = json.loads(decrypted_data.decode())
             except Exception as e:
-                AppLogger.log("Load error. Using defaults.", category="CONFIG")
-                self.config = self.DEFAULT_CONFIG.copy()
+                # Unreadable file: fall back to the newest revision before the defaults
+                recovered = self.history.head_config()
+                if recovered is not None:
+                    AppLogger.log(f"Load error. Restored revision {self.history.head}.", category="CONFIG")
+                    self.config = recovered
+                    self._save_to_disk(self.config)
+                else:
+                    AppLogger.log("Load error. Using defaults.", category="CONFIG")
+                    self.config = self.DEFAULT_CONFIG.copy()
 
         # 2. Check for Legacy JSON (Migration)
         elif os.path.exists(self.abs_legacy_path):
@@ -150,151 +141,181 @@ class ConfigManager(QObject):
             self.config = self.DEFAULT_CONFIG.copy()
             self._save_to_disk(self.config)
 
+    def _repair_loaded_config(self):
+        """Startup pass of the schema: fill missing keys, replace invalid values with defaults."""
+        normalized, errors = ConfigSchema.validate(self.config, repair=True)
+        for error in errors:
+            AppLogger.log(f"Invalid setting {error['path']}: {error['message']}. Using default.", category="CONFIG")
+        if normalized != self.config:
+            self.config = normalized
+            self._save_to_disk(self.config)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Current immutable snapshot (no lock, no copy - the reference is swapped on update)."""
+        return self._snapshot
+
     def get_config(self) -> dict:
-        """Thread-safe read of the current configuration."""
+        """Deep copy of the current configuration (safe to edit; nested dicts are not shared)."""
+        return self._snapshot.as_dict()
+
+    def update_config(self, new_config: dict, source: str = "api",
+                      expected_revision: int = None) -> tuple[bool, str]:
+        """
+        Thread-safe update. Every accepted change becomes a new revision in the history.
+        source: who made the change ("api", "local", "rollback"), shown in the revision list.
+        expected_revision: revision the caller based its edit on (If-Match); raises
+            RevisionConflict if another client saved in between.
+        """
         with self._lock:
-            return self.config.copy()
+            if expected_revision is not None and expected_revision != self._snapshot.version:
+                raise RevisionConflict(expected_revision, self._snapshot.version)
+            return self._commit(new_config, source)
 
-    def update_config(self, new_config: dict) -> tuple[bool, str]:
+    def patch_config(self, patch: dict, source: str = "api",
+                     expected_revision: int = None) -> tuple[bool, str]:
         """
-        Thread-safe update.
+        Partial update with JSON Merge Patch (RFC 7396): only the keys in 'patch' change,
+        null resets a key to its default. The patch is applied to the live snapshot under
+        the update lock, so concurrent patches to different keys never overwrite each other.
         """
+        if not isinstance(patch, dict):
+            return False, "Patch must be a JSON object"
         with self._lock:
-            # Validate Structure
-            valid, error_msg = self._validate_config(new_config)
-            if not valid:
-                return False, error_msg
+            if expected_revision is not None and expected_revision != self._snapshot.version:
+                raise RevisionConflict(expected_revision, self._snapshot.version)
+            return self._commit(MergePatch.apply(self._snapshot.as_dict(), patch), source)
+
+    def _commit(self, new_config: dict, source: str) -> tuple[bool, str]:
+        """Validate, record and publish a full config. Caller holds self._lock."""
+        # Validate (schema: every error at once) and normalize (defaults, coercion)
+        new_config, errors = self.validate(new_config)
+        if errors:
+            AppLogger.log(f"Validation failed: {len(errors)} error(s), first: {errors[0]['path']}", category="CONFIG")
+            return False, ConfigSchema.format_errors(errors)
 
-            try:
-                # 1. Create Backup
-                self._create_backup()
+        try:
+            # 1. Compile + diff (identical pushes stop here: no disk I/O, no reload)
+            snapshot = ConfigSnapshot(new_config, version=self.history.head + 1)
+            change = ConfigChange(self._snapshot, snapshot)
+            if not change:
+                return True, "Configuration unchanged"
 
-                # 2. Save to Disk (Encrypted)
-                self._save_to_disk(new_config)
+            # 2. Record the revision (journal delta), then save to disk (encrypted, atomic)
+            self.history.record(snapshot.as_dict(), source=source)
+            self._save_to_disk(new_config)
 
-                # 3. Update Memory
-                self.config = new_config
+            # 3. Update Memory (swap the reference)
+            self.config = snapshot.as_dict()
+            self._snapshot = snapshot
 
-                # 4. Set Dirty Flag (for cross-thread polling)
-                self._config_dirty = True
+            # 4. Queue the change and wake the worker thread
+            self._pending_change = change if self._pending_change is None else self._pending_change.merge(change)
+            self._change_event.set()
 
-                # 5. Emit Signal (for same-thread listeners like future GUI)
-                self.sig_config_changed.emit(self.config)
+            # 5. Emit Signal (for same-thread listeners like the tray controller)
+            self.sig_config_changed.emit(change)
 
-                AppLogger.log("Updated successfully.", category="CONFIG")
-                return True, "Configuration updated successfully"
+            AppLogger.log(f"Updated successfully ({', '.join(sorted(change.sections))}).", category="CONFIG")
+            return True, "Configuration updated successfully"
 
-            except Exception as e:
-                AppLogger.log(f"Update Failed! {e}", category="CONFIG")
-                return False, str(e)
+        except Exception as e:
+            AppLogger.log(f"Update Failed! {e}", category="CONFIG")
+            return False, str(e)
 
-    def check_and_clear_dirty(self) -> bool:
+    def take_pending_change(self):
         """
-        Check if config was updated, and clear the flag.
-        Returns True if config needs to be reloaded.
-        Thread-safe.
+        Returns the ConfigChange accumulated since the last call (None if nothing changed)
+        and clears it. Thread-safe; the common no-change case takes no lock.
         """
+        if not self._change_event.is_set():
+            return None
         with self._lock:
-            if self._config_dirty:
-                self._config_dirty = False
-                return True
-            return False
+            change, self._pending_change = self._pending_change, None
+            self._change_event.clear()
+            return change
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to 'timeout' seconds, returning early (True) as soon as a change is pending."""
+        return self._change_event.wait(timeout)
 
     def _save_to_disk(self, data: dict):
-        """Encrypts and writes the config to cscf.dll."""
+        """
+        Encrypts and writes the config to cscf.dll atomically:
+        temp file + fsync + rename, so a crash leaves either the old or the new file.
+        """
         json_str = json.dumps(data, indent=4)
         encrypted_data = self.cipher.encrypt(json_str.encode())
 
-        with open(self.abs_config_path, 'wb') as f:
+        tmp_path = self.abs_config_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
             f.write(encrypted_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.abs_config_path)
 
-    def _create_backup(self):
-        """Creates an ENCRYPTED backup file."""
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"backup_{timestamp}.{self.CONFIG_FILENAME}"
-            backup_path = os.path.join(self.abs_backup_dir, backup_name)
-
-            if os.path.exists(self.abs_config_path):
-                shutil.copy(self.abs_config_path, backup_path)
-                self._cleanup_old_backups()
-        except Exception as e:
-            AppLogger.log("Backup operation failed.", category="CONFIG")
+    def _reencrypt_config(self):
+        """Key rotation: rewrite cscf.dll if it still uses an old key. True once current."""
+        with self._lock:
+            try:
+                with open(self.abs_config_path, 'rb') as f:
+                    encrypted_data = f.read()
+            except FileNotFoundError:
+                return True
+            if not KeyService.instance().is_current("config", encrypted_data):
+                self._save_to_disk(self.config)
+                AppLogger.log("Configuration re-encrypted.", category="CONFIG")
+        return True
 
     def _cleanup_old_backups(self):
-        """Keeps only the last 10 backups."""
+        """Compacts the revision history and prunes full-file backups left by older versions."""
         try:
-            files = sorted(
+            dropped = self.history.compact()
+            if dropped:
+                AppLogger.log(f"Pruned {dropped} old config revisions.", category="CONFIG")
+
+            legacy = sorted(
                 [os.path.join(self.abs_backup_dir, f) for f in os.listdir(self.abs_backup_dir)
                  if f.startswith("backup_")],
                 key=os.path.getmtime
             )
-            while len(files) > 10:
-                os.remove(files.pop(0))
-        except Exception:
-            pass
+            while len(legacy) > 10:
+                os.remove(legacy.pop(0))
+        except Exception as e:
+            AppLogger.log(f"Config History Compaction Failed: {e}", category="ERROR")
+
+    @property
+    def revision(self) -> int:
+        """Revision id of the live config (ETag for the API)."""
+        return self._snapshot.version
+
+    def get_revision(self, revision: int):
+        """Config dict of a revision, or None if unknown/pruned."""
+        return self.history.get(revision)
+
+    def diff_revisions(self, old_revision: int, new_revision: int = None):
+        """
+        Changes between two revisions (new_revision None = live config).
+        Returns [{"path", "old", "new"}] or None if a revision is unknown.
+        """
+        old = self.history.get(old_revision)
+        new = self.get_config() if new_revision is None else self.history.get(new_revision)
+        if old is None or new is None:
+            return None
+        return ConfigChange.describe(old, new)
+
+    def rollback(self, revision: int, expected_revision: int = None) -> tuple[bool, str]:
+        """Re-apply the config of an earlier revision (recorded as a new revision)."""
+        config = self.history.get(revision)
+        if config is None:
+            return False, f"Unknown revision {revision}"
+        AppLogger.log(f"Rolling back to revision {revision}.", category="CONFIG")
+        return self.update_config(config, source=f"rollback:{revision}", expected_revision=expected_revision)
 
     def get_backup_list(self):
-        """Returns list of backup filenames."""
-        try:
-            return sorted(
-                [f for f in os.listdir(self.abs_backup_dir) if f.startswith("backup_")],
-                reverse=True
-            )
-        except:
-            return []
-
-    def _validate_config(self, config):
-        """Validate config has required structure and logic."""
-        required_keys = [
-            'targets',
-            'monitor_settings',
-            'screenshot_settings',
-            'discord_settings',
-            'verification_settings',
-            'occupancy_settings'
-        ]
-
-        for key in required_keys:
-            if key not in config:
-                AppLogger.log(f"Validation failed: Missing key '{key}'", category="CONFIG")
-                return False, f"Missing key '{key}'"
-
-        # Validate screenshot_settings
-        screenshot = config.get('screenshot_settings', {})
-        if 'interval_minutes' in screenshot:
-            if not (1 <= screenshot['interval_minutes'] <= 1440):
-                AppLogger.log("Validation failed: Invalid screenshot interval", category="CONFIG")
-                return False, "Invalid screenshot interval (1-1440)"
-        if 'quality' in screenshot:
-            if not (1 <= screenshot['quality'] <= 100):
-                AppLogger.log("Validation failed: Invalid screenshot quality", category="CONFIG")
-                return False, "Invalid screenshot quality (1-100)"
-
-        # Validate monitor_settings
-        monitor = config.get('monitor_settings', {})
-        if 'interval_seconds' in monitor:
-            if not (1 <= monitor['interval_seconds'] <= 60):
-                AppLogger.log("Validation failed: Invalid monitor interval", category="CONFIG")
-                return False, "Invalid monitor interval (1-60)"
-
-        # ---Validate Tray Visibility (Prevents "Hide All" via API) ---
-        sys_settings = config.get('system_settings', {})
-        visibility = sys_settings.get('tray_visibility', {})
-
-        # If visibility dict exists, ensure at least one is True
-        if visibility:
-            any_visible = (
-                    visibility.get('router', False) or
-                    visibility.get('server', False) or
-                    visibility.get('internet', False) or
-                    visibility.get('clients', False)
-            )
-            # Only enforce if Stealth Mode is OFF.
-            # If Stealth is ON, it's okay for these to be False (since everything is hidden anyway).
-            # But to be safe and avoid confusion when Stealth is toggled OFF later, we enforce it globally.
-            if not any_visible:
-                AppLogger.log("Validation failed: All tray icons disabled", category="CONFIG")
-                return False, "At least one tray icon must be enabled!"
-
-        return True, "Valid"
\ No newline at end of file
+        """Returns the revision history, newest first ({"revision", "timestamp", "source", "sections"})."""
+        return self.history.revisions()
+
+    @staticmethod
+    def validate(config, partial: bool = False):
+        """Schema check shared by the API, settings pages and startup. Returns (normalized, errors)."""
+        return ConfigSchema.validate(config, partial=partial)
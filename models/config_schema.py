@@ -0,0 +1,294 @@
+import re
+import copy
+
+
+class Field:
+    """
+    Declarative rule for one config key.
+    kind: "int", "float", "bool", "str", "host", "subnet", "webhook", "list", "dict"
+    Values are coerced where unambiguous ("5" -> 5, 3.0 -> 3 for ints, "true" -> True).
+    """
+    __slots__ = ("kind", "default", "min", "max", "choices", "required", "check")
+
+    def __init__(self, kind, default=None, min=None, max=None, choices=None, required=False):
+        self.kind = kind
+        self.default = default
+        self.min = min
+        self.max = max
+        self.choices = choices
+        self.required = required
+        self.check = None  # Compiled by ConfigSchema
+
+
+class ConfigSchema:
+    """
+    Config schema, defined once and compiled into per-field checkers at import.
+    Shared by ConfigManager (API saves, startup loading) and the settings pages.
+
+    validate(config) -> (normalized, errors)
+        normalized: copy with defaults filled and values coerced (unknown keys kept)
+        errors: [{"path": "monitor_settings.pc_count", "message": "..."}] - every problem at once
+    """
+    _HOST_RE = re.compile(
+        r"^(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:\.(?:25[0-5]|2[0-4]\d|1?\d?\d)){3}"
+        r"|(?=.{1,253}$)(?=.*[A-Za-z])[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*)$"
+    )
+    _SUBNET_RE = re.compile(r"^(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:\.(?:25[0-5]|2[0-4]\d|1?\d?\d)){2}$")
+    _WEBHOOK_RE = re.compile(r"^https://[^\s/]+/\S+$")
+
+    SCHEMA = {
+        "targets": {
+            "router": Field("host", "192.168.1.1", required=True),
+            "server": Field("host", "192.168.1.200", required=True),
+            "internet": Field("host", "8.8.8.8", required=True),
+        },
+        "monitor_settings": {
+            "interval_seconds": Field("float", 2, min=1, max=60),
+            "pc_subnet": Field("subnet", "192.168.1", required=True),
+            "pc_start_range": Field("int", 110, min=1, max=254),
+            "pc_count": Field("int", 20, min=1, max=254),
+        },
+        "verification_settings": {
+            "retry_delay_seconds": Field("float", 1.0, min=0, max=30),
+            "secondary_target": Field("host", "1.1.1.1"),
+            "min_incident_duration_seconds": Field("float", 10, min=0, max=3600),
+        },
+        "screenshot_settings": {
+            "enabled": Field("bool", True),
+            "interval_minutes": Field("int", 60, min=1, max=1440),
+            "resize_ratio": Field("float", 1.0, min=0.1, max=1.0),
+            "quality": Field("int", 80, min=1, max=100),
+            "max_upload_kb": Field("int", 8000, min=100, max=25000),
+            "incident_preview": Field("bool", True),
+            "monitors": Field("list", [1]),
+            "regions": Field("list", []),
+            "min_change_percent": Field("float", 2.0, min=0, max=100),
+            "archive_enabled": Field("bool", True),
+            "archive_retention_days": Field("int", 30, min=1, max=3650),
+            "archive_max_mb": Field("int", 500, min=10, max=100000),
+        },
+        "occupancy_settings": {
+            "enabled": Field("bool", True),
+            "mode": Field("str", "session", choices=("session", "timer")),
+            "min_session_minutes": Field("int", 3, min=0, max=1440),
+            "batch_delay_seconds": Field("int", 30, min=0, max=3600),
+            "hourly_snapshot_enabled": Field("bool", True),
+        },
+        "discord_settings": {
+            "enabled": Field("bool", False),
+            "shop_name": Field("str", "My Internet Cafe"),
+            "webhook_alerts": Field("webhook", ""),
+            "webhook_occupancy": Field("webhook", ""),
+            "webhook_screenshots": Field("webhook", ""),
+        },
+        "system_settings": {
+            "env_state": Field("bool", False),
+            "log_retention_days": Field("int", 30, min=1, max=365),
+            "log_retention_mb": Field("int", 500, min=50, max=10000),
+            "log_buffer_size": Field("int", 500, min=100, max=100000),
+            "log_rate_limits": Field("dict", {"default": {"burst": 5, "window_seconds": 120, "summary_minutes": 15}}),
+            "tray_visibility": Field("dict", {"router": True, "server": True, "internet": True, "clients": True}),
+        },
+    }
+
+    # Sections a saved config must contain (system_settings may be absent in old configs)
+    REQUIRED_SECTIONS = ("targets", "monitor_settings", "screenshot_settings", "discord_settings",
+                         "verification_settings", "occupancy_settings")
+
+    # ============= COMPILE =============
+
+    @staticmethod
+    def _compile(field):
+        kind, low, high, choices = field.kind, field.min, field.max, field.choices
+
+        def number(value, cast):
+            if isinstance(value, bool):
+                raise ValueError("must be a number")
+            if isinstance(value, str):
+                value = value.strip()
+            try:
+                # Numbers already of a numeric type are kept as-is (2 stays 2 in a float field)
+                result = value if cast is float and isinstance(value, (int, float)) else cast(value)
+            except (TypeError, ValueError):
+                raise ValueError("must be a number")
+            if cast is int and isinstance(value, float) and value != result:
+                raise ValueError("must be a whole number")
+            if low is not None and result < low or high is not None and result > high:
+                raise ValueError(f"must be between {low} and {high}")
+            return result
+
+        def text(value):
+            if not isinstance(value, str):
+                raise ValueError("must be text")
+            value = value.strip()
+            if choices and value not in choices:
+                raise ValueError(f"must be one of: {', '.join(choices)}")
+            return value
+
+        def pattern(regex, message, allow_empty):
+            def check(value):
+                value = text(value)
+                if value == "" and allow_empty:
+                    return value
+                if not regex.match(value):
+                    raise ValueError(message)
+                return value
+            return check
+
+        def boolean(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+                return value.strip().lower() == "true"
+            if value in (0, 1):
+                return bool(value)
+            raise ValueError("must be true or false")
+
+        def typed(expected, name):
+            def check(value):
+                if not isinstance(value, expected):
+                    raise ValueError(f"must be {name}")
+                return copy.deepcopy(value)
+            return check
+
+        return {
+            "int": lambda value: number(value, int),
+            "float": lambda value: number(value, float),
+            "bool": boolean,
+            "str": text,
+            "host": pattern(ConfigSchema._HOST_RE, "must be an IPv4 address or host name", False),
+            "subnet": pattern(ConfigSchema._SUBNET_RE, "must be the first three octets, e.g. 192.168.1", False),
+            "webhook": pattern(ConfigSchema._WEBHOOK_RE, "must be an https:// webhook URL or empty", True),
+            "list": typed(list, "a list"),
+            "dict": typed(dict, "an object"),
+        }[kind]
+
+    # ============= CROSS-FIELD RULES =============
+    # (section, rule(values) -> [(key, message)], fields the rule reads) - run on normalized
+    # sections; on repair the rule's fields are reset to their defaults
+
+    @staticmethod
+    def _seat_range(values):
+        if values["pc_start_range"] + values["pc_count"] - 1 > 254:
+            return [("pc_count", "start + count exceeds the subnet (last address must be <= 254)")]
+        return []
+
+    @staticmethod
+    def _discord_shop(values):
+        if values["enabled"] and not values["shop_name"]:
+            return [("shop_name", "Shop Name is required when Discord is enabled")]
+        return []
+
+    @staticmethod
+    def _tray_visible(values):
+        visibility = values["tray_visibility"]
+        if visibility and not any(visibility.get(key, False) for key in ("router", "server", "internet", "clients")):
+            return [("tray_visibility", "At least one tray icon must be enabled!")]
+        return []
+
+    @staticmethod
+    def _rate_limits(values):
+        errors = []
+        for category, policy in values["log_rate_limits"].items():
+            if not isinstance(policy, dict):
+                errors.append((f"log_rate_limits.{category}", "must be an object"))
+                continue
+            for key in ("burst", "window_seconds", "summary_minutes"):
+                value = policy.get(key, 0)
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                    errors.append((f"log_rate_limits.{category}.{key}", "must be a number >= 0"))
+        return errors
+
+    RULES = (
+        ("monitor_settings", _seat_range, ("pc_start_range", "pc_count")),
+        ("discord_settings", _discord_shop, ("shop_name",)),
+        ("system_settings", _tray_visible, ("tray_visibility",)),
+        ("system_settings", _rate_limits, ("log_rate_limits",)),
+    )
+
+    # ============= VALIDATE =============
+
+    @staticmethod
+    def validate(config, partial=False, repair=False):
+        """
+        Validate a config dict (see class docstring).
+        partial: only the sections present are checked (settings pages, PATCH bodies)
+        repair: invalid values are replaced by their defaults in 'normalized' (startup loading);
+                errors are still reported
+        """
+        errors = []
+        if not isinstance(config, dict):
+            return None, [{"path": "", "message": "config must be an object"}]
+        normalized = copy.deepcopy(config)
+
+        for section, fields in ConfigSchema.SCHEMA.items():
+            if section not in config:
+                if partial:
+                    continue
+                if section in ConfigSchema.REQUIRED_SECTIONS and not repair:
+                    errors.append({"path": section, "message": "missing section"})
+                    continue
+            data = config.get(section, {})
+            if not isinstance(data, dict):
+                errors.append({"path": section, "message": "must be an object"})
+                if not repair:
+                    continue
+                data = {}
+
+            values = dict(data)
+            for key, field in fields.items():
+                if key not in data:
+                    if field.required and not partial:
+                        errors.append({"path": f"{section}.{key}", "message": "required"})
+                    values[key] = copy.deepcopy(field.default)
+                    continue
+                try:
+                    values[key] = field.check(data[key])
+                except ValueError as e:
+                    errors.append({"path": f"{section}.{key}", "message": str(e)})
+                    values[key] = copy.deepcopy(field.default) if repair else data[key]
+            normalized[section] = values
+
+        # Cross-field rules only see sections whose own fields are valid (or were repaired)
+        failed = {error["path"].split(".")[0] for error in errors}
+        for section, rule, rule_fields in ConfigSchema.RULES:
+            if section not in normalized or (section in failed and not repair):
+                continue
+            if partial and section not in config:
+                continue
+            problems = rule.__func__(normalized[section])
+            for key, message in problems:
+                errors.append({"path": f"{section}.{key}", "message": message})
+            if problems and repair:
+                normalized[section] = ConfigSchema._repair_rule(section, rule, rule_fields, normalized[section])
+
+        return normalized, errors
+
+    @staticmethod
+    def _repair_rule(section, rule, rule_fields, values):
+        """Reset the fields a failed cross-field rule reads; the whole section if that's not enough."""
+        fields = ConfigSchema.SCHEMA[section]
+        values = dict(values)
+        for name in rule_fields:
+            values[name] = copy.deepcopy(fields[name].default)
+        if rule.__func__(values):
+            values.update({name: copy.deepcopy(field.default) for name, field in fields.items()})
+        return values
+
+    @staticmethod
+    def defaults():
+        """Full default config (fresh installs, ConfigManager.DEFAULT_CONFIG)."""
+        return {section: {key: copy.deepcopy(field.default) for key, field in fields.items()}
+                for section, fields in ConfigSchema.SCHEMA.items()}
+
+    @staticmethod
+    def format_errors(errors):
+        """One line per error, for dialogs and log lines."""
+        return "\n".join(f"{error['path']}: {error['message']}" if error["path"] else error["message"]
+                         for error in errors)
+
+
+for _fields in ConfigSchema.SCHEMA.values():
+    for _field in _fields.values():
+        _field.check = ConfigSchema._compile(_field)
+del _fields, _field
@@ -0,0 +1,130 @@
+import copy
+from types import MappingProxyType
+
+from models.config_schema import ConfigSchema
+
+
+def _freeze(value):
+    """Read-only view of nested config values (dict -> mappingproxy, list -> tuple)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Schema kind -> attribute type (None = kept as-is, frozen)
+_CASTS = {"int": int, "float": float, "bool": bool, "str": str, "host": str, "subnet": str, "webhook": str}
+
+
+def _schema_fields(section):
+    """FIELDS for a section, taken from ConfigSchema so defaults can't drift from validation."""
+    return tuple((key, field.default, _CASTS.get(field.kind))
+                 for key, field in ConfigSchema.SCHEMA[section].items())
+
+
+class _Section:
+    """
+    One config section compiled into typed attributes.
+    FIELDS = ((key, default, cast), ...) from _schema_fields(); a missing or uncastable value
+    falls back to the schema default. Instances are read-only.
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, data):
+        data = data if isinstance(data, dict) else {}
+        for key, default, cast in self.FIELDS:
+            value = data.get(key, default)
+            if cast is not None and value is not None:
+                try:
+                    value = cast(value)
+                except (TypeError, ValueError):
+                    value = default
+            object.__setattr__(self, key, _freeze(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self):
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key, _, _ in self.FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+class TargetsConfig(_Section):
+    __slots__ = ("router", "server", "internet")
+    FIELDS = _schema_fields("targets")
+
+
+class MonitorConfig(_Section):
+    __slots__ = ("interval_seconds", "pc_subnet", "pc_start_range", "pc_count", "pc_list")
+    FIELDS = _schema_fields("monitor_settings")
+
+    def __init__(self, data):
+        super().__init__(data)
+        # Seat table precompiled once per update (scan loop iterates it every cycle)
+        object.__setattr__(self, "pc_list", tuple(
+            f"{self.pc_subnet}.{self.pc_start_range + i}" for i in range(max(0, self.pc_count))
+        ))
+
+
+class VerificationConfig(_Section):
+    __slots__ = ("retry_delay_seconds", "secondary_target", "min_incident_duration_seconds")
+    FIELDS = _schema_fields("verification_settings")
+
+
+class ScreenshotConfig(_Section):
+    __slots__ = ("enabled", "interval_minutes", "resize_ratio", "quality", "max_upload_kb",
+                 "incident_preview", "monitors", "regions", "min_change_percent",
+                 "archive_enabled", "archive_retention_days", "archive_max_mb")
+    FIELDS = _schema_fields("screenshot_settings")
+
+
+class OccupancyConfig(_Section):
+    __slots__ = ("enabled", "mode", "min_session_minutes", "batch_delay_seconds", "hourly_snapshot_enabled")
+    FIELDS = _schema_fields("occupancy_settings")
+
+
+class DiscordConfig(_Section):
+    __slots__ = ("enabled", "shop_name", "webhook_alerts", "webhook_occupancy", "webhook_screenshots")
+    FIELDS = _schema_fields("discord_settings")
+
+
+class SystemConfig(_Section):
+    __slots__ = ("env_state", "log_retention_days", "log_retention_mb", "log_buffer_size",
+                 "log_rate_limits", "tray_visibility")
+    FIELDS = _schema_fields("system_settings")
+
+
+class ConfigSnapshot:
+    """
+    Immutable, versioned view of one configuration revision.
+    Compiled once per update by ConfigManager; readers grab the current reference
+    (ConfigManager.snapshot()) without a lock or a copy and use attribute access:
+        snap.targets.router, snap.monitor.interval_seconds, snap.monitor.pc_list
+    as_dict() returns a private deep copy of the raw config for code that edits or serializes it.
+    """
+    __slots__ = ("version", "targets", "monitor", "verification", "screenshot",
+                 "occupancy", "discord", "system", "_raw")
+
+    def __init__(self, config, version=0):
+        raw = copy.deepcopy(config)
+        values = {
+            "version": version,
+            "targets": TargetsConfig(raw.get('targets')),
+            "monitor": MonitorConfig(raw.get('monitor_settings')),
+            "verification": VerificationConfig(raw.get('verification_settings')),
+            "screenshot": ScreenshotConfig(raw.get('screenshot_settings')),
+            "occupancy": OccupancyConfig(raw.get('occupancy_settings')),
+            "discord": DiscordConfig(raw.get('discord_settings')),
+            "system": SystemConfig(raw.get('system_settings')),
+            "_raw": raw,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is read-only")
+
+    def as_dict(self) -> dict:
+        return copy.deepcopy(self._raw)
@@ -16,8 +16,9 @@ class DiscordNotifier:
         self.shop_name = self.config.get('shop_name', "Internet Cafe")
 
     def send_payload(self, url, payload, file_buffer=None, filename="image.webp"):
+        """Returns True if Discord accepted it, False on failure, None if not configured."""
         if not self.enabled or not url or "YOUR_" in url:
-            return
+            return None
 
         try:
             data = {"payload_json": json.dumps(payload)}
@@ -34,13 +35,16 @@ class DiscordNotifier:
             if response.status_code not in [200, 204]:
                 from models.app_logger import AppLogger
                 AppLogger.log(f"Discord Upload Failed: {response.status_code} - {response.text}", category="ERROR")
+                return False
             # ---------------------
+            return True
 
         except Exception as e:
             # --- ADDED LOGGING ---
             from models.app_logger import AppLogger
             AppLogger.log(f"Discord Connection Error: {str(e)}", category="ERROR")
             # ---------------------
+            return False
 
     def send_outage_report(self, duration, cause, client_count, start_time, end_time, screenshot_data=None):
         if not self.alerts_url:
@@ -134,8 +138,9 @@ class DiscordNotifier:
         self.send_payload(self.occupancy_url, {"username": self.shop_name, "embeds": [embed]})
 
     def send_routine_screenshot(self, screenshot_data):
+        """Returns True if uploaded, False on failure, None if not configured."""
         if not self.screenshots_url or not screenshot_data:
-            return
+            return None
 
         embed = {
             "title": "Routine Screenshot",
@@ -149,4 +154,4 @@ class DiscordNotifier:
             "embeds": [embed]
         }
 
-        self.send_payload(self.screenshots_url, payload, screenshot_data, "routine.webp")
\ No newline at end of file
+        return self.send_payload(self.screenshots_url, payload, screenshot_data, "routine.webp")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import os
+import time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Cross-process exclusive lock on a small side file (e.g. 'info.log.lock').
+    Used by the LogWriter and the watchdog process so their appends to info.log
+    never interleave, and rotation never renames the file under the other process.
+    The lock file handle stays open; acquire/release are one syscall each.
+    No third-party dependency (msvcrt on Windows, fcntl elsewhere).
+    """
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def _ensure_open(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def acquire(self, timeout=5.0):
+        """Block until the lock is held. Returns False on timeout (caller may write anyway)."""
+        fd = self._ensure_open()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if os.name == 'nt':
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(self.POLL_INTERVAL)
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._fd is not None:
+            self.release()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
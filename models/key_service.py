@@ -0,0 +1,134 @@
+import os
+import base64
+import hashlib
+import threading
+
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from models.app_logger import AppLogger
+from models.task_scheduler import TaskScheduler
+
+
+class KeyService:
+    """
+    Singleton Class.
+    Machine-bound encryption keys for the files we encrypt, derived once per process.
+    - Master secret: Windows MachineGuid + COMPUTERNAME (/etc/machine-id off Windows)
+    - One HKDF-SHA256 subkey per purpose and key version, so files never share a key
+    - cipher(purpose) is a cached MultiFernet: encrypts with the current key, decrypts with
+      the current key, older versions, and the pre-HKDF key (COMPUTERNAME only)
+    - Rotation: owners register a rewriter; the "key_rotation" job re-encrypts files that
+      still use an old key in the background, then cancels itself
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    PURPOSES = ("config", "vault", "backups")
+    KEY_VERSION = 1  # Bump to rotate: every purpose gets a new key, old ones stay readable
+    _SALT = b"CafeSentinel/KeyService"
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._master = None
+        self._ciphers = {}     # { purpose: MultiFernet }
+        self._current = {}     # { purpose: Fernet } (current version only)
+        self._rewriters = {}   # { name: callable() -> bool (True = file is now current) }
+
+    # ============= DERIVATION =============
+
+    @staticmethod
+    def _machine_identifiers():
+        """Stable per-installation identifiers (empty parts are allowed)."""
+        parts = []
+        try:
+            import winreg
+            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Cryptography", 0,
+                                 winreg.KEY_READ | winreg.KEY_WOW64_64KEY)
+            parts.append(winreg.QueryValueEx(key, "MachineGuid")[0])
+            winreg.CloseKey(key)
+        except (ImportError, OSError):
+            try:
+                with open("/etc/machine-id", "r") as f:
+                    parts.append(f.read().strip())
+            except OSError:
+                parts.append("")
+        parts.append(os.environ.get('COMPUTERNAME', 'DEFAULT_MACHINE'))
+        return "|".join(parts)
+
+    @staticmethod
+    def legacy_key():
+        """Key used before KeyService (SHA-256 of COMPUTERNAME); decrypt-only."""
+        machine_id = os.environ.get('COMPUTERNAME', 'DEFAULT_MACHINE')
+        seed = f"SENTINEL_{machine_id}_VAULT"
+        return base64.urlsafe_b64encode(hashlib.sha256(seed.encode()).digest())
+
+    def _derive(self, purpose, version):
+        if self._master is None:
+            self._master = self._machine_identifiers().encode()
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=self._SALT,
+                    info=f"{purpose}/v{version}".encode())
+        return base64.urlsafe_b64encode(hkdf.derive(self._master))
+
+    def _build(self, purpose):
+        keys = [Fernet(self._derive(purpose, version)) for version in range(self.KEY_VERSION, 0, -1)]
+        keys.append(Fernet(self.legacy_key()))
+        self._current[purpose] = keys[0]
+        self._ciphers[purpose] = MultiFernet(keys)
+
+    # ============= PUBLIC =============
+
+    def cipher(self, purpose):
+        """Ready-to-use cipher for a purpose (encrypt/decrypt like Fernet, plus rotate())."""
+        cipher = self._ciphers.get(purpose)
+        if cipher is None:
+            if purpose not in self.PURPOSES:
+                raise ValueError(f"Unknown key purpose: {purpose}")
+            with self._lock:
+                if purpose not in self._ciphers:
+                    self._build(purpose)
+                cipher = self._ciphers[purpose]
+        return cipher
+
+    def is_current(self, purpose, token):
+        """True if 'token' is encrypted with the current key of 'purpose'."""
+        self.cipher(purpose)
+        try:
+            self._current[purpose].decrypt(token)
+            return True
+        except InvalidToken:
+            return False
+
+    def register_rewriter(self, name, func):
+        """
+        func() re-encrypts one file with cipher(...).rotate() if needed and returns True once
+        the file is current (or absent). Starts the background rotation job.
+        """
+        with self._lock:
+            self._rewriters[name] = func
+        TaskScheduler.instance().schedule("key_rotation", self._rotate, 3600, first_delay=30)
+
+    def _rotate(self):
+        with self._lock:
+            rewriters = list(self._rewriters.items())
+
+        for name, func in rewriters:
+            try:
+                if func():
+                    with self._lock:
+                        if self._rewriters.get(name) is func:
+                            del self._rewriters[name]
+            except Exception as e:
+                AppLogger.log(f"Key Rotation Failed ({name}): {e}", category="ERROR")
+
+        with self._lock:
+            if not self._rewriters:
+                TaskScheduler.instance().cancel("key_rotation")
@@ -0,0 +1,261 @@
+import os
+import io
+import json
+import zlib
+
+from models.log_index import LogIndex
+
+
+class LogCompressor:
+    """
+    Compresses rotated log segments into block-seekable gzip files.
+    - 'info-X.log' -> 'info-X.log.gz': a series of independent gzip members of BLOCK_SIZE
+      uncompressed bytes each (standard tools still read it as one gzip stream)
+    - The block table is appended to the segment index ('info-X.log.gz.idx') as lines of
+      {"z": [uncompressed_offset, compressed_offset, compressed_length]}
+    - Record offsets in the index stay in uncompressed coordinates, so index queries work unchanged
+    """
+    SUFFIX = ".gz"
+    BLOCK_SIZE = 256 * 1024
+    LEVEL = 6
+
+    @staticmethod
+    def compressed_path(path):
+        return path + LogCompressor.SUFFIX
+
+    @staticmethod
+    def _gzip_member(data):
+        compressor = zlib.compressobj(LogCompressor.LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+        return compressor.compress(data) + compressor.flush()
+
+    @staticmethod
+    def compress(path):
+        """
+        Compress one segment (and carry over its index). The original is removed afterwards.
+        Returns (original_bytes, compressed_bytes).
+        """
+        gz_path = LogCompressor.compressed_path(path)
+        tmp_path = gz_path + ".tmp"
+        blocks = []
+        stat = os.stat(path)
+
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            u_offset = 0
+            c_offset = 0
+            while True:
+                data = src.read(LogCompressor.BLOCK_SIZE)
+                if not data:
+                    break
+                member = LogCompressor._gzip_member(data)
+                dst.write(member)
+                blocks.append([u_offset, c_offset, len(member)])
+                u_offset += len(data)
+                c_offset += len(member)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        # Index first, then the data file: once the .gz exists it is complete and indexed
+        idx_tmp = LogIndex.path_for(gz_path) + ".tmp"
+        with open(idx_tmp, 'w', encoding='utf-8') as f:
+            try:
+                with open(LogIndex.path_for(path), 'r', encoding='utf-8') as old_index:
+                    for line in old_index:
+                        if line.endswith("\n"):
+                            f.write(line)
+            except OSError:
+                pass  # Segment had no index (scanned on query)
+            for block in blocks:
+                f.write(json.dumps({"z": block}, separators=(",", ":")) + "\n")
+        os.replace(idx_tmp, LogIndex.path_for(gz_path))
+        # Keep the segment's mtime: retention age and segment ordering are based on it
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, gz_path)
+
+        LogCompressor.remove_plain(path)
+        return u_offset, c_offset
+
+    @staticmethod
+    def merge(sources, target):
+        """
+        Concatenate compressed segments (oldest first) into 'target' without recompressing:
+        gzip members are copied as-is, index and block offsets are shifted.
+        Writes the index first, then the data file. Sources are left for the caller to remove.
+        Returns the compressed size of the result.
+        """
+        tmp_path = target + ".tmp"
+        idx_lines = []
+        u_base = 0
+        c_base = 0
+        newest_mtime = None
+
+        with open(tmp_path, 'wb') as dst:
+            for source in sources:
+                with GzipBlockFile(source) as src:
+                    u_size = src.seek(0, io.SEEK_END)
+                    blocks = src._blocks
+
+                for entry in LogIndex.load(source):
+                    entry["o"] += u_base
+                    entry["e"] += u_base
+                    idx_lines.append(entry)
+                for u_offset, c_offset, c_length in blocks:
+                    idx_lines.append({"z": [u_offset + u_base, c_offset + c_base, c_length]})
+
+                with open(source, 'rb') as src:
+                    while True:
+                        chunk = src.read(LogCompressor.BLOCK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        c_base += len(chunk)
+                u_base += u_size
+
+                mtime = os.stat(source).st_mtime_ns
+                newest_mtime = mtime if newest_mtime is None else max(newest_mtime, mtime)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        idx_tmp = LogIndex.path_for(target) + ".tmp"
+        with open(idx_tmp, 'w', encoding='utf-8') as f:
+            for entry in idx_lines:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(idx_tmp, LogIndex.path_for(target))
+
+        os.utime(tmp_path, ns=(newest_mtime, newest_mtime))
+        os.replace(tmp_path, target)
+        return c_base
+
+    @staticmethod
+    def remove_plain(path):
+        """Drop the uncompressed segment and its index (may fail on Windows while a reader has it open)."""
+        for leftover in (path, LogIndex.path_for(path)):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+
+
+class GzipBlockFile:
+    """
+    Read-only, seekable binary view of a compressed segment in uncompressed coordinates.
+    Only the block under the cursor is decompressed (one block cached), so a tail read or a
+    page in the middle of a 50 MB archive inflates a few hundred KB.
+    Supports the subset of the file API used by LogReader / LogIndex: read, readline,
+    iteration, seek, tell.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._blocks = [entry["z"] for entry in LogIndex.load_blocks(path)]
+        if not self._blocks:
+            self._blocks = self._scan_members()
+        self._size = self._uncompressed_size()
+        self._pos = 0
+        self._cached_index = -1
+        self._cached_data = b""
+
+    # ============= BLOCK TABLE =============
+
+    def _scan_members(self):
+        """Rebuild the block table by walking the gzip members (archive without an index)."""
+        blocks = []
+        u_offset = 0
+        c_offset = 0
+        data = self._file.read()
+        while c_offset < len(data):
+            decompressor = zlib.decompressobj(31)
+            out = decompressor.decompress(data[c_offset:])
+            consumed = len(data) - c_offset - len(decompressor.unused_data)
+            blocks.append([u_offset, c_offset, consumed])
+            u_offset += len(out)
+            c_offset += consumed
+        self._file.seek(0)
+        return blocks
+
+    def _uncompressed_size(self):
+        if not self._blocks:
+            return 0
+        u_offset, c_offset, c_length = self._blocks[-1]
+        # gzip trailer: last 4 bytes = uncompressed length of the member (mod 2^32)
+        self._file.seek(c_offset + c_length - 4)
+        return u_offset + int.from_bytes(self._file.read(4), "little")
+
+    def _block_for(self, pos):
+        lo, hi = 0, len(self._blocks) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._blocks[mid][0] <= pos:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def _load(self, index):
+        if index != self._cached_index:
+            _, c_offset, c_length = self._blocks[index]
+            self._file.seek(c_offset)
+            self._cached_data = zlib.decompress(self._file.read(c_length), 31)
+            self._cached_index = index
+        return self._cached_data
+
+    # ============= FILE API =============
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._pos
+        parts = []
+        while size > 0 and self._pos < self._size:
+            index = self._block_for(self._pos)
+            data = self._load(index)
+            start = self._pos - self._blocks[index][0]
+            chunk = data[start:start + size]
+            if not chunk:
+                break
+            parts.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+    def readline(self):
+        parts = []
+        while self._pos < self._size:
+            index = self._block_for(self._pos)
+            data = self._load(index)
+            start = self._pos - self._blocks[index][0]
+            end = data.find(b"\n", start)
+            if end != -1:
+                parts.append(data[start:end + 1])
+                self._pos += end + 1 - start
+                break
+            if start >= len(data):
+                break
+            parts.append(data[start:])
+            self._pos += len(data) - start
+        return b"".join(parts)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
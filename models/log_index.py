@@ -0,0 +1,198 @@
+import os
+import json
+import bisect
+
+from models.log_record import LogRecord
+
+
+class LogIndex:
+    """
+    Sparse side index for one log segment ('info.log' -> 'info.log.idx').
+    One JSON line per block of BLOCK_RECORDS records:
+        {"t": first_ts, "u": last_ts, "o": start_offset, "e": end_offset, "n": count, "c": [categories]}
+    Readers binary-search the blocks by time (bisect on first/last timestamps) and skip blocks
+    that don't contain the requested categories. Byte ranges not covered by any block (crash
+    tails, other writers) are always scanned; if block times are out of order (clock change)
+    every block is checked instead.
+    """
+    SUFFIX = ".idx"
+    BLOCK_RECORDS = 64
+
+    def __init__(self, segment_path):
+        self.path = segment_path + self.SUFFIX
+        self._file = None
+        self._block = None
+
+    @staticmethod
+    def path_for(segment_path):
+        return segment_path + LogIndex.SUFFIX
+
+    # ============= WRITER SIDE =============
+
+    def add(self, timestamp, category, offset, end_offset):
+        """Register one record occupying [offset, end_offset) in the segment."""
+        block = self._block
+        if block is None:
+            block = self._block = {"t": timestamp, "u": timestamp, "o": offset, "e": end_offset, "n": 0, "c": set()}
+        block["u"] = timestamp
+        block["e"] = end_offset
+        block["n"] += 1
+        block["c"].add(category)
+
+        if block["n"] >= self.BLOCK_RECORDS:
+            self.seal()
+
+    def seal(self):
+        """Write out the current (possibly partial) block."""
+        block, self._block = self._block, None
+        if block is None:
+            return
+        block["c"] = sorted(block["c"])
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(block, separators=(",", ":")) + "\n")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        try:
+            self.seal()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ============= READER SIDE =============
+
+    @staticmethod
+    def _load_lines(segment_path):
+        entries = []
+        try:
+            with open(LogIndex.path_for(segment_path), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn line after a crash
+        except OSError:
+            return []
+        return entries
+
+    @staticmethod
+    def load(segment_path):
+        """Record block entries sorted by offset (empty list if there is no index)."""
+        entries = [e for e in LogIndex._load_lines(segment_path) if "o" in e]
+        entries.sort(key=lambda e: e["o"])
+        return entries
+
+    @staticmethod
+    def load_blocks(segment_path):
+        """Compression block table of a '.gz' segment (see LogCompressor)."""
+        entries = [e for e in LogIndex._load_lines(segment_path) if "z" in e]
+        entries.sort(key=lambda e: e["z"][0])
+        return entries
+
+    @staticmethod
+    def _ranges(entries, file_size):
+        """
+        Split the segment into byte ranges: (start, end, first_ts, last_ts, categories).
+        Uncovered gaps get None for time and categories (unknown -> must be scanned).
+        """
+        ranges = []
+        cursor = 0
+        for entry in entries:
+            if entry["o"] > cursor:
+                ranges.append((cursor, entry["o"], None, None, None))
+            ranges.append((entry["o"], entry["e"], entry["t"], entry["u"], entry["c"]))
+            cursor = max(cursor, entry["e"])
+        if cursor < file_size:
+            ranges.append((cursor, file_size, None, None, None))
+        return ranges
+
+    @staticmethod
+    def _candidates(ranges, start, end):
+        """
+        Ranges that may hold records in [start, end]: the timed blocks found by bisect plus
+        every untimed gap. Falls back to all ranges if block times are not ordered.
+        """
+        timed = [i for i, r in enumerate(ranges) if r[2] is not None]
+        firsts = [ranges[i][2] for i in timed]
+        lasts = [ranges[i][3] for i in timed]
+        ordered = all(lasts[k] <= firsts[k + 1] for k in range(len(timed) - 1)) \
+            and all(f <= l for f, l in zip(firsts, lasts))
+        if not timed or not ordered:
+            return ranges
+
+        lo = bisect.bisect_left(lasts, start) if start is not None else 0            # First block ending >= start
+        hi = bisect.bisect_right(firsts, end) if end is not None else len(timed)     # Blocks starting <= end
+        window = set(timed[lo:hi])
+        return [r for i, r in enumerate(ranges) if r[2] is None or i in window]
+
+    @staticmethod
+    def query(segment_path, start=None, end=None, categories=None, limit=None):
+        """
+        Records from one segment with start <= timestamp <= end (epoch seconds)
+        and category in categories. Only index blocks that can match are read.
+        Works on plain and compressed ('.gz') segments.
+        """
+        from models.log_reader import LogReader  # log_reader -> log_compression -> log_index
+
+        wanted = set(categories) if categories else None
+        results = []
+
+        try:
+            f = LogReader.open(segment_path)
+        except OSError:
+            return []
+
+        with f:
+            file_size = f.seek(0, os.SEEK_END)
+            ranges = LogIndex._candidates(LogIndex._ranges(LogIndex.load(segment_path), file_size), start, end)
+            for lo, hi, first_ts, last_ts, block_categories in ranges:
+                if first_ts is not None:
+                    if end is not None and first_ts > end:
+                        continue
+                    if start is not None and last_ts < start:
+                        continue
+                    if wanted and not wanted.intersection(block_categories):
+                        continue
+
+                for record in LogIndex._read_range(f, lo, hi):
+                    if start is not None and record.timestamp < start:
+                        continue
+                    if end is not None and record.timestamp > end:
+                        continue
+                    if wanted and record.category not in wanted:
+                        continue
+                    results.append(record)
+                    if limit and len(results) >= limit:
+                        return results
+        return results
+
+    @staticmethod
+    def _read_range(f, lo, hi, needles=None):
+        """
+        Parse the lines that START inside [lo, hi).
+        A line cut at lo belongs to the previous range; a line cut at hi is completed.
+        needles: optional lowercase byte strings that must all occur in a line (cheap pre-filter before parsing)
+        """
+        if lo > 0:
+            f.seek(lo - 1)
+            if f.read(1) != b"\n":
+                f.readline()  # Skip the tail of a line owned by the previous range
+        else:
+            f.seek(0)
+
+        while f.tell() < hi:
+            raw = f.readline()
+            if not raw:
+                break
+            if needles:
+                lowered = raw.lower()
+                if not all(needle in lowered for needle in needles):
+                    continue
+            record = LogRecord.parse(raw.decode('utf-8', errors='replace'))
+            if record is not None:
+                yield record
@@ -0,0 +1,93 @@
+import os
+
+from models.log_compression import LogCompressor, GzipBlockFile
+
+
+class LogReader:
+    """
+    Bounded readers for log segments.
+    Work and memory scale with the lines requested, not with the file size:
+    - tail(): reads fixed-size blocks backwards from the end of the file
+    - page(): skips to a line offset by counting newlines per block, then reads 'limit' lines
+    Compressed segments ('.log.gz') are read through GzipBlockFile, one block at a time.
+    """
+    BLOCK_SIZE = 64 * 1024
+
+    @staticmethod
+    def open(path):
+        """Binary, seekable handle over a plain or compressed segment."""
+        if path.endswith(LogCompressor.SUFFIX):
+            return GzipBlockFile(path)
+        return open(path, 'rb')
+
+    @staticmethod
+    def _decode(raw):
+        return raw.decode('utf-8', errors='replace').strip()
+
+    @staticmethod
+    def tail(path, count):
+        """Last 'count' lines of a file (oldest first)."""
+        if count <= 0:
+            return []
+
+        with LogReader.open(path) as f:
+            pos = f.seek(0, os.SEEK_END)
+            chunks = []
+            newlines = 0
+
+            # One extra newline marks where the first wanted line starts
+            while pos > 0 and newlines <= count:
+                step = min(LogReader.BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                chunks.append(chunk)
+                newlines += chunk.count(b"\n")
+
+        data = b"".join(reversed(chunks))
+        if not data:
+            return []
+        lines = data.split(b"\n")
+        if data.endswith(b"\n"):
+            lines.pop()   # Terminator of the last line, not an extra empty line
+        if pos > 0:
+            lines = lines[1:]  # Cut in the middle of a line
+
+        return [LogReader._decode(raw) for raw in lines[-count:]]
+
+    @staticmethod
+    def page(path, offset=0, limit=None):
+        """
+        Lines [offset, offset + limit) from the start of a file.
+        Returns (lines, has_more).
+        """
+        with LogReader.open(path) as f:
+            if offset > 0 and not LogReader._skip_lines(f, offset):
+                return [], False
+
+            lines = []
+            for raw in f:
+                if limit is not None and len(lines) >= limit:
+                    return lines, True
+                lines.append(LogReader._decode(raw))
+            return lines, False
+
+    @staticmethod
+    def _skip_lines(f, count):
+        """Position f right after the count-th newline. False if the file is shorter."""
+        skipped = 0
+        while True:
+            chunk = f.read(LogReader.BLOCK_SIZE)
+            if not chunk:
+                return False
+
+            found = chunk.count(b"\n")
+            if skipped + found < count:
+                skipped += found
+                continue
+
+            idx = -1
+            for _ in range(count - skipped):
+                idx = chunk.index(b"\n", idx + 1)
+            f.seek(f.tell() - len(chunk) + idx + 1)
+            return True
@@ -0,0 +1,89 @@
+import json
+import re
+import time
+
+
+class LogRecord:
+    """
+    One structured log entry.
+    On disk it keeps the classic line format so existing readers (Manager app, watchdog) still work:
+        [YYYY-MM-DD HH:MM:SS] [CATEGORY] message {"optional": "fields"}
+    """
+    __slots__ = ("timestamp", "category", "level", "message", "fields", "seq", "_line")
+
+    # Default level per category (anything else is "info")
+    CATEGORY_LEVELS = {
+        "ERROR": "error",
+        "ALERT": "warning",
+        "WATCHDOG": "warning",
+    }
+
+    _LINE_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[([^\]]+)\] (.*)$")
+    _last_stamp = (None, None)  # (stamp, epoch) - consecutive lines mostly share the same second
+
+    def __init__(self, timestamp, category, message, level=None, fields=None):
+        self.timestamp = timestamp  # epoch seconds
+        self.category = category
+        self.message = message
+        self.level = level or self.CATEGORY_LEVELS.get(category, "info")
+        self.fields = fields or None
+        self.seq = None  # Assigned by AppLogger for live records (stream cursor)
+        self._line = None
+
+    def format(self) -> str:
+        """Text line without trailing newline (cached)."""
+        if self._line is None:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp))
+            line = f"[{stamp}] [{self.category}] {self.message}"
+
+            extra = dict(self.fields) if self.fields else {}
+            if self.level != self.CATEGORY_LEVELS.get(self.category, "info"):
+                extra["level"] = self.level
+            if extra:
+                line += " " + json.dumps(extra, separators=(",", ":"), default=str)
+            self._line = line
+        return self._line
+
+    def to_dict(self) -> dict:
+        data = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp)),
+            "category": self.category,
+            "level": self.level,
+            "message": self.message,
+            "fields": self.fields or {}
+        }
+        if self.seq is not None:
+            data["seq"] = self.seq
+        return data
+
+    @classmethod
+    def parse(cls, line: str):
+        """Parse a stored line back into a record. Returns None for foreign/torn lines."""
+        match = cls._LINE_RE.match(line.rstrip("\r\n"))
+        if not match:
+            return None
+
+        stamp, category, message = match.groups()
+        last_stamp, timestamp = cls._last_stamp
+        if stamp != last_stamp:
+            try:
+                timestamp = time.mktime(time.strptime(stamp, "%Y-%m-%d %H:%M:%S"))
+            except ValueError:
+                return None
+            cls._last_stamp = (stamp, timestamp)
+
+        fields = None
+        level = None
+        if message.endswith("}"):
+            brace = message.rfind(" {")
+            if brace != -1:
+                try:
+                    fields = json.loads(message[brace + 1:])
+                    message = message[:brace]
+                    level = fields.pop("level", None)
+                except ValueError:
+                    fields = None
+
+        record = cls(timestamp, category, message, level, fields)
+        record._line = line.rstrip("\r\n")
+        return record
@@ -0,0 +1,211 @@
+import os
+import threading
+from datetime import datetime
+
+from models.app_logger import AppLogger
+from models.log_compression import LogCompressor
+from models.log_index import LogIndex
+from models.log_search import LogSearch
+
+
+class LogRetention:
+    """
+    Singleton Class.
+    Background retention for probes/ (runs as the 'log_retention' scheduler job).
+    - Keeps an in-memory table of archive sizes (one directory listing at startup,
+      then updated by AppLogger on rotation/compression/deletion)
+    - Merges the size-rotation parts of past days (info-D-HHMMSS.log.gz, -partN, ...) into
+      one daily archive 'info-D.log.gz' by concatenating gzip members (no recompression)
+    - Enforces both an age limit (log_retention_days) and a total size budget (log_retention_mb),
+      dropping the oldest archives first
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._archives = None  # { filename: [bytes incl. side files, mtime] }, loaded on first use
+        self._undeletable = set()  # Sources a merge couldn't remove (file in use); retried every run
+
+        self.retention_days = 30
+        self.max_bytes = 500 * 1024 * 1024
+        self._configured = False
+
+    def configure(self, config):
+        """Apply 'system_settings' retention keys. Returns True if the limits changed since the last call."""
+        sys_settings = config.get('system_settings', {})
+        retention_days = sys_settings.get('log_retention_days', 30)
+        max_bytes = sys_settings.get('log_retention_mb', 500) * 1024 * 1024
+
+        changed = self._configured and (retention_days, max_bytes) != (self.retention_days, self.max_bytes)
+        self._configured = True
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        return changed
+
+    # ============= SIZE TABLE =============
+
+    @staticmethod
+    def _measure(file_path):
+        """(bytes incl. .idx/.terms, mtime) of one archive, or None if it is gone."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        size = stat.st_size
+        for side_file in (LogIndex.path_for(file_path), LogSearch.path_for(file_path)):
+            try:
+                size += os.path.getsize(side_file)
+            except OSError:
+                pass
+        return [size, stat.st_mtime]
+
+    def _ensure_loaded_locked(self):
+        if self._archives is not None:
+            return
+        self._archives = {}
+        archive_path = AppLogger._get_archive_path()
+        for filename in AppLogger.get_archive_list():
+            measured = self._measure(os.path.join(archive_path, filename))
+            if measured:
+                self._archives[filename] = measured
+
+    def track(self, file_path):
+        """Add or refresh an archive (called after rotation, compression, indexing)."""
+        with self._lock:
+            if self._archives is None:
+                return  # Picked up by the initial listing
+            measured = self._measure(file_path)
+            if measured:
+                self._archives[os.path.basename(file_path)] = measured
+            else:
+                self._archives.pop(os.path.basename(file_path), None)
+
+    def untrack(self, file_path):
+        with self._lock:
+            if self._archives is not None:
+                self._archives.pop(os.path.basename(file_path), None)
+
+    # ============= JOB =============
+
+    def run(self):
+        """Merge parts of past days, then enforce age and size limits."""
+        try:
+            # Never race the compressor/indexer over the same files
+            with AppLogger._compress_lock:
+                with self._lock:
+                    self._ensure_loaded_locked()
+                self._retry_undeletable()
+                merged = self._merge_parts()
+                removed, freed = self._enforce()
+        except Exception as e:
+            print(f"⚠️ Log Cleanup Failed: {e}")
+            return
+
+        if merged:
+            AppLogger.log(f"Merged {merged} rotated log parts into daily archives", category="LOGGER")
+        if removed:
+            AppLogger.log(
+                f"Cleaned up {removed} old log files, {freed // 1024} KB "
+                f"(Retention: {self.retention_days} days, {self.max_bytes // (1024 * 1024)} MB)",
+                category="LOGGER"
+            )
+
+    def _retry_undeletable(self):
+        archive_path = AppLogger._get_archive_path()
+        for filename in list(self._undeletable):
+            try:
+                AppLogger.remove_archive(os.path.join(archive_path, filename))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            self._undeletable.discard(filename)
+
+    def _merge_parts(self):
+        """One 'info-D.log.gz' per past day. Returns the number of parts folded in."""
+        archive_path = AppLogger._get_archive_path()
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        with self._lock:
+            snapshot = {name: list(entry) for name, entry in self._archives.items()}
+
+        days = {}
+        for filename, (_, mtime) in snapshot.items():
+            if filename in self._undeletable:
+                continue
+            days.setdefault(filename[5:15], []).append((mtime, filename))
+
+        merged = 0
+        for day, parts in days.items():
+            if day >= today or len(parts) < 2:
+                continue
+            if not all(name.endswith(LogCompressor.SUFFIX) for _, name in parts):
+                continue  # Some parts are still waiting for compression
+
+            parts.sort()
+            sources = [os.path.join(archive_path, name) for _, name in parts]
+            target = os.path.join(archive_path, f"info-{day}.log{LogCompressor.SUFFIX}")
+
+            try:
+                LogCompressor.merge(sources, target)
+            except Exception as e:
+                print(f"⚠️ Log Merge Failed: {e}")
+                continue
+
+            for source in sources:
+                if source == target:
+                    continue
+                try:
+                    AppLogger.remove_archive(source)
+                except OSError:
+                    # Still open somewhere (Windows): keep it out of future merges, delete later
+                    self._undeletable.add(os.path.basename(source))
+                    self.untrack(source)
+                merged += 1
+
+            # Postings refer to the old block layout: rebuild for the merged file
+            try:
+                os.remove(LogSearch.path_for(target))
+            except OSError:
+                pass
+            LogSearch.forget(target)
+            try:
+                LogSearch.build(target)
+            except Exception as e:
+                print(f"⚠️ Log Search Index Failed: {e}")
+            self.track(target)
+
+        return merged
+
+    def _enforce(self):
+        """Drop oldest archives while over age or size. Returns (count, bytes freed)."""
+        archive_path = AppLogger._get_archive_path()
+        cutoff = datetime.now().timestamp() - self.retention_days * 86400
+
+        with self._lock:
+            entries = sorted((mtime, size, name) for name, (size, mtime) in self._archives.items())
+            total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        freed = 0
+        for mtime, size, filename in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                AppLogger.remove_archive(os.path.join(archive_path, filename))
+            except FileNotFoundError:
+                self.untrack(os.path.join(archive_path, filename))
+            except OSError:
+                continue  # In use, try next run
+            total -= size
+            freed += size
+            removed += 1
+        return removed, freed
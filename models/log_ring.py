@@ -0,0 +1,109 @@
+import threading
+
+
+class LogRing:
+    """
+    Fixed-size ring of recent LogRecords addressed by sequence number (the live-view buffer).
+    - Record with seq N lives in slot N % capacity; seq starts at 1 and never goes back
+    - Writers serialize on a small lock of their own; readers take no lock at all:
+      they read the published seq, then check each slot's record.seq, so a slot that was
+      overwritten mid-read is reported as dropped instead of returned out of order
+    - "Last N" and "since seq X" only touch the slots they return (no full copy)
+    Relies on list item and attribute assignment being atomic (CPython).
+    """
+
+    def __init__(self, capacity=500):
+        self._slots = [None] * max(1, int(capacity))
+        self._seq = 0  # Last published seq
+        self._write_lock = threading.Lock()
+        self._cond = threading.Condition(threading.Lock())
+        self._waiters = 0
+
+    @property
+    def capacity(self):
+        return len(self._slots)
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the newest records that still fit."""
+        capacity = max(1, int(capacity))
+        with self._write_lock:
+            old = self._slots
+            if capacity == len(old):
+                return
+            slots = [None] * capacity
+            for seq in range(max(1, self._seq - min(capacity, len(old)) + 1), self._seq + 1):
+                record = old[seq % len(old)]
+                if record is not None and record.seq == seq:
+                    slots[seq % capacity] = record
+            self._slots = slots
+
+    def append(self, record):
+        """Assign the next seq, store, publish. Returns the seq."""
+        with self._write_lock:
+            seq = self._seq + 1
+            record.seq = seq
+            slots = self._slots
+            slots[seq % len(slots)] = record
+            self._seq = seq  # Publish after the slot is filled
+
+        # Only pay for the condition lock when someone is long-polling
+        if self._waiters:
+            with self._cond:
+                self._cond.notify_all()
+        return seq
+
+    def latest(self, count):
+        """The newest 'count' records, oldest first."""
+        slots = self._slots
+        last = self._seq
+        first = max(1, last - min(count, len(slots)) + 1)
+        records = []
+        for seq in range(first, last + 1):
+            record = slots[seq % len(slots)]
+            if record is not None and record.seq == seq:
+                records.append(record)
+        return records
+
+    def since(self, cursor=None, limit=500, predicate=None):
+        """
+        Records with seq > cursor (None = from the oldest buffered one).
+        Returns (records, new_cursor, dropped); records rejected by 'predicate' still advance
+        the cursor, dropped = records that were overwritten before the caller read them.
+        """
+        slots = self._slots
+        last = self._seq
+        oldest = max(1, last - len(slots) + 1)
+        if cursor is None or cursor > last:
+            cursor = oldest - 1  # Fresh viewer, or a cursor from a previous process run
+
+        dropped = max(0, oldest - (cursor + 1))
+        records = []
+        for seq in range(max(cursor + 1, oldest), last + 1):
+            record = slots[seq % len(slots)]
+            if record is None or record.seq != seq:
+                # Overwritten while reading: everything up to here is gone
+                dropped += 1
+                cursor = seq
+                continue
+            cursor = seq
+            if predicate is not None and not predicate(record):
+                continue
+            records.append(record)
+            if len(records) >= limit:
+                break
+        return records, cursor, dropped
+
+    def wait(self, after_seq, timeout):
+        """Block until a record newer than 'after_seq' is published or 'timeout' passes."""
+        with self._cond:
+            self._waiters += 1
+            try:
+                if self._seq <= after_seq:
+                    self._cond.wait(timeout)
+            finally:
+                self._waiters -= 1
+        return self._seq > after_seq
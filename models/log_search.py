@@ -0,0 +1,208 @@
+import os
+import re
+import json
+import threading
+
+from models.log_index import LogIndex
+from models.log_reader import LogReader
+
+
+class LogSearch:
+    """
+    Inverted index for archived log segments ('info-X.log.gz' -> 'info-X.log.gz.terms').
+    - The segment is split into the byte ranges of its LogIndex (64-record blocks + unindexed gaps)
+    - Postings map each token of the message/fields to the ranges containing it
+    - A query reads only ranges holding ALL its terms, then confirms matches per record
+    Built once per segment after rotation/compression (archives are immutable afterwards).
+    Segments without a terms file (today's info.log, not yet indexed) are scanned.
+    """
+    SUFFIX = ".terms"
+    _TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.:/][a-z0-9]+)*")
+    _SPLIT_RE = re.compile(r"[-_.:/]")
+    SNIPPET_CHARS = 160
+
+    _cache = {}  # { terms_path: (mtime, ranges, postings) }
+    _lock = threading.Lock()
+
+    @staticmethod
+    def path_for(segment_path):
+        return segment_path + LogSearch.SUFFIX
+
+    # ============= TOKENIZER =============
+
+    @staticmethod
+    def tokenize(text):
+        """
+        Lowercase word tokens. Compound tokens are kept whole and split:
+        'PC-3' -> {'pc-3', 'pc', '3'}, '192.168.1.1' -> {'192.168.1.1', '192', '168', '1'}
+        """
+        tokens = set()
+        for token in LogSearch._TOKEN_RE.findall(text.lower()):
+            tokens.add(token)
+            if not token.isalnum():
+                tokens.update(part for part in LogSearch._SPLIT_RE.split(token) if part)
+        return tokens
+
+    @staticmethod
+    def _record_tokens(record):
+        text = record.message
+        if record.fields:
+            text += " " + json.dumps(record.fields, default=str)
+        return LogSearch.tokenize(text)
+
+    # ============= BUILD =============
+
+    @staticmethod
+    def build(segment_path):
+        """Write the terms file for one (sealed) segment. Returns the number of distinct terms."""
+        ranges = []
+        postings = {}
+
+        with LogReader.open(segment_path) as f:
+            file_size = f.seek(0, os.SEEK_END)
+            for lo, hi, _, _, _ in LogIndex._ranges(LogIndex.load(segment_path), file_size):
+                range_id = len(ranges)
+                first_ts = last_ts = None
+                categories = set()
+                for record in LogIndex._read_range(f, lo, hi):
+                    if first_ts is None:
+                        first_ts = record.timestamp
+                    last_ts = record.timestamp
+                    categories.add(record.category)
+                    for token in LogSearch._record_tokens(record):
+                        ids = postings.setdefault(token, [])
+                        if not ids or ids[-1] != range_id:
+                            ids.append(range_id)
+                ranges.append([lo, hi, first_ts, last_ts, sorted(categories)])
+
+        terms_path = LogSearch.path_for(segment_path)
+        tmp_path = terms_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"ranges": ranges, "terms": postings}, f, separators=(",", ":"))
+        os.replace(tmp_path, terms_path)
+        return len(postings)
+
+    @staticmethod
+    def _load(segment_path):
+        """(ranges, postings) for a segment, or None if it has no terms file. Cached by mtime."""
+        terms_path = LogSearch.path_for(segment_path)
+        try:
+            mtime = os.path.getmtime(terms_path)
+        except OSError:
+            return None
+
+        with LogSearch._lock:
+            cached = LogSearch._cache.get(terms_path)
+            if cached and cached[0] == mtime:
+                return cached[1], cached[2]
+
+        try:
+            with open(terms_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with LogSearch._lock:
+            LogSearch._cache[terms_path] = (mtime, data["ranges"], data["terms"])
+        return data["ranges"], data["terms"]
+
+    @staticmethod
+    def forget(segment_path):
+        """Drop a deleted segment from the cache."""
+        with LogSearch._lock:
+            LogSearch._cache.pop(LogSearch.path_for(segment_path), None)
+
+    # ============= QUERY =============
+
+    @staticmethod
+    def _candidate_ranges(segment_path, terms, categories, start, end):
+        """Byte ranges that may contain a match, in file order."""
+        loaded = LogSearch._load(segment_path)
+        if loaded is None:
+            # Not indexed: every range is a candidate (LogIndex time/category pruning still applies)
+            with LogReader.open(segment_path) as f:
+                file_size = f.seek(0, os.SEEK_END)
+            return [
+                (lo, hi) for lo, hi, first_ts, last_ts, cats
+                in LogIndex._candidates(LogIndex._ranges(LogIndex.load(segment_path), file_size), start, end)
+                if first_ts is None or LogSearch._range_matches(first_ts, last_ts, cats, categories, start, end)
+            ]
+
+        ranges, postings = loaded
+        if terms:
+            # Intersect posting lists, rarest first
+            lists = sorted((postings.get(term, []) for term in terms), key=len)
+            ids = set(lists[0])
+            for other in lists[1:]:
+                ids.intersection_update(other)
+                if not ids:
+                    break
+            ids = sorted(ids)
+        else:
+            ids = range(len(ranges))
+
+        candidates = []
+        for range_id in ids:
+            lo, hi, first_ts, last_ts, cats = ranges[range_id]
+            if first_ts is not None and LogSearch._range_matches(first_ts, last_ts, cats, categories, start, end):
+                candidates.append((lo, hi))
+        return candidates
+
+    @staticmethod
+    def _range_matches(first_ts, last_ts, range_categories, categories, start, end):
+        if end is not None and first_ts > end:
+            return False
+        if start is not None and last_ts < start:
+            return False
+        if categories and not categories.intersection(range_categories):
+            return False
+        return True
+
+    @staticmethod
+    def search_segment(segment_path, query, categories=None, start=None, end=None, newest_first=True):
+        """
+        Yields matching records of one segment (newest first by default).
+        A record matches when it contains every query term (same tokenizer as the index).
+        """
+        terms = LogSearch.tokenize(query) if query else set()
+        wanted = set(categories) if categories else None
+        candidates = LogSearch._candidate_ranges(segment_path, terms, wanted, start, end)
+        if newest_first:
+            candidates.reverse()
+
+        # Every token of a matching record is a substring of its line: skip other lines unparsed
+        needles = [term.encode('utf-8') for term in terms]
+
+        with LogReader.open(segment_path) as f:
+            for lo, hi in candidates:
+                records = list(LogIndex._read_range(f, lo, hi, needles))
+                if newest_first:
+                    records.reverse()
+                for record in records:
+                    if start is not None and record.timestamp < start:
+                        continue
+                    if end is not None and record.timestamp > end:
+                        continue
+                    if wanted and record.category not in wanted:
+                        continue
+                    if terms and not terms.issubset(LogSearch._record_tokens(record)):
+                        continue
+                    yield record
+
+    @staticmethod
+    def snippet(record, query):
+        """Message excerpt around the first query term."""
+        message = record.message
+        if len(message) <= LogSearch.SNIPPET_CHARS:
+            return message
+
+        lowered = message.lower()
+        first = -1
+        for term in LogSearch.tokenize(query or ""):
+            pos = lowered.find(term)
+            if pos != -1 and (first == -1 or pos < first):
+                first = pos
+
+        start = max(0, first - LogSearch.SNIPPET_CHARS // 3) if first != -1 else 0
+        end = start + LogSearch.SNIPPET_CHARS
+        return ("…" if start > 0 else "") + message[start:end] + ("…" if end < len(message) else "")
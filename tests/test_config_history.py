@@ -0,0 +1,175 @@
+import pytest
+from cryptography.fernet import Fernet, MultiFernet
+
+from models.app_logger import AppLogger
+from models.config_history import ConfigHistory
+
+
+def make_config(value):
+    return {"monitor_settings": {"pc_count": value, "pc_subnet": "192.168.1"},
+            "discord_settings": {"shop_name": f"Cafe {value}"}}
+
+
+@pytest.fixture
+def cipher():
+    return MultiFernet([Fernet(Fernet.generate_key())])
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    messages = []
+    monkeypatch.setattr(AppLogger, "log", lambda msg, category="INFO", **_: messages.append((category, msg)))
+    return messages
+
+
+def fill(history, count):
+    return [history.record(make_config(i), source="test") for i in range(1, count + 1)]
+
+
+def test_record_and_get_across_checkpoint_boundary(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    revs = fill(history, ConfigHistory.CHECKPOINT_EVERY * 2 + 5)
+
+    assert revs == list(range(1, len(revs) + 1))
+    assert history.head == revs[-1]
+    for rev in revs:
+        assert history.get(rev) == make_config(rev)
+    checkpoints = [e["rev"] for e in history._index if e["full"]]
+    assert checkpoints == [1, 1 + ConfigHistory.CHECKPOINT_EVERY, 1 + 2 * ConfigHistory.CHECKPOINT_EVERY]
+    assert history.get(0) is None and history.get(revs[-1] + 1) is None
+
+
+def test_revisions_list_changed_sections(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    history.record(make_config(1), source="startup")
+    config = make_config(1)
+    config["discord_settings"]["shop_name"] = "Renamed"
+    history.record(config, source="api")
+
+    newest, oldest = history.revisions()
+    assert newest["revision"] == 2 and newest["source"] == "api"
+    assert newest["sections"] == ["discord_settings"]
+    assert oldest["revision"] == 1 and oldest["sections"] == []
+
+
+def test_null_value_forces_checkpoint(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    history.record(make_config(1))
+    config = make_config(2)
+    config["discord_settings"]["shop_name"] = None
+    history.record(config)
+
+    assert history._index[-1]["full"]
+    assert history.get(2) == config
+
+
+def test_restart_reloads_index_and_head(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    fill(history, 30)
+
+    reloaded = ConfigHistory(str(tmp_path), cipher)
+    assert reloaded.head == 30
+    assert reloaded.head_config() == make_config(30)
+    assert reloaded.get(25) == make_config(25)
+    assert reloaded.record(make_config(31)) == 31
+
+
+def test_compact_keeps_newest_and_checkpoints_oldest(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    history.MAX_REVISIONS = 15
+    fill(history, 30)
+
+    assert history.compact() == 15
+    assert [r["revision"] for r in history.revisions()][-1] == 16
+    assert history._index[0]["full"]
+    assert history.get(10) is None
+    for rev in range(16, 31):
+        assert history.get(rev) == make_config(rev)
+    assert history.compact() == 0
+
+    # Revision ids keep counting after compaction and a restart
+    reloaded = ConfigHistory(str(tmp_path), cipher)
+    assert reloaded.get(16) == make_config(16)
+    assert reloaded.record(make_config(31)) == 31
+
+
+def test_reencrypt_with_new_key(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    fill(history, 25)
+
+    new_key = Fernet(Fernet.generate_key())
+    history._cipher = MultiFernet([new_key] + cipher._fernets)
+    is_current = lambda token: _decrypts(new_key, token)
+    assert history.reencrypt(is_current)
+
+    with open(history.path, 'rb') as f:
+        assert all(is_current(line.strip()) for line in f)
+    reloaded = ConfigHistory(str(tmp_path), MultiFernet([new_key]))
+    assert reloaded.head == 25
+    assert reloaded.get(7) == make_config(7)
+
+
+def _decrypts(fernet, token):
+    try:
+        fernet.decrypt(token)
+        return True
+    except Exception:
+        return False
+
+
+def test_torn_tail_is_trimmed(tmp_path, cipher):
+    history = ConfigHistory(str(tmp_path), cipher)
+    fill(history, 3)
+    with open(history.path, 'rb') as f:
+        intact = f.read()
+    with open(history.path, 'ab') as f:
+        f.write(b"gAAAAAtorn-half-written-record")
+
+    reloaded = ConfigHistory(str(tmp_path), cipher)
+    assert reloaded.head == 3
+    assert reloaded.head_config() == make_config(3)
+    with open(history.path, 'rb') as f:
+        assert f.read() == intact
+    assert reloaded.record(make_config(4)) == 4
+    assert ConfigHistory(str(tmp_path), cipher).get(4) == make_config(4)
+
+
+def test_corrupt_record_moves_journal_aside(tmp_path, cipher, logged):
+    history = ConfigHistory(str(tmp_path), cipher)
+    fill(history, 3)
+    with open(history.path, 'rb') as f:
+        lines = f.readlines()
+    lines[1] = b"not-a-fernet-token\n"
+    with open(history.path, 'wb') as f:
+        f.writelines(lines)
+
+    reloaded = ConfigHistory(str(tmp_path), cipher)
+    assert reloaded.head_config() is None and reloaded.revisions() == []
+    assert (tmp_path / "history.log.corrupt").read_bytes() == b"".join(lines)
+    assert any(category == "ERROR" and "record 2" in msg for category, msg in logged)
+
+    # Revision ids never go back to ones a client may still hold (If-Match)
+    assert reloaded.head == 3
+    assert reloaded.record(make_config(4)) == 4
+    assert ConfigHistory(str(tmp_path), cipher).head == 4
+
+    # A second corruption never overwrites the first quarantined file
+    with open(history.path, 'ab') as f:
+        f.write(b"garbage\n")
+    assert ConfigHistory(str(tmp_path), cipher).head == 5
+    assert (tmp_path / "history.log.corrupt.1").exists()
+
+
+def test_quarantine_skips_ids_of_unreadable_tail(tmp_path, cipher, logged):
+    history = ConfigHistory(str(tmp_path), cipher)
+    fill(history, 5)
+    with open(history.path, 'rb') as f:
+        lines = f.readlines()
+    lines[2] = b"not-a-fernet-token\n"
+    lines[4] = b"also-broken\n"
+    with open(history.path, 'wb') as f:
+        f.writelines(lines)
+
+    reloaded = ConfigHistory(str(tmp_path), cipher)
+    assert reloaded.head == 5
+    assert reloaded.record(make_config(6)) == 6
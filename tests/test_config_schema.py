@@ -0,0 +1,143 @@
+from collections.abc import Mapping
+
+from models.config_schema import ConfigSchema
+from models.config_snapshot import ConfigSnapshot
+
+
+def paths(errors):
+    return sorted(error["path"] for error in errors)
+
+
+def test_defaults_validate_clean():
+    normalized, errors = ConfigSchema.validate(ConfigSchema.defaults())
+    assert errors == []
+    assert normalized == ConfigSchema.defaults()
+
+
+def test_values_are_coerced():
+    config = ConfigSchema.defaults()
+    config["monitor_settings"].update(pc_count="30", pc_start_range=100.0, pc_subnet=" 10.0.0 ")
+    config["screenshot_settings"].update(enabled="false", quality="75")
+
+    normalized, errors = ConfigSchema.validate(config)
+
+    assert errors == []
+    assert normalized["monitor_settings"]["pc_count"] == 30
+    assert normalized["monitor_settings"]["pc_start_range"] == 100
+    assert normalized["monitor_settings"]["pc_subnet"] == "10.0.0"
+    assert normalized["screenshot_settings"]["enabled"] is False
+    assert normalized["screenshot_settings"]["quality"] == 75
+
+
+def test_every_error_is_reported_with_its_path():
+    config = ConfigSchema.defaults()
+    config["targets"]["router"] = "not a host!"
+    config["monitor_settings"]["pc_count"] = 2.5
+    config["screenshot_settings"]["quality"] = 500
+    config["occupancy_settings"]["mode"] = "always"
+    config["discord_settings"]["webhook_alerts"] = "http://insecure"
+
+    _, errors = ConfigSchema.validate(config)
+
+    assert paths(errors) == ["discord_settings.webhook_alerts", "monitor_settings.pc_count",
+                             "occupancy_settings.mode", "screenshot_settings.quality", "targets.router"]
+    assert "between 1 and 100" in ConfigSchema.format_errors(errors)
+
+
+def test_missing_sections_and_required_fields():
+    config = ConfigSchema.defaults()
+    del config["targets"]
+    del config["monitor_settings"]["pc_subnet"]
+    del config["system_settings"]  # Optional in old configs
+
+    _, errors = ConfigSchema.validate(config)
+
+    assert paths(errors) == ["monitor_settings.pc_subnet", "targets"]
+
+
+def test_partial_checks_only_present_sections():
+    normalized, errors = ConfigSchema.validate({"screenshot_settings": {"quality": "90"}}, partial=True)
+    assert errors == []
+    assert set(normalized) == {"screenshot_settings"}
+    assert normalized["screenshot_settings"]["quality"] == 90
+
+    _, errors = ConfigSchema.validate({"monitor_settings": {"pc_start_range": 250, "pc_count": 20}}, partial=True)
+    assert paths(errors) == ["monitor_settings.pc_count"]
+
+
+def test_cross_field_rules_skip_invalid_sections():
+    config = ConfigSchema.defaults()
+    config["monitor_settings"].update(pc_start_range="abc", pc_count=250)
+    _, errors = ConfigSchema.validate(config)
+    assert paths(errors) == ["monitor_settings.pc_start_range"]
+
+
+def test_repair_resets_invalid_fields():
+    config = ConfigSchema.defaults()
+    config["screenshot_settings"]["quality"] = -1
+    config["occupancy_settings"] = "broken"
+    del config["targets"]
+
+    normalized, errors = ConfigSchema.validate(config, repair=True)
+
+    assert "screenshot_settings.quality" in paths(errors)
+    assert normalized["screenshot_settings"]["quality"] == 80
+    assert normalized["occupancy_settings"] == ConfigSchema.defaults()["occupancy_settings"]
+    assert normalized["targets"] == ConfigSchema.defaults()["targets"]
+    assert ConfigSchema.validate(normalized)[1] == []
+
+
+def test_repair_fixes_cross_field_rules():
+    config = ConfigSchema.defaults()
+    config["monitor_settings"].update(pc_start_range=250, pc_count=20)
+    config["discord_settings"].update(enabled=True, shop_name="")
+    config["system_settings"]["tray_visibility"] = {"router": False, "server": False,
+                                                    "internet": False, "clients": False}
+    config["system_settings"]["log_rate_limits"] = {"NETWORK": {"burst": -1}}
+
+    normalized, errors = ConfigSchema.validate(config, repair=True)
+
+    assert paths(errors) == ["discord_settings.shop_name", "monitor_settings.pc_count",
+                             "system_settings.log_rate_limits.NETWORK.burst", "system_settings.tray_visibility"]
+    defaults = ConfigSchema.defaults()
+    assert normalized["monitor_settings"]["pc_start_range"] == defaults["monitor_settings"]["pc_start_range"]
+    assert normalized["monitor_settings"]["pc_count"] == defaults["monitor_settings"]["pc_count"]
+    assert normalized["discord_settings"]["enabled"] is True
+    assert normalized["discord_settings"]["shop_name"] == defaults["discord_settings"]["shop_name"]
+    assert normalized["system_settings"]["tray_visibility"] == defaults["system_settings"]["tray_visibility"]
+    assert normalized["system_settings"]["log_rate_limits"] == defaults["system_settings"]["log_rate_limits"]
+    assert ConfigSchema.validate(normalized)[1] == []
+
+
+def test_unknown_keys_are_kept():
+    config = ConfigSchema.defaults()
+    config["extra"] = {"a": 1}
+    config["monitor_settings"]["legacy"] = True
+    normalized, errors = ConfigSchema.validate(config)
+    assert errors == []
+    assert normalized["extra"] == {"a": 1}
+    assert normalized["monitor_settings"]["legacy"] is True
+
+
+def test_non_object_config():
+    assert ConfigSchema.validate([]) == (None, [{"path": "", "message": "config must be an object"}])
+
+
+def test_snapshot_defaults_match_schema():
+    snap = ConfigSnapshot({})
+    sections = {"targets": snap.targets, "monitor_settings": snap.monitor,
+                "verification_settings": snap.verification, "screenshot_settings": snap.screenshot,
+                "occupancy_settings": snap.occupancy, "discord_settings": snap.discord,
+                "system_settings": snap.system}
+    for section, fields in ConfigSchema.SCHEMA.items():
+        for key, field in fields.items():
+            assert thaw(getattr(sections[section], key)) == field.default, f"{section}.{key}"
+
+
+def thaw(value):
+    """Plain dicts/lists from the snapshot's read-only views."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
@@ -0,0 +1,96 @@
+import gzip
+import io
+
+import pytest
+
+from models.log_compression import LogCompressor, GzipBlockFile
+from models.log_index import LogIndex
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(LogCompressor, "BLOCK_SIZE", 1000)
+
+
+def write_segment(tmp_path, name="info-1.log", lines=300):
+    path = tmp_path / name
+    data = b"".join(f"2026-01-01 10:00:{i % 60:02d} | NETWORK | line {i}\n".encode() for i in range(lines))
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_compress_writes_standard_gzip(tmp_path, small_blocks):
+    path, data = write_segment(tmp_path)
+
+    original, compressed = LogCompressor.compress(path)
+
+    gz_path = LogCompressor.compressed_path(path)
+    assert original == len(data) and compressed < original
+    assert gzip.decompress(open(gz_path, 'rb').read()) == data  # Members read as one stream
+    assert not (tmp_path / "info-1.log").exists()
+    assert len(LogIndex.load_blocks(gz_path)) == -(-len(data) // 1000)
+
+
+def test_compress_keeps_record_index(tmp_path, small_blocks):
+    path, _ = write_segment(tmp_path)
+    index = LogIndex(path)
+    index.add(1.0, "NETWORK", 0, 50)
+    index.close()
+
+    LogCompressor.compress(path)
+
+    gz_path = LogCompressor.compressed_path(path)
+    assert LogIndex.load(gz_path) == [{"t": 1.0, "u": 1.0, "o": 0, "e": 50, "n": 1, "c": ["NETWORK"]}]
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_block_file_matches_uncompressed_data(tmp_path, small_blocks, indexed):
+    path, data = write_segment(tmp_path)
+    LogCompressor.compress(path)
+    gz_path = LogCompressor.compressed_path(path)
+    if not indexed:
+        (tmp_path / "info-1.log.gz.idx").unlink()  # Block table rebuilt from the gzip members
+
+    with GzipBlockFile(gz_path) as f:
+        assert f.seek(0, io.SEEK_END) == len(data)
+        for offset in (0, 1, 999, 1000, 1001, 4321, len(data) - 7):
+            f.seek(offset)
+            assert f.read(1500) == data[offset:offset + 1500]
+            assert f.tell() == min(len(data), offset + 1500)
+        f.seek(-10, io.SEEK_END)
+        assert f.read() == data[-10:]
+        assert f.read(5) == b""
+
+
+def test_block_file_lines_cross_blocks(tmp_path, small_blocks):
+    path, data = write_segment(tmp_path)
+    LogCompressor.compress(path)
+
+    with GzipBlockFile(LogCompressor.compressed_path(path)) as f:
+        assert list(f) == data.splitlines(keepends=True)
+
+        f.seek(995)  # Inside a line that spans the first block boundary
+        expected = data[995:data.index(b"\n", 995) + 1]
+        assert f.readline() == expected
+        f.seek(10, io.SEEK_CUR)
+        assert f.tell() == 995 + len(expected) + 10
+
+
+def test_merge_concatenates_segments(tmp_path, small_blocks):
+    first, first_data = write_segment(tmp_path, "info-1.log", 100)
+    second, second_data = write_segment(tmp_path, "info-2.log", 150)
+    index = LogIndex(second)
+    index.add(2.0, "SYSTEM", 0, 40)
+    index.close()
+    LogCompressor.compress(first)
+    LogCompressor.compress(second)
+    target = str(tmp_path / "info-merged.log.gz")
+
+    LogCompressor.merge([first + ".gz", second + ".gz"], target)
+
+    with GzipBlockFile(target) as f:
+        assert f.read() == first_data + second_data
+        f.seek(len(first_data))
+        assert f.readline() == second_data.splitlines(keepends=True)[0]
+    entry = LogIndex.load(target)[0]
+    assert (entry["o"], entry["e"]) == (len(first_data), len(first_data) + 40)
@@ -0,0 +1,55 @@
+import pytest
+
+from models.log_compression import LogCompressor
+from models.log_reader import LogReader
+
+LINES = [f"2026-01-01 10:00:00 | SYSTEM | message {i}" for i in range(500)]
+
+
+@pytest.fixture(params=["plain", "gzip"])
+def segment(request, tmp_path, monkeypatch):
+    # Small blocks so reads cross block boundaries on a few KB of data
+    monkeypatch.setattr(LogReader, "BLOCK_SIZE", 512)
+    monkeypatch.setattr(LogCompressor, "BLOCK_SIZE", 700)
+    path = tmp_path / "info-1.log"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    if request.param == "gzip":
+        LogCompressor.compress(str(path))
+        return str(path) + LogCompressor.SUFFIX
+    return str(path)
+
+
+def test_tail(segment):
+    assert LogReader.tail(segment, 3) == LINES[-3:]
+    assert LogReader.tail(segment, 50) == LINES[-50:]
+    assert LogReader.tail(segment, 1000) == LINES
+    assert LogReader.tail(segment, 0) == []
+
+
+def test_page(segment):
+    assert LogReader.page(segment, 0, 10) == (LINES[:10], True)
+    assert LogReader.page(segment, 123, 40) == (LINES[123:163], True)
+    assert LogReader.page(segment, 490, 20) == (LINES[490:], False)
+    assert LogReader.page(segment, 490) == (LINES[490:], False)
+    assert LogReader.page(segment, 500, 10) == ([], False)
+    assert LogReader.page(segment, 900, 10) == ([], False)
+
+
+def test_unterminated_last_line(tmp_path):
+    path = tmp_path / "info.log"
+    path.write_bytes(b"first\nsecond\nhalf-writ")
+    assert LogReader.tail(str(path), 2) == ["second", "half-writ"]
+    assert LogReader.page(str(path), 1) == (["second", "half-writ"], False)
+
+
+def test_invalid_utf8_is_replaced(tmp_path):
+    path = tmp_path / "info.log"
+    path.write_bytes(b"ok\nbad \xff byte\n")
+    assert LogReader.tail(str(path), 1) == ["bad � byte"]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "info.log"
+    path.write_bytes(b"")
+    assert LogReader.tail(str(path), 5) == []
+    assert LogReader.page(str(path), 0, 5) == ([], False)
@@ -0,0 +1,113 @@
+import pytest
+
+from models import log_throttle
+from models.log_throttle import LogThrottle
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(log_throttle.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+def flood(throttle, category, message, count):
+    return [throttle.check(category, message) for _ in range(count)]
+
+
+def test_burst_then_suppressed(clock):
+    throttle = LogThrottle()
+    results = flood(throttle, "NETWORK", "Router unreachable", 8)
+
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False] * 3
+    assert all(summary is None for _, summary in results)
+
+
+def test_periodic_summary_while_suppressed(clock):
+    throttle = LogThrottle()
+    throttle.configure({"NETWORK": {"burst": 1, "summary_minutes": 1}})
+    flood(throttle, "NETWORK", "Router unreachable", 4)  # 1 allowed, 3 suppressed
+
+    clock.now += 61
+    allowed, summary = throttle.check("NETWORK", "Router unreachable")
+
+    assert not allowed
+    message, category, fields = summary
+    assert category == "NETWORK" and fields == {"repeated": 4}
+    assert message == "Router unreachable (repeated 4 times in 1m)"
+
+
+def test_quiet_key_starts_fresh_with_summary(clock):
+    throttle = LogThrottle()
+    flood(throttle, "NETWORK", "Router unreachable", 7)
+
+    clock.now += LogThrottle.DEFAULT_POLICY["window_seconds"] + 1
+    allowed, summary = throttle.check("NETWORK", "Router unreachable")
+
+    assert allowed
+    assert summary[0] == "Router unreachable (repeated 2 times in 0s)"
+
+
+def test_numbers_are_masked(clock):
+    throttle = LogThrottle()
+    messages = [f"Router jitter detected ({i}.5s) after {i} retries" for i in range(8)]
+    results = [throttle.check("NETWORK", message) for message in messages]
+
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False] * 3
+    assert throttle.check("NETWORK", "Router offline")[0]  # Different text = different key
+
+
+def test_distinct_ips_are_not_merged(clock):
+    throttle = LogThrottle()
+    results = [throttle.check("SYSTEM", f"API login failed from 10.0.0.{i}") for i in range(20)]
+    assert all(allowed for allowed, _ in results)
+
+    # The same address repeating is still throttled
+    repeated = flood(throttle, "SYSTEM", "API login failed from 10.0.0.1", 5)
+    assert [allowed for allowed, _ in repeated] == [True] * 4 + [False]
+
+
+def test_unthrottled_categories(clock):
+    throttle = LogThrottle()
+    assert all(allowed for allowed, _ in flood(throttle, "ALERT", "ROUTER DOWN", 50))
+
+    throttle.configure({"NETWORK": {"burst": 0}})
+    assert all(allowed for allowed, _ in flood(throttle, "NETWORK", "Router unreachable", 50))
+
+
+def test_categories_are_separate_keys(clock):
+    throttle = LogThrottle()
+    flood(throttle, "NETWORK", "same text", 5)
+    assert throttle.check("SYSTEM", "same text")[0]
+    assert not throttle.check("NETWORK", "same text")[0]
+
+
+def test_full_table_evicts_least_recently_seen(clock):
+    throttle = LogThrottle()
+    throttle.MAX_KEYS = 3
+    flood(throttle, "NETWORK", "first", 7)   # Suppressed run
+    throttle.check("NETWORK", "second")
+    throttle.check("NETWORK", "third")
+    throttle.check("NETWORK", "second")     # Recently seen, survives
+
+    assert throttle.check("NETWORK", "fourth")[0]
+
+    remaining = {message for _, message in throttle._states}
+    assert remaining == {"second", "third", "fourth"}
+    assert throttle.collect_summaries() == [("first (repeated 2 times in 0s)", "NETWORK", {"repeated": 2})]
+    assert flood(throttle, "NETWORK", "first", 1)[0][0]  # Starts a fresh run
+
+
+def test_collect_summaries(clock):
+    throttle = LogThrottle()
+    flood(throttle, "NETWORK", "Router unreachable", 6)
+    flood(throttle, "SYSTEM", "Slow Scan Loop Detected: 3.2s", 9)
+
+    assert throttle.collect_summaries() == []  # Both still live
+
+    clock.now += 5
+    summaries = throttle.collect_summaries(everything=True)
+    assert sorted(summaries) == [
+        ("Router unreachable (repeated 1 times in 0s)", "NETWORK", {"repeated": 1}),
+        ("Slow Scan Loop Detected: 3.2s (repeated 4 times in 0s)", "SYSTEM", {"repeated": 4}),
+    ]
+    assert throttle.collect_summaries(everything=True) == []
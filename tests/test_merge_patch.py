@@ -0,0 +1,46 @@
+from models.merge_patch import MergePatch
+
+
+def test_apply_merges_objects_and_replaces_other_values():
+    target = {"a": {"b": 1, "c": [1, 2]}, "d": "x"}
+    patch = {"a": {"c": [3]}, "e": {"f": True}}
+
+    result = MergePatch.apply(target, patch)
+
+    assert result == {"a": {"b": 1, "c": [3]}, "d": "x", "e": {"f": True}}
+    assert target == {"a": {"b": 1, "c": [1, 2]}, "d": "x"}  # Inputs untouched
+
+
+def test_apply_null_removes_keys():
+    assert MergePatch.apply({"a": 1, "b": {"c": 2, "d": 3}}, {"a": None, "b": {"c": None}}) == {"b": {"d": 3}}
+    assert MergePatch.apply({"a": 1}, {"missing": None}) == {"a": 1}
+
+
+def test_apply_non_object_patch_replaces_target():
+    assert MergePatch.apply({"a": 1}, [1, 2]) == [1, 2]
+    assert MergePatch.apply("text", {"a": 1}) == {"a": 1}
+
+
+def test_create_round_trips():
+    old = {"a": {"b": 1, "c": 2}, "list": [1], "gone": True}
+    new = {"a": {"b": 1, "c": 5, "new": {"x": 1}}, "list": [1, 2]}
+
+    patch = MergePatch.create(old, new)
+
+    assert patch == {"a": {"c": 5, "new": {"x": 1}}, "list": [1, 2], "gone": None}
+    assert MergePatch.apply(old, patch) == new
+
+
+def test_create_equal_documents_is_empty():
+    assert MergePatch.create({"a": {"b": 1}}, {"a": {"b": 1}}) == {}
+
+
+def test_create_detects_type_changes():
+    assert MergePatch.create({"a": 1}, {"a": 1.0}) == {"a": 1.0}
+    assert MergePatch.create({"a": 1}, {"a": True}) == {"a": True}
+
+
+def test_create_reports_unexpressible_null():
+    assert MergePatch.create({"a": 1}, {"a": None}) is None
+    assert MergePatch.create({}, {"a": {"b": None}}) is None
+    assert MergePatch.create({"a": {"b": 1}}, {"a": {"b": None}}) is None
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
                                QMessageBox, QListWidgetItem, QScrollArea, QWidget)
 from PySide6.QtGui import QIcon
 from PySide6.QtCore import QSize, Qt
-from models.config_manager import ConfigManager
+from models.config_manager import ConfigManager, RevisionConflict
 from models.app_logger import AppLogger
 
 # Try to import resources, pass if fails
@@ -28,7 +28,7 @@ class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.cfg_mgr = ConfigManager.instance()
-        self.config = self.cfg_mgr.get_config()
+        self.read_config()
 
         self.setWindowTitle("CafeSentinel - Settings")
         self.setModal(True)
@@ -147,6 +147,12 @@ class SettingsDialog(QDialog):
 
         return footer
 
+    def read_config(self):
+        """Take the live config and the revision it belongs to (sent back on save)."""
+        snapshot = self.cfg_mgr.snapshot()
+        self.config = snapshot.as_dict()
+        self.revision = snapshot.version
+
     def load_values(self):
         """Distribute config data to child pages"""
         self.network_page.load_data(self.config)
@@ -174,11 +180,16 @@ class SettingsDialog(QDialog):
                     return
 
             # 2. Collection Phase
+            # Sections are merged key-by-key so settings without a widget (API-only keys such as
+            # screenshot regions or log rate limits) survive a save from this dialog
             new_config = self.config.copy()
-            new_config.update(self.network_page.get_data())
-            new_config.update(self.monitoring_page.get_data())
-            new_config.update(self.discord_page.get_data())
-            new_config.update(self.system_page.get_data())
+            for page in (self.network_page, self.monitoring_page, self.discord_page, self.system_page):
+                for section, values in page.get_data().items():
+                    current = new_config.get(section)
+                    if isinstance(current, dict) and isinstance(values, dict):
+                        new_config[section] = {**current, **values}
+                    else:
+                        new_config[section] = values
 
             # --- GUARD RAIL: Stealth Mode Warning ---
             # Check if Stealth Mode is being ENABLED (was False, becoming True)
@@ -207,8 +218,13 @@ class SettingsDialog(QDialog):
                 if reply == QMessageBox.No:
                     return  # Cancel save
 
-            # 3. Save Phase
-            success, message = self.cfg_mgr.update_config(new_config)
+            # 3. Save Phase (rejected if the API changed the config while the dialog was open)
+            try:
+                success, message = self.cfg_mgr.update_config(new_config, source="local",
+                                                              expected_revision=self.revision)
+            except RevisionConflict:
+                self.prompt_reload()
+                return
 
             if success:
                 QMessageBox.information(self, "Success", "Settings saved successfully!")
@@ -219,4 +235,19 @@ class SettingsDialog(QDialog):
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Unexpected error: {str(e)}")
-            AppLogger.log(f"Save failed - {e}", category="SETTINGS")
\ No newline at end of file
+            AppLogger.log(f"Save failed - {e}", category="SETTINGS")
+
+    def prompt_reload(self):
+        """Another client saved first: offer to load its settings instead of overwriting them."""
+        reply = QMessageBox.question(
+            self,
+            "Settings Changed",
+            "The settings were changed remotely (Manager App / API) while this window was open.\n\n"
+            "Reload the current settings? Your unsaved changes in this window will be discarded.",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if reply == QMessageBox.Yes:
+            self.read_config()
+            self.load_values()
+            AppLogger.log("Settings dialog reloaded after a remote change", category="SETTINGS")
@@ -1,4 +1,5 @@
 from PySide6.QtWidgets import QWidget
+from models.config_schema import ConfigSchema
 
 
 class BaseSettingsPage(QWidget):
@@ -49,6 +50,9 @@ class BaseSettingsPage(QWidget):
             - is_valid (bool): True if data is safe to save.
             - error_message (str): User-friendly error if valid is False.
         """
-        # Default to True. Subclasses should override this if they have
-        # specific validation rules (e.g., checking valid IP formats).
+        # Shared config schema, applied to the sections this page edits
+        # (same rules as API saves and startup loading)
+        _, errors = ConfigSchema.validate(self.get_data(), partial=True)
+        if errors:
+            return False, ConfigSchema.format_errors(errors)
         return True, ""
@@ -77,9 +77,3 @@ class DiscordPage(BaseSettingsPage):
                 'webhook_screenshots': self.webhook_screenshots.text().strip()
             }
         }
-
-    def validate(self) -> tuple[bool, str]:
-        if self.discord_enabled.isChecked():
-            if not self.shop_name.text().strip():
-                return False, "Shop Name is required when Discord is enabled."
-        return True, ""
\ No newline at end of file
@@ -179,9 +179,3 @@ class MonitoringPage(BaseSettingsPage):
                 'hourly_snapshot_enabled': self.hourly_snapshot.isChecked()
             }
         }
-
-    def validate(self) -> tuple[bool, str]:
-        subnet = self.pc_subnet.text().strip()
-        if not subnet:
-            return False, "PC Subnet cannot be empty."
-        return True, ""
\ No newline at end of file
@@ -104,12 +104,3 @@ class NetworkPage(BaseSettingsPage):
                 'min_incident_duration_seconds': self.min_incident_duration.value()
             }
         }
-
-    def validate(self) -> tuple[bool, str]:
-        # Basic IP validation
-        for field, name in [(self.router_ip, "Router IP"),
-                            (self.server_ip, "Server IP"),
-                            (self.internet_ip, "Internet IP")]:
-            if not field.text().strip():
-                return False, f"{name} cannot be empty."
-        return True, ""
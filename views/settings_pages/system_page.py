@@ -50,7 +50,20 @@ class SystemPage(BaseSettingsPage):
         maintenance_card.add_row(
             "Log Retention Period",
             self.log_retention,
-            "How many days to keep historical logs in the 'probes' folder.\nFiles older than this will be deleted on startup."
+            "How many days to keep historical logs in the 'probes' folder.\nOlder files are deleted by an hourly background cleanup."
+        )
+
+        # Log Size Budget
+        self.log_retention_mb = QSpinBox()
+        self.log_retention_mb.setRange(50, 10000)
+        self.log_retention_mb.setSingleStep(50)
+        self.log_retention_mb.setSuffix(" MB")
+        self.log_retention_mb.setToolTip("Maximum disk space used by archived logs.")
+
+        maintenance_card.add_row(
+            "Log Storage Limit",
+            self.log_retention_mb,
+            "Total size of the 'probes' folder.\nWhen exceeded, the oldest archives are deleted first."
         )
 
         layout.addWidget(maintenance_card)
@@ -64,6 +77,7 @@ class SystemPage(BaseSettingsPage):
 
         # Load Retention
         self.log_retention.setValue(sys_settings.get("log_retention_days", 30))
+        self.log_retention_mb.setValue(sys_settings.get("log_retention_mb", 500))
 
         # Load Tray Visibility (Default to True if missing)
         visibility = sys_settings.get("tray_visibility", {})
@@ -77,6 +91,7 @@ class SystemPage(BaseSettingsPage):
             'system_settings': {
                 "env_state": self.env_state.isChecked(),
                 "log_retention_days": self.log_retention.value(),
+                "log_retention_mb": self.log_retention_mb.value(),
                 "tray_visibility": {
                     "router": self.toggle_router.isChecked(),
                     "server": self.toggle_server.isChecked(),
@@ -85,21 +100,3 @@ class SystemPage(BaseSettingsPage):
                 }
             }
         }
-
-    def validate(self) -> tuple[bool, str]:
-        # Rule: At least one icon must be visible if Stealth Mode is OFF
-        # (Though effectively we just want to prevent a user from accidentally hiding everything)
-        # Even if Stealth Mode is ON, we should probably enforce at least one check
-        # so when they turn Stealth Mode OFF, something appears.
-
-        any_checked = (
-                self.toggle_router.isChecked() or
-                self.toggle_server.isChecked() or
-                self.toggle_internet.isChecked() or
-                self.toggle_clients.isChecked()
-        )
-
-        if not any_checked:
-            return False, "At least one tray icon must be enabled!"
-
-        return True, ""
@@ -8,6 +8,8 @@ import os
 import ctypes
 from datetime import datetime
 
+from models.file_lock import FileLock
+
 # ==============================================================================
 # --- CONFIG ---
 # ==============================================================================
@@ -71,6 +73,8 @@ def log_watchdog_event(message: str):
     """
     Lightweight raw append logger for watchdog events.
     Writes to the same info.log used by CafeSentinel, but without importing AppLogger.
+    Appends under 'info.log.lock' (shared with CafeSentinel's LogWriter) so lines never
+    interleave and the file is never renamed mid-write.
     """
     try:
         target_path = get_target_path()
@@ -78,10 +82,15 @@ def log_watchdog_event(message: str):
         log_path = os.path.join(base_dir, "info.log")
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"[{timestamp}] [WATCHDOG] {message}\n"
+        line = f"[{timestamp}] [WATCHDOG] {message}\n".encode("utf-8")
 
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(line)
+        lock = FileLock(log_path + ".lock")
+        try:
+            lock.acquire(timeout=2.0)  # Write anyway on timeout: a late line beats a lost one
+            with open(log_path, "ab") as f:
+                f.write(line)
+        finally:
+            lock.close()
     except Exception:
         # Watchdog must never crash because of logging
         pass